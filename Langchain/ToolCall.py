@@ -1,19 +1,9 @@
-import os
-from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
-from langchain_core.prompts import ChatPromptTemplate
-import getpass
+from llm import get_llm
+from prompts import CompiledPrompt
+from fewshot import ExampleSelector
 
-load_dotenv()
-
-if not os.getenv("GEMINI_API_KEY"):
-    os.environ["GEMINI_API_KEY"] = getpass.getpass("Enter your Gemini API key: ")
-
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",
-    google_api_key=os.getenv("GEMINI_API_KEY")
-)
+llm = get_llm()
 
 print("✅ Gemini model initialized successfully")
 
@@ -67,11 +57,14 @@ examples = [
     ToolMessage("", tool_call_id="3"),
 ]
 
+# Only the examples closest to each input go into the prompt
+selector = ExampleSelector.from_messages(examples, k=2)
+
 system = """You are a hilarious comedian. Your specialty is knock-knock jokes. \
 Return a joke which has the setup (the response to "Who's there?") \
 and the final punchline (the response to "<setup> who?")."""
 
-prompt = ChatPromptTemplate.from_messages(
+prompt = CompiledPrompt(
     [
         ("system", system),
         ("placeholder", "{examples}"),
@@ -82,7 +75,8 @@ prompt = ChatPromptTemplate.from_messages(
 structured_llm = llm
 few_shot_structured_llm = prompt | structured_llm
 
-response = few_shot_structured_llm.invoke({"input": "crocodile", "examples": examples})
+query = "crocodile"
+response = few_shot_structured_llm.invoke({"input": query, "examples": selector.messages(query)})
 print(response)
 
 
@@ -0,0 +1,198 @@
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables.config import ensure_config, get_callback_manager_for_config, patch_config
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tokens import count_messages, message_text, truncate
+
+
+def extractive_summary(turns, previous=""):
+    """One line per turn: the question, the tools it used and the answer, cut short.
+
+    Costs nothing (no model call); pass llm_summarizer(llm) to
+    ConversationMemory for a real summary instead.
+    """
+    lines = [previous] if previous else []
+    for turn in turns:
+        question = turn[0].content if turn else ""
+        tools = [m.name for m in turn if isinstance(m, ToolMessage) and m.name]
+        answer = next((message_text(m) for m in reversed(turn)
+                       if isinstance(m, AIMessage) and not m.tool_calls), "")
+        line = f"- User: {truncate(question, 40)}"
+        if tools:
+            line += f" (tools: {', '.join(tools)})"
+        if answer:
+            line += f" → {truncate(answer, 60)}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def llm_summarizer(llm):
+    """A summarize(turns, previous) that asks `llm` to fold the turns into the summary."""
+    def summarize(turns, previous=""):
+        transcript = "\n".join(f"{type(m).__name__}: {message_text(m)}" for turn in turns for m in turn)
+        return llm.invoke([HumanMessage(
+            "Update this summary of a conversation with the new turns below. Keep names, "
+            "numbers and decisions; drop small talk. Reply with the summary only.\n\n"
+            f"Summary so far:\n{previous or '(empty)'}\n\nNew turns:\n{transcript}")]).content
+    return summarize
+
+
+def _summary_messages(summary):
+    return [HumanMessage(f"Summary of our earlier conversation:\n{summary}"), AIMessage("Understood.")]
+
+
+class ConversationMemory:
+    """Earlier turns of a conversation, kept within `max_tokens`.
+
+    A turn is everything one user input produced: the HumanMessage, each
+    AIMessage with tool calls and its ToolMessages, and the final answer.
+    When the turns go over `max_tokens`, the oldest are folded into a
+    running summary until they, plus the new summary, are under `low_water`
+    of the budget, so compaction happens once every few turns rather than
+    on each one. Whole turns are removed, never single messages, so a tool
+    call is never separated from its result. The newest `keep_turns` are
+    always kept verbatim. The summary is cut to `summary_tokens`, at most
+    half of the low-water mark, so compacting always frees room.
+    """
+
+    def __init__(self, max_tokens=2000, keep_turns=1, summarize=extractive_summary,
+                 summary_tokens=400, low_water=0.75):
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.summarize = summarize
+        self.low_water = low_water
+        if max_tokens is not None:
+            summary_tokens = min(summary_tokens, int(max_tokens * low_water) // 2)
+        self.summary_tokens = summary_tokens
+        self.turns = []
+        self.costs = []
+        self.summary = ""
+        self.compactions = 0
+        self._summary_messages = []
+
+    @property
+    def tokens(self):
+        """Estimated prompt tokens of messages()."""
+        return sum(self.costs) + count_messages(self._summary_messages)
+
+    def messages(self):
+        """Message list for the `{history}` placeholder."""
+        return self._summary_messages + [m for turn in self.turns for m in turn]
+
+    def add(self, turn):
+        self.turns.append(list(turn))
+        self.costs.append(count_messages(turn))
+        if self.max_tokens is not None and self.tokens > self.max_tokens:
+            self.compact()
+
+    def compact(self):
+        """Fold the oldest turns into the summary until under the low-water mark."""
+        target = self.max_tokens * self.low_water
+        if self.summarize:
+            # Leave room for the summary these turns turn into.
+            target -= self.summary_tokens + count_messages(_summary_messages(""))
+        dropped = 0
+        total = sum(self.costs)
+        while len(self.turns) - dropped > self.keep_turns and total > target:
+            total -= self.costs[dropped]
+            dropped += 1
+        if not dropped:
+            return
+        old = self.turns[:dropped]
+        del self.turns[:dropped], self.costs[:dropped]
+        if self.summarize:
+            self.summary = truncate(self.summarize(old, self.summary), self.summary_tokens)
+            self._summary_messages = _summary_messages(self.summary)
+        self.compactions += 1
+
+    def clear(self):
+        self.turns, self.costs, self.summary, self._summary_messages = [], [], "", []
+
+
+def _content(message):
+    return message.content if isinstance(message.content, str) else message_text(message)
+
+
+@dataclass
+class AgentResult:
+    answer: str
+    steps: List = field(default_factory=list)  # AIMessages and ToolMessages of this turn
+    iterations: int = 0
+    stopped: Optional[str] = None  # "max_iterations" if cut off before a final answer
+
+    @property
+    def tool_messages(self):
+        return [m for m in self.steps if isinstance(m, ToolMessage)]
+
+
+class AgentLoop:
+    """Call the model, run its tool calls, send the results back, until it answers.
+
+    `prompt` is a CompiledPrompt with `{input}` plus `{history}` and
+    `{scratchpad}` placeholders (and optionally `{examples}`): the history
+    is the ConversationMemory, the scratchpad this turn's tool calls and
+    results. Few-shot examples from `selector` are only sent on the first
+    turn; after that the history shows the model how to use the tools. Tool
+    calls go through `executor` (a ToolExecutor). After `max_iterations`
+    model calls without a final answer the loop stops: `answer` is the text
+    of the last reply (often empty, as it only asked for tools) and
+    `stopped` is "max_iterations". The turn is then closed with an
+    AIMessage saying so, so the history never ends on unanswered tool
+    results. Every turn is added to the memory. In the callbacks a turn is
+    one "agent_turn" run, with its model calls and tool runs nested under it.
+    """
+
+    def __init__(self, llm_with_tools, prompt, executor, max_iterations=5, memory=None,
+                 selector=None, callbacks=None):
+        self.chain = prompt | llm_with_tools
+        self.executor = executor
+        self.max_iterations = max_iterations
+        self.memory = memory if memory is not None else ConversationMemory()
+        self.selector = selector
+        self.config = {"callbacks": callbacks} if callbacks else {}
+
+    def run(self, text, first_response=None):
+        """Answer `text`; `first_response` stands in for the first model call (e.g. a cached reply)."""
+        config = ensure_config(self.config)
+        run_manager = get_callback_manager_for_config(config).on_chain_start(
+            None, {"input": text}, name="agent_turn")
+        try:
+            result = self._run(text, first_response, patch_config(config, callbacks=run_manager.get_child()))
+        except BaseException as e:
+            run_manager.on_chain_error(e)
+            raise
+        run_manager.on_chain_end({"answer": result.answer})
+        return result
+
+    def _run(self, text, first_response, config):
+        history = self.memory.messages()
+        examples = self.selector.messages(text) if self.selector and not history else []
+        scratchpad = []
+        result = AgentResult("")
+        response = first_response
+        while True:
+            if response is None:
+                if result.iterations == self.max_iterations:
+                    result.stopped = "max_iterations"
+                    last = next((m for m in reversed(scratchpad) if isinstance(m, AIMessage)), None)
+                    result.answer = _content(last) if last is not None else ""
+                    scratchpad.append(AIMessage(result.answer or
+                                                f"(Stopped after {result.iterations} model calls without an answer.)"))
+                    break
+                response = self.chain.invoke({"input": text, "examples": examples, "history": history,
+                                              "scratchpad": scratchpad}, config=config)
+            result.iterations += 1
+            scratchpad.append(response)
+            if not response.tool_calls:
+                result.answer = _content(response)
+                break
+            scratchpad.extend(self.executor.run(response.tool_calls, config))
+            response = None
+        result.steps = scratchpad
+        self.memory.add([HumanMessage(text)] + scratchpad)
+        return result
@@ -1,29 +1,17 @@
-import json
-import re
+import os
+import sys
 from typing import List
 
 from langchain_core.messages import AIMessage
-from langchain_core.prompts import ChatPromptTemplate
-from pydantic import BaseModel, Field
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from jsonextract import extract_json as find_json
+from schemas import People, json_schema, validate_many
+from prompts import CompiledPrompt
 
-class Person(BaseModel):
-    """Information about a person."""
 
-    name: str = Field(..., description="The name of the person")
-    height_in_meters: float = Field(
-        ..., description="The height of the person expressed in meters."
-    )
-
-
-class People(BaseModel):
-    """Identifying information about all people in a text."""
-
-    people: List[Person]
-
-
-# Prompt
-prompt = ChatPromptTemplate.from_messages(
+# Prompt (the schema is rendered into the system message once, not per call)
+prompt = CompiledPrompt(
     [
         (
             "system",
@@ -32,29 +20,32 @@ prompt = ChatPromptTemplate.from_messages(
             "Make sure to wrap the answer in \`\`\`json and \`\`\` tags",
         ),
         ("human", "{query}"),
-    ]
-).partial(schema=People.model_json_schema())
+    ],
+    budget=4000,  # the schema is most of it; a longer query is rejected before the call
+    schema=json_schema(People),
+)
 
 
 # Custom parser
 def extract_json(message: AIMessage) -> List[dict]:
-    """Extracts JSON content from a string where JSON is embedded between \`\`\`json and \`\`\` tags.
+    """Extracts JSON content from a message, whether wrapped in \`\`\`json tags or not.
 
     Parameters:
-        text (str): The text containing the JSON content.
+        message (AIMessage): The message containing the JSON content.
 
     Returns:
-        list: A list of extracted JSON strings.
+        list: A list of parsed JSON values, in the order they appear.
     """
     text = message.content
-    # Define the regular expression pattern to match JSON blocks
-    pattern = r"\`\`\`json(.*?)\`\`\`"
 
-    # Find all non-overlapping matches of the pattern in the string
-    matches = re.findall(pattern, text, re.DOTALL)
+    # One linear scan over the text; a truncated final block is repaired
+    # instead of failing the whole message.
+    results = find_json(text, repair_truncated=True)
+    if not results and "{" in text:
+        raise ValueError(f"Failed to parse: {message}")
+    return results
+
 
-    # Return the list of matched JSON strings, stripping any leading or trailing whitespace
-    try:
-        return [json.loads(match.strip()) for match in matches]
-    except Exception:
-        raise ValueError(f"Failed to parse: {message}")
\ No newline at end of file
+def extract_people(message: AIMessage) -> List[People]:
+    """Like extract_json, but validates every block against People in one call."""
+    return validate_many(People, extract_json(message))
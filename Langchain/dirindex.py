@@ -0,0 +1,185 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DirIndex:
+    """Cached map from folder name to every path with that name under `root`.
+
+    The tree is walked once with os.scandir; after that lookups are a dict
+    access. With `watch=True` the index keeps itself up to date: through
+    inotify when the optional `inotify_simple` package is installed (Linux),
+    otherwise by polling directory mtimes every `poll_interval` seconds and
+    rescanning only the directories that changed.
+    """
+
+    def __init__(self, root=".", watch=True, poll_interval=2.0):
+        self.root = os.path.abspath(root)
+        self.poll_interval = poll_interval
+        self.names = {}      # folder name -> set of absolute paths
+        self.children = {}   # folder path -> set of child folder names
+        self.mtimes = {}     # folder path -> last seen mtime (polling only)
+        self.lock = threading.RLock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self.build()
+        if watch:
+            self.start_watching()
+
+    # --- building and incremental updates ---
+    def build(self):
+        with self.lock:
+            self.names.clear()
+            self.children.clear()
+            self.mtimes.clear()
+            self._add_tree(self.root)
+
+    def _scan(self, path):
+        """Child folder names of `path` (symlinks are not followed)."""
+        names = set()
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        names.add(entry.name)
+            self.mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            pass
+        return names
+
+    def _add_tree(self, top):
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            if path in self.children:
+                continue
+            subdirs = self._scan(path)
+            self.children[path] = subdirs
+            for name in subdirs:
+                child = os.path.join(path, name)
+                self.names.setdefault(name, set()).add(child)
+                stack.append(child)
+            if self._watcher is not None:
+                self._watch_dir(path)
+
+    def _remove_tree(self, top):
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            for name in self.children.pop(path, ()):
+                stack.append(os.path.join(path, name))
+            self.mtimes.pop(path, None)
+            paths = self.names.get(os.path.basename(path))
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self.names[os.path.basename(path)]
+
+    def refresh(self, path):
+        """Re-read the immediate children of `path` and apply the difference."""
+        with self.lock:
+            if path not in self.children:
+                return
+            old = self.children[path]
+            new = self._scan(path)
+            self.children[path] = new
+            for name in old - new:
+                self._remove_tree(os.path.join(path, name))
+            for name in new - old:
+                child = os.path.join(path, name)
+                self.names.setdefault(name, set()).add(child)
+                self._add_tree(child)
+
+    def forget(self, path):
+        """Drop `path` and everything below it (after deleting it ourselves)."""
+        with self.lock:
+            self._remove_tree(os.path.abspath(path))
+            parent = os.path.dirname(os.path.abspath(path))
+            if parent in self.children:
+                self.children[parent].discard(os.path.basename(path))
+
+    def lookup(self, name):
+        with self.lock:
+            return sorted(self.names.get(name, ()))
+
+    # --- watching ---
+    def start_watching(self):
+        try:
+            from inotify_simple import INotify, flags
+        except ImportError:
+            target = self._poll_loop
+        else:
+            self._inotify = INotify()
+            self._flags = flags
+            self._wd_paths = {}
+            self._watcher = True
+            with self.lock:
+                for path in list(self.children):
+                    self._watch_dir(path)
+            target = self._inotify_loop
+        threading.Thread(target=target, daemon=True, name="dirindex").start()
+
+    def _watch_dir(self, path):
+        f = self._flags
+        mask = f.CREATE | f.DELETE | f.MOVED_FROM | f.MOVED_TO | f.ONLYDIR
+        try:
+            self._wd_paths[self._inotify.add_watch(path, mask)] = path
+        except OSError:
+            pass
+
+    def _inotify_loop(self):
+        while not self._stop.is_set():
+            changed = set()
+            for event in self._inotify.read(timeout=int(self.poll_interval * 1000)):
+                if event.mask & self._flags.ISDIR and event.wd in self._wd_paths:
+                    changed.add(self._wd_paths[event.wd])
+            for path in changed:
+                self.refresh(path)
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            with self.lock:
+                paths = list(self.children)
+            for path in paths:
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+                if mtime != self.mtimes.get(path):
+                    self.refresh(path)
+
+    def stop(self):
+        self._stop.set()
+
+
+def remove_tree(path, workers=8, progress=None):
+    """Delete a folder tree with parallel unlinks, then remove folders bottom-up.
+
+    `progress(done, total)` is called as files are removed. Returns
+    (files_removed, folders_removed). Like shutil.rmtree, a symlink is
+    refused rather than followed.
+    """
+    if os.path.islink(path):
+        raise OSError(f"Refusing to remove a symbolic link as a tree: {path}")
+    files = []
+    folders = []
+    for dirpath, dirnames, filenames in os.walk(path, topdown=False):
+        files.extend(os.path.join(dirpath, name) for name in filenames)
+        for name in dirnames:
+            child = os.path.join(dirpath, name)
+            # A symlink to a folder is removed as a link, never followed.
+            (files if os.path.islink(child) else folders).append(child)
+    folders.append(path)
+
+    total = len(files)
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for _ in pool.map(os.unlink, files):
+            done += 1
+            if progress is not None and (done % 1000 == 0 or done == total):
+                progress(done, total)
+
+    # os.walk(topdown=False) already listed children before their parents.
+    for folder in folders:
+        os.rmdir(folder)
+    return total, len(folders)
@@ -0,0 +1,93 @@
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Any, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fakes
+
+
+def _fake_value(schema, rng):
+    """A value that satisfies a (simple) JSON schema."""
+    kind = schema.get("type")
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    if kind == "integer":
+        return rng.randint(schema.get("minimum", 0), schema.get("maximum", 10))
+    if kind == "number":
+        return round(rng.uniform(0, 10), 2)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if kind == "array":
+        return [_fake_value(schema.get("items", {}), rng) for _ in range(2)]
+    if kind == "object":
+        return {k: _fake_value(v, rng) for k, v in schema.get("properties", {}).items()}
+    return " ".join(rng.choice(fakes.WORDS) for _ in range(3))
+
+
+class FakeChatGemini(BaseChatModel):
+    """Offline ChatGoogleGenerativeAI stand-in, returned by get_llm() when GEMINI_BACKEND=fake.
+
+    Replies come from the shared fakes.backend() (scripted or random text,
+    scripted tool calls, latency distribution, streaming pace, injected 429s). When tools
+    are bound and the script entry has no tool calls, `tool_call_rate` of
+    replies call a random bound tool with arguments made up from its schema.
+    """
+
+    model: str = "gemini-1.5-flash"
+    streaming: bool = False
+    cached_content: Optional[str] = None
+    tool_call_rate: float = 1.0
+
+    @property
+    def _llm_type(self):
+        return "fake-gemini"
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _reply(self, messages, tools):
+        backend = fakes.backend()
+        prompt = "".join(m.content if isinstance(m.content, str) else json.dumps(m.content) for m in messages)
+        entry = backend.next(prompt)
+        calls = entry.get("tool_calls")
+        if calls is None and tools and backend.rng.random() < self.tool_call_rate:
+            function = backend.rng.choice(tools)["function"]
+            calls = [{"name": function["name"],
+                      "args": _fake_value(function.get("parameters", {}), backend.rng)}]
+        calls = [{"name": c["name"], "args": c.get("args", {}), "id": c.get("id") or uuid.uuid4().hex[:8]}
+                 for c in calls or ()]
+        text = entry.get("text", "")
+        usage = {"input_tokens": fakes.estimate_tokens(prompt),
+                 "output_tokens": fakes.estimate_tokens(text + json.dumps([c["args"] for c in calls]))}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return backend, text, calls, usage
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        with fakes.backend().admit():
+            backend, text, calls, usage = self._reply(messages, kwargs.get("tools"))
+            backend.wait_first(usage["input_tokens"])
+            time.sleep(backend.generation_time(text))
+        message = AIMessage(text, tool_calls=calls, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        with fakes.backend().admit():
+            backend, text, calls, usage = self._reply(messages, kwargs.get("tools"))
+            backend.wait_first(usage["input_tokens"])
+            for piece in backend.chunks(text):
+                chunk = ChatGenerationChunk(message=AIMessageChunk(piece))
+                if run_manager:
+                    run_manager.on_llm_new_token(piece, chunk=chunk)
+                yield chunk
+        tail = AIMessageChunk("", usage_metadata=usage, tool_call_chunks=[
+            {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+            for i, c in enumerate(calls)])
+        yield ChatGenerationChunk(message=tail)
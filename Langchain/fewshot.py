@@ -0,0 +1,185 @@
+import functools
+import heapq
+import json
+import math
+import os
+import re
+import sys
+from collections import defaultdict
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tokens import MESSAGE_OVERHEAD, count_many, message_text
+
+_WORD = re.compile(r"\w+")
+
+
+def _terms(text):
+    return _WORD.findall(text.lower())
+
+
+class ExampleSelector:
+    """Pick the few-shot examples most relevant to an input, within a token budget.
+
+    `examples` is a list of message lists, one per example, each starting
+    with the HumanMessage that the example answers (from_messages() splits
+    a flat list like the ones in the scripts). A BM25 index over the human
+    text and the names of the tools called is built once. For each input
+    the top `k` examples that fit in `max_tokens` are chosen, and the
+    rendered message list is cached, with tool-call ids renumbered so the
+    picked examples never collide. If nothing matches, the first examples
+    in the bank are used.
+    """
+
+    def __init__(self, examples, k=3, max_tokens=1000, cache_size=1024, k1=1.5, b=0.75):
+        self.examples = [list(messages) for messages in examples]
+        self.k = k
+        self.max_tokens = max_tokens
+        # Token cost of each example, counted for the whole bank in one vectorized pass.
+        texts = ["".join(message_text(m) for m in messages) for messages in self.examples]
+        self.costs = [int(c) + MESSAGE_OVERHEAD * len(messages)
+                      for c, messages in zip(count_many(texts), self.examples)]
+        self._build_index(k1, b)
+        self.select = functools.lru_cache(maxsize=cache_size)(self._select)
+        self._render = functools.lru_cache(maxsize=cache_size)(self._render_messages)
+
+    @classmethod
+    def from_messages(cls, messages, **kwargs):
+        """Split a flat example list at each HumanMessage and build a selector."""
+        examples = []
+        for message in messages:
+            if isinstance(message, HumanMessage) or not examples:
+                examples.append([])
+            examples[-1].append(message)
+        return cls(examples, **kwargs)
+
+    # --- index ---
+    def _build_index(self, k1, b):
+        docs = []
+        for messages in self.examples:
+            terms = _terms(messages[0].content)
+            for message in messages[1:]:
+                for call in getattr(message, "tool_calls", None) or ():
+                    terms += _terms(call["name"])
+            docs.append(terms)
+
+        n = len(docs)
+        avg_len = sum(map(len, docs)) / n if n else 0.0
+        df = defaultdict(int)
+        for terms in docs:
+            for term in set(terms):
+                df[term] += 1
+
+        # Each term maps to {example index: BM25 weight}, fully precomputed,
+        # so scoring an input is only additions.
+        self.postings = defaultdict(dict)
+        for i, terms in enumerate(docs):
+            counts = defaultdict(int)
+            for term in terms:
+                counts[term] += 1
+            norm = k1 * (1 - b + b * len(terms) / avg_len) if avg_len else k1
+            for term, tf in counts.items():
+                idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                self.postings[term][i] = idf * tf * (k1 + 1) / (tf + norm)
+
+        # With numpy installed, postings become (indices, weights) arrays and
+        # scoring is a handful of vectorized adds instead of a Python loop.
+        try:
+            import numpy as np
+        except ImportError:
+            self.np = self.arrays = None
+        else:
+            self.np = np
+            self.arrays = {term: (np.fromiter(posting.keys(), dtype=np.int64, count=len(posting)),
+                                  np.fromiter(posting.values(), dtype=np.float64, count=len(posting)))
+                           for term, posting in self.postings.items()}
+
+    def search(self, text, limit=None):
+        """Examples sharing a term with `text`, as (score, index), best first."""
+        terms = set(_terms(text))
+        if self.arrays is not None:
+            return self._search_numpy(terms, limit)
+        scores = defaultdict(float)
+        for term in terms:
+            for i, weight in self.postings.get(term, {}).items():
+                scores[i] += weight
+        # A partial heap is much cheaper than sorting every match; ties go to bank order.
+        key = lambda i: (-scores[i], i)
+        ranked = heapq.nsmallest(limit, scores, key=key) if limit else sorted(scores, key=key)
+        return [(scores[i], i) for i in ranked]
+
+    def _search_numpy(self, terms, limit):
+        np = self.np
+        scores = np.zeros(len(self.examples))
+        for term in terms:
+            posting = self.arrays.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+        matched = np.flatnonzero(scores)
+        if limit and limit < len(matched):
+            # Keep everything tied with the limit-th score so ties still go to bank order.
+            cutoff = -np.partition(-scores[matched], limit - 1)[limit - 1]
+            matched = matched[scores[matched] >= cutoff]
+        matched = matched[np.argsort(-scores[matched], kind="stable")][:limit]
+        return [(float(scores[i]), int(i)) for i in matched]
+
+    # --- selection and rendering ---
+    def _select(self, text):
+        limit = 4 * self.k
+        ranked = [i for _, i in self.search(text, limit)]
+        if not ranked:
+            return self._fit(range(len(self.examples)))
+        chosen = self._fit(ranked)
+        if len(chosen) < self.k and len(ranked) == limit:
+            # The budget skipped too many of the best matches; look further down.
+            chosen = self._fit(i for _, i in self.search(text))
+        return chosen
+
+    def _fit(self, ranked):
+        chosen = []
+        budget = self.max_tokens
+        for i in ranked:
+            if self.costs[i] <= budget:
+                chosen.append(i)
+                budget -= self.costs[i]
+                if len(chosen) == self.k:
+                    break
+        return tuple(chosen)
+
+    def _render_messages(self, indices):
+        rendered = []
+        next_id = 1
+        for i in indices:
+            ids = {}
+            for message in self.examples[i]:
+                if isinstance(message, AIMessage) and message.tool_calls:
+                    calls = []
+                    for call in message.tool_calls:
+                        ids[call["id"]] = str(next_id)
+                        calls.append({**call, "id": str(next_id)})
+                        next_id += 1
+                    message = message.model_copy(update={"tool_calls": calls})
+                elif isinstance(message, ToolMessage) and message.tool_call_id in ids:
+                    message = message.model_copy(update={"tool_call_id": ids[message.tool_call_id]})
+                rendered.append(message)
+        return rendered
+
+    def messages(self, text):
+        """Message list for the `{examples}` placeholder."""
+        return list(self._render(self.select(text)))
+
+    def text(self, text):
+        """The chosen examples as "example_user: ..." / "example_assistant: ..." lines."""
+        blocks = []
+        for i in self.select(text):
+            lines = []
+            for message in self.examples[i]:
+                if isinstance(message, HumanMessage):
+                    lines.append(f"example_user: {message.content}")
+                elif isinstance(message, AIMessage):
+                    calls = [call["args"] for call in message.tool_calls]
+                    body = json.dumps(calls[0] if len(calls) == 1 else calls) if calls else message.content
+                    lines.append(f"example_assistant: {body}")
+            blocks.append("\n".join(lines))
+        return "\n\n".join(blocks)
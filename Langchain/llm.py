@@ -0,0 +1,119 @@
+import os
+import sys
+import getpass
+import threading
+from dotenv import load_dotenv
+from langchain_core.runnables.config import run_in_executor
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import metrics
+from scheduler import get_scheduler
+from tokens import count_messages
+
+DEFAULT_MODEL = "gemini-1.5-flash"
+
+_lock = threading.Lock()
+_llms = {}
+_scheduled = {}
+
+
+def get_api_key():
+    """Load .env once and return the Gemini API key, asking for it if missing."""
+    if not os.getenv("GEMINI_API_KEY"):
+        load_dotenv()
+    if not os.getenv("GEMINI_API_KEY"):
+        os.environ["GEMINI_API_KEY"] = getpass.getpass("Enter your Gemini API key: ")
+    return os.environ["GEMINI_API_KEY"]
+
+
+def _add_usage(call, message):
+    usage = getattr(message, "usage_metadata", None) or {}
+    call.usage(call.prompt_tokens + usage.get("input_tokens", 0),
+               call.completion_tokens + usage.get("output_tokens", 0))
+
+
+def scheduled(cls):
+    """Subclass of chat model `cls` whose API calls go through the shared Scheduler.
+
+    Overriding _generate/_stream (and their async versions) covers invoke,
+    bound tools, structured output and agents alike. A stream is retried
+    only until its first chunk and holds its slot until it ends.
+    Every call is also recorded in metrics (latency, retries, token usage).
+    """
+    sub = _scheduled.get(cls)
+    if sub is None:
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            with metrics.model_call(self.model) as call:
+                result = get_scheduler().call(
+                    call.attempt(lambda: cls._generate(self, messages, stop, run_manager, **kwargs)),
+                    cost=count_messages(messages))
+                for generation in result.generations:
+                    _add_usage(call, generation.message)
+            return result
+
+        def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+            with metrics.model_call(self.model) as call:
+                # The slot is held until the stream is exhausted or closed.
+                stream = get_scheduler().stream(
+                    call.attempt(lambda: cls._stream(self, messages, stop, run_manager, **kwargs)),
+                    cost=count_messages(messages))
+                try:
+                    for chunk in stream:
+                        _add_usage(call, chunk.message)  # streamed usage arrives as deltas
+                        yield chunk
+                finally:
+                    stream.close()
+
+        # The client's native async methods would bypass the scheduler, so the
+        # async paths run the scheduled sync ones in a worker thread instead.
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+            return await run_in_executor(None, self._generate, messages, stop,
+                                         run_manager.get_sync() if run_manager else None, **kwargs)
+
+        async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+            stream = self._stream(messages, stop, run_manager.get_sync() if run_manager else None, **kwargs)
+            done = object()
+            try:
+                while (chunk := await run_in_executor(None, next, stream, done)) is not done:
+                    yield chunk
+            finally:
+                stream.close()
+
+        sub = _scheduled[cls] = type(f"Scheduled{cls.__name__}", (cls,),
+                                     {"_generate": _generate, "_stream": _stream,
+                                      "_agenerate": _agenerate, "_astream": _astream})
+    return sub
+
+
+def get_llm(model=DEFAULT_MODEL, **kwargs):
+    """Return the shared ChatGoogleGenerativeAI client for (model, kwargs).
+
+    Every script asking for the same configuration gets the same instance,
+    so its HTTP client and connections are set up once per process. Calls
+    go through the shared Scheduler (rate limits, adaptive concurrency,
+    retries), so the client's own retries are off unless max_retries is
+    given. With GEMINI_BACKEND=fake an offline FakeChatGemini is returned
+    instead.
+    """
+    key = (model, repr(sorted(kwargs.items())))
+    llm = _llms.get(key)
+    if llm is None and os.getenv("GEMINI_BACKEND", "").lower() == "fake":
+        from fakellm import FakeChatGemini
+
+        llm = _llms.setdefault(key, scheduled(FakeChatGemini)(model=model, **kwargs))
+    if llm is None:
+        api_key = get_api_key()
+        with _lock:
+            llm = _llms.get(key)
+            if llm is None:
+                options = {"max_retries": 1, **kwargs}  # max_retries counts attempts
+                llm = scheduled(ChatGoogleGenerativeAI)(model=model, google_api_key=api_key, **options)
+                _llms[key] = llm
+    return llm
+
+
+def clear():
+    """Forget every cached client (mainly for benchmarks)."""
+    with _lock:
+        _llms.clear()
@@ -1,16 +1,12 @@
-import os
 import datetime
-from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
 from langchain_core.tools import tool
-import getpass
-
-# Load API key
-load_dotenv()
-if not os.getenv("GEMINI_API_KEY"):
-    os.environ["GEMINI_API_KEY"] = getpass.getpass("Enter your Gemini API key: ")
+from llm import get_llm
+from prompts import CompiledPrompt
+from toolexec import ToolExecutor
+from agentloop import AgentLoop, ConversationMemory
+from fewshot import ExampleSelector
+from tracing import trace_callbacks
 
 # --- Define tools using @tool decorator ---
 @tool
@@ -30,12 +26,10 @@ def add_numbers(a: int, b: int):
 
 # Create tools list
 tools = [joke, get_time, add_numbers]
+executor = ToolExecutor(tools, timeout=10)
 
-# Initialize LLM with tools
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",
-    google_api_key=os.getenv("GEMINI_API_KEY")
-)
+# Initialize LLM with tools (shared client, loads the API key on first use)
+llm = get_llm()
 
 # Bind tools to the LLM
 llm_with_tools = llm.bind_tools(tools)
@@ -59,6 +53,7 @@ examples = [
         }],
     ),
     ToolMessage('{"setup": "Why was the cat so good at video games?", "punchline": "Because it had nine lives!", "rating": 8}', tool_call_id="1"),
+    AIMessage("Why was the cat so good at video games? Because it had nine lives!", name="example_assistant"),
 
     HumanMessage("What time is it", name="example_user"),
     AIMessage(
@@ -71,6 +66,7 @@ examples = [
         }],
     ),
     ToolMessage('{"time": "14:30:25"}', tool_call_id="2"),
+    AIMessage("It's 14:30.", name="example_assistant"),
 
     HumanMessage("Add 5 and 7", name="example_user"),
     AIMessage(
@@ -83,50 +79,42 @@ examples = [
         }],
     ),
     ToolMessage('{"result": 12}', tool_call_id="3"),
+    AIMessage("5 + 7 = 12", name="example_assistant"),
 ]
 
+# Only the examples closest to each input go into the prompt
+selector = ExampleSelector.from_messages(examples, k=2)
+
 # --- Prompt ---
 system = """You are a funny but useful assistant. 
 You can tell jokes, give the current time, or do simple math using the correct tool calls.
 """
 
-prompt = ChatPromptTemplate.from_messages([
+prompt = CompiledPrompt([
     ("system", system),
     ("placeholder", "{examples}"),
-    ("human", "{input}")
+    ("placeholder", "{history}"),  # earlier turns, compacted to stay within budget
+    ("human", "{input}"),
+    ("placeholder", "{scratchpad}"),  # this turn's tool calls and results
 ])
 
-# Create chain
-chain = prompt | llm_with_tools
+# Set TRACE_FILE=trace.jsonl to record per-step timings (see tracing.py)
+callbacks = trace_callbacks()
+
+# Tool results go back to the model until it answers (at most 5 calls per question)
+agent = AgentLoop(llm_with_tools, prompt, executor, max_iterations=5,
+                  memory=ConversationMemory(max_tokens=2000), selector=selector, callbacks=callbacks)
 
 # --- Run query ---
-response = chain.invoke({
-    "input": "tell me a joke",
-    "examples": examples
-})
-
-print("🤖 Model wants to use tools:", [call["name"] for call in response.tool_calls] if hasattr(response, "tool_calls") else "None")
-
-# --- Post-process tool calls ---
-if hasattr(response, "tool_calls") and response.tool_calls:
-    for call in response.tool_calls:
-        tool_name = call["name"]
-        args = call["args"]
-
-        # Find and execute the correct tool
-        tool_function = None
-        for tool in tools:
-            if tool.name == tool_name:
-                tool_function = tool
-                break
-        
-        if tool_function:
-            try:
-                result = tool_function.invoke(args)
-                print(f"✅ Tool executed: {tool_name} →", result)
-            except Exception as e:
-                print(f"❌ Error executing {tool_name}: {e}")
-        else:
-            print(f"❌ Unknown tool: {tool_name}")
+query = "tell me a joke"
+result = agent.run(query)
+
+for message in result.tool_messages:
+    if message.status == "error":
+        print(f"❌ {message.content}")
+    else:
+        print(f"✅ Tool executed: {message.name} →", message.artifact)
+if result.stopped:
+    print(f"⚠️ Stopped after {result.iterations} model calls without a final answer.")
 else:
-    print("⚠️ No tool calls found.")
\ No newline at end of file
+    print("🤖", result.answer)
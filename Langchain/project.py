@@ -1,35 +1,23 @@
+import json
 import os
-from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
-from langchain_core.tools import tool
-from duckduckgo_search import DDGS
+import sys
 
-# --- Load API Key ---
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("❌ GEMINI_API_KEY not found! Add it to your .env file.")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# --- Search Tool ---
-@tool
-def web_search(query: str, num_results: int = 5):
-    """Search the web using DuckDuckGo"""
-    results = []
-    with DDGS() as ddgs:
-        for result in ddgs.text(query, max_results=num_results):
-            results.append({
-                "title": result.get("title", "No title"),
-                "url": result.get("href", ""),
-                "snippet": result.get("body", "")[:200] + "..."
-            })
-    return results
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from llm import get_llm
+from prompts import CompiledPrompt
+from toolexec import ToolExecutor
+from agentloop import AgentLoop, ConversationMemory
+from fewshot import ExampleSelector
+from tracing import trace_callbacks
+from search import web_search  # cached, shares one DuckDuckGo session
 
 tools = [web_search]
+executor = ToolExecutor(tools, timeout=20)
 
 # --- Initialize Gemini ---
-llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", google_api_key=GEMINI_API_KEY)
+llm = get_llm()
 llm_with_tools = llm.bind_tools(tools)
 
 # --- Few-shot examples ---
@@ -48,8 +36,12 @@ examples = [
         '{"query": "Python tutorials", "results": [{"title": "Learn Python", "url": "https://realpython.com", "snippet": "Python tutorials for developers..."}], "count": 1}',
         tool_call_id="1"
     ),
+    AIMessage("Learn Python (https://realpython.com): Python tutorials for developers.", name="example_assistant"),
 ]
 
+# Only the examples closest to each input go into the prompt
+selector = ExampleSelector.from_messages(examples, k=2)
+
 # --- System Instructions ---
 system_prompt = """You are a helpful AI research assistant.
 When users ask for information, always use the web_search tool.
@@ -57,40 +49,63 @@ Return results in a clear format with titles, URLs, and descriptions.
 """
 
 # --- Prompt with examples ---
-prompt = ChatPromptTemplate.from_messages([
+prompt = CompiledPrompt([
     ("system", system_prompt),
     ("placeholder", "{examples}"),  # <- few-shot goes here
-    ("human", "{input}")
+    ("placeholder", "{history}"),   # earlier turns, compacted to stay within budget
+    ("human", "{input}"),
+    ("placeholder", "{scratchpad}"),  # this turn's searches and their results
 ])
 
 # --- Build chain ---
-chain = prompt | llm_with_tools
+# GEMINI_CONTEXT_CACHE=1 stores the system prompt and tools server-side (see prompts.py)
+if os.getenv("GEMINI_CONTEXT_CACHE"):
+    llm_with_tools, prompt = prompt.pin(llm, tools=tools)
 
-# --- Run a query ---
-print("🔍 Asking Gemini...")
-response = chain.invoke({
-    "input": "how old is donald trump",
-    "examples": examples
-})
+# Set TRACE_FILE=trace.jsonl to record per-step timings (see tracing.py)
+callbacks = trace_callbacks()
 
-# --- Handle tool calls ---
-if hasattr(response, "tool_calls") and response.tool_calls:
-    for call in response.tool_calls:
-        tool_name = call["name"]
-        args = call["args"]
-        print(f"\n🤖 Gemini wants to use: {tool_name} with {args}")
+# Search results go back to the model until it answers (at most 4 calls per question)
+agent = AgentLoop(llm_with_tools, prompt, executor, max_iterations=4,
+                  memory=ConversationMemory(max_tokens=3000), selector=selector, callbacks=callbacks)
 
-        tool_dict = {t.name: t for t in tools}
-        tool_function = tool_dict.get(tool_name)
+# Set SEMANTIC_CACHE=path to reuse the model's reply for paraphrased questions (see semcache.py)
+semcache = None
+if os.getenv("SEMANTIC_CACHE"):
+    from semcache import SemanticCache
+    semcache = SemanticCache(os.environ["SEMANTIC_CACHE"],
+                             threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")))
 
-        if tool_function:
-            results = tool_function.invoke(args)
-            print(f"\n✅ Found {len(results)} results:")
-            for i, item in enumerate(results, 1):
-                print(f"{i}. {item['title']}")
-                print(f"   🔗 {item['url']}")
-                print(f"   📄 {item['snippet']}\n")
-        else:
-            print(f"❌ Unknown tool: {tool_name}")
+# --- Run a query ---
+question = "how old is donald trump"
+cached = semcache.lookup(question)[0] if semcache else None
+if cached is not None:
+    print("🔍 Reusing a cached reply...")
+    first = AIMessage(**json.loads(cached))
 else:
-    print("💬 Response:", response.content)
+    print("🔍 Asking Gemini...")
+    first = None
+result = agent.run(question, first_response=first)
+if semcache and cached is None:
+    # The first reply's tool calls are cached, not their results, so searches stay fresh
+    response = result.steps[0]
+    semcache.add(question, json.dumps({"content": response.content, "tool_calls": response.tool_calls}))
+    semcache.save()
+
+# --- Show the searches and the answer ---
+for message in result.steps:
+    if isinstance(message, AIMessage):
+        for call in message.tool_calls:
+            print(f"\n🤖 Gemini wants to use: {call['name']} with {call['args']}")
+    elif message.status == "error":
+        print(f"❌ {message.content}")
+    else:
+        results = message.artifact
+        print(f"\n✅ Found {len(results)} results:")
+        for i, item in enumerate(results, 1):
+            print(f"{i}. {item['title']}")
+            print(f"   🔗 {item['url']}")
+            print(f"   📄 {item['snippet']}\n")
+if result.stopped:
+    print(f"⚠️ Stopped after {result.iterations} model calls without a final answer.")
+print("💬 Response:", result.answer)
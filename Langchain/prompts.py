@@ -0,0 +1,157 @@
+import os
+import string
+import sys
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.prompt_values import ChatPromptValue
+from langchain_core.runnables import Runnable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tokens import TokenBudgetExceeded, count_messages
+
+_ROLES = {
+    "system": SystemMessage,
+    "human": HumanMessage,
+    "user": HumanMessage,
+    "ai": AIMessage,
+    "assistant": AIMessage,
+}
+
+
+def _compile(template, partials):
+    """Split an f-string template into literal text and variable names.
+
+    Partials are substituted now, so rendering is a single join. Returns
+    (parts, variables) where parts alternate str literals and
+    (name,) tuples for the variables left to fill per request.
+    """
+    parts = []
+    variables = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if literal:
+            parts.append(literal)
+        if field is None:
+            continue
+        if spec or conversion or not field.isidentifier():
+            raise ValueError(f"Only plain {{name}} variables are supported, got {{{field}}}")
+        if field in partials:
+            parts.append(str(partials[field]))
+        else:
+            parts.append((field,))
+            variables.append(field)
+    # Merge neighbouring literals so rendering touches as few pieces as possible.
+    merged = []
+    for part in parts:
+        if merged and isinstance(part, str) and isinstance(merged[-1], str):
+            merged[-1] += part
+        else:
+            merged.append(part)
+    return merged, variables
+
+
+class CompiledPrompt(Runnable):
+    """A chat prompt compiled once, for templates invoked many times.
+
+    Takes the same message list as ChatPromptTemplate.from_messages
+    ((role, template) pairs, ("placeholder", "{name}") and message objects),
+    plus partial variables. Messages without per-request variables, e.g. the
+    system prompt with its schema filled in, are built once and the same
+    objects go into every prompt. They are shared, so they must not be
+    mutated. Templates with variables are pre-split so rendering is one
+    join, and placeholder lists are inserted as given, without copying.
+
+    It is a Runnable, so `compiled | llm` works and tracing callbacks still
+    see a prompt step. With a `budget`, a rendered prompt estimated at more
+    tokens than that raises TokenBudgetExceeded instead of being sent; the
+    static messages are counted once, at compile time.
+    """
+
+    def __init__(self, messages, budget=None, **partials):
+        self.budget = budget
+        self.steps = []
+        self.input_variables = []
+        for item in messages:
+            if isinstance(item, BaseMessage):
+                self.steps.append(("static", item))
+                continue
+            role, template = item
+            if role == "placeholder":
+                self.steps.append(("placeholder", template.strip("{}")))
+                continue
+            parts, variables = _compile(template, partials)
+            if variables:
+                self.steps.append(("template", (_ROLES[role], parts)))
+                self.input_variables += variables
+            else:
+                self.steps.append(("static", _ROLES[role]("".join(parts))))
+        static = [value for kind, value in self.steps if kind == "static"]
+        self._static = {id(m) for m in static}
+        self.static_tokens = count_messages(static)
+
+    @property
+    def prefix(self):
+        """The leading messages that are the same for every request."""
+        messages = []
+        for kind, value in self.steps:
+            if kind != "static":
+                break
+            messages.append(value)
+        return messages
+
+    def format_messages(self, **kwargs):
+        messages = []
+        for kind, value in self.steps:
+            if kind == "static":
+                messages.append(value)
+            elif kind == "placeholder":
+                messages.extend(kwargs.get(value) or ())
+            else:
+                cls, parts = value
+                messages.append(cls("".join(
+                    p if isinstance(p, str) else str(kwargs[p[0]]) for p in parts)))
+        return messages
+
+    def tokens(self, messages):
+        """Estimated prompt tokens of `messages` rendered from this prompt."""
+        return self.static_tokens + count_messages([m for m in messages if id(m) not in self._static])
+
+    def _render(self, inputs):
+        messages = self.format_messages(**inputs)
+        if self.budget is not None:
+            tokens = self.tokens(messages)
+            if tokens > self.budget:
+                raise TokenBudgetExceeded(tokens, self.budget)
+        return ChatPromptValue(messages=messages)
+
+    def invoke(self, input, config=None, **kwargs):
+        return self._call_with_config(self._render, input, config, run_type="prompt")
+
+    def without_prefix(self):
+        """A copy that leaves out the static prefix (for a model that has it cached)."""
+        copy = CompiledPrompt([], budget=self.budget)
+        copy.steps = self.steps[len(self.prefix):]
+        copy.input_variables = self.input_variables
+        # The cached prefix still counts against the model's context.
+        copy._static = self._static
+        copy.static_tokens = self.static_tokens
+        return copy
+
+    def pin(self, llm, tools=None, ttl="3600s"):
+        """Cache the static prefix on Gemini and return (model, prompt) to chain.
+
+        Uses Gemini context caching: the system prompt (and tools) are stored
+        server-side once and later requests send only the rest. Gemini only
+        caches prefixes above a minimum size (about a thousand tokens), and
+        not every model supports it. When caching is not possible, this
+        returns the ordinary model and the full prompt instead.
+        """
+        try:
+            from langchain_google_genai import create_context_cache
+            from llm import get_llm
+
+            name = create_context_cache(llm, self.prefix, tools=tools, ttl=ttl)
+        except Exception as e:
+            print(f"Context caching unavailable ({type(e).__name__}: {e}); sending the full prompt")
+            return (llm.bind_tools(tools) if tools else llm), self
+        # Tools live in the cache too, so the cached model must not bind them again.
+        return get_llm(llm.model, cached_content=name), self.without_prefix()
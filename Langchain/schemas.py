@@ -0,0 +1,110 @@
+from functools import lru_cache
+from typing import List, Optional, Union
+
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from typing_extensions import TypedDict, Annotated
+
+
+# --- Pydantic schemas ---
+class Joke(BaseModel):
+    """Joke to tell user."""
+    setup: str = Field(description="The setup of the joke")
+    punchline: str = Field(description="The punchline to the joke")
+    rating: Optional[int] = Field(
+        default=None, description="How funny the joke is, from 1 to 10"
+    )
+
+class ConversationalResponse(BaseModel):
+    """Respond in a conversational manner. Be kind and helpful."""
+    response: str = Field(description="A conversational response to the user's query")
+
+class FinalResponse(BaseModel):
+    """Final structured response: either a joke or a conversational answer"""
+    final_output: Union[Joke, ConversationalResponse]
+
+class Person(BaseModel):
+    """Information about a person."""
+
+    name: str = Field(..., description="The name of the person")
+    height_in_meters: float = Field(
+        ..., description="The height of the person expressed in meters."
+    )
+
+class People(BaseModel):
+    """Identifying information about all people in a text."""
+
+    people: List[Person]
+
+
+# --- TypedDict schemas ---
+class JokeDict(TypedDict):
+    """Joke to tell user."""
+
+    setup: Annotated[str, ..., "The setup of the joke"]
+    punchline: Annotated[str, ..., "The punchline of the joke"]
+    rating: Annotated[Optional[int], None, "How funny the joke is, from 1 to 10"]
+
+
+# --- Compiled, cached validators ---
+@lru_cache(maxsize=None)
+def adapter(schema):
+    """Compiled validator for a Pydantic model or TypedDict, built once per process."""
+    return TypeAdapter(schema)
+
+@lru_cache(maxsize=None)
+def list_adapter(schema):
+    """Compiled validator for a list of `schema`, for validating a batch in one call."""
+    return TypeAdapter(List[schema])
+
+@lru_cache(maxsize=None)
+def json_schema(schema):
+    """JSON schema for `schema`, generated once per process."""
+    return adapter(schema).json_schema()
+
+
+def validate_json(schema, data):
+    """Parse and validate one raw JSON response (str or bytes) in a single step."""
+    return adapter(schema).validate_json(data)
+
+class BatchValidationError(ValueError):
+    """Some responses in a batch did not validate; `errors` maps each one's index to its error."""
+
+    def __init__(self, errors, total):
+        super().__init__(f"{len(errors)} of {total} responses failed validation: "
+                         + "; ".join(f"[{i}] {e.errors()[0]['msg']}" for i, e in sorted(errors.items())[:5]))
+        self.errors = errors
+
+
+def validate_many_json(schema, items):
+    """Parse and validate a batch of raw JSON responses (str or bytes), each on its own.
+
+    The responses are untrusted, so they are never joined into one document:
+    one holding two objects could shift every later result onto the wrong
+    caller. Raises BatchValidationError naming every response that failed.
+    """
+    validate = adapter(schema).validate_json
+    results = []
+    errors = {}
+    for i, item in enumerate(items):
+        try:
+            results.append(validate(item))
+        except ValidationError as e:
+            errors[i] = e
+    if errors:
+        raise BatchValidationError(errors, len(results) + len(errors))
+    return results
+
+def validate_many(schema, objects):
+    """Validate a batch of already-parsed responses (dicts) in one call."""
+    return list_adapter(schema).validate_python(objects)
+
+
+_structured = {}
+
+def structured(llm, schema):
+    """Return `llm.with_structured_output(schema)`, built once per (llm, schema)."""
+    key = (id(llm), schema)
+    runnable = _structured.get(key)
+    if runnable is None:
+        runnable = _structured[key] = llm.with_structured_output(schema)
+    return runnable
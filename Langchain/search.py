@@ -0,0 +1,39 @@
+import threading
+from langchain_core.tools import tool
+from toolcache import cached
+
+_local = threading.local()
+
+
+def ddgs_backend(query, max_results):
+    """Default backend: DuckDuckGo, with one long-lived session per thread."""
+    session = getattr(_local, "ddgs", None)
+    if session is None:
+        from duckduckgo_search import DDGS
+        session = _local.ddgs = DDGS()
+    return session.text(query, max_results=max_results)
+
+
+_backend = ddgs_backend
+
+
+def set_backend(backend):
+    """Swap the search backend, e.g. for a local stub: backend(query, max_results) -> [dict]."""
+    global _backend
+    _backend = backend
+    web_search.func.cache_clear()
+
+
+# --- Search Tool ---
+@tool
+@cached(ttl=600, maxsize=512)
+def web_search(query: str, num_results: int = 5):
+    """Search the web using DuckDuckGo"""
+    results = []
+    for result in _backend(query, num_results) or []:
+        results.append({
+            "title": result.get("title", "No title"),
+            "url": result.get("href", ""),
+            "snippet": result.get("body", "")[:200] + "..."
+        })
+    return results
@@ -0,0 +1,207 @@
+import os
+import select
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+
+DEFAULT_TIMEOUT = 60
+HEAD_BYTES = 8 * 1024
+TAIL_BYTES = 24 * 1024
+
+
+class BoundedCapture:
+    """Keep the first `head_bytes` and last `tail_bytes` of a byte stream.
+
+    Everything in between is counted but dropped, so memory (and the text
+    handed back to the agent) stays the same size however much a command
+    prints.
+    """
+
+    def __init__(self, head_bytes=HEAD_BYTES, tail_bytes=TAIL_BYTES):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.head = bytearray()
+        self.tail = deque()
+        self.tail_size = 0
+        self.total = 0
+
+    def write(self, data):
+        self.total += len(data)
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if not data:
+            return
+        self.tail.append(data)
+        self.tail_size += len(data)
+        while self.tail_size - len(self.tail[0]) >= self.tail_bytes:
+            self.tail_size -= len(self.tail.popleft())
+
+    @property
+    def truncated(self):
+        return max(0, self.total - len(self.head) - self.tail_bytes)
+
+    def text(self):
+        tail = b"".join(self.tail)[-self.tail_bytes:] if self.tail else b""
+        head = bytes(self.head).decode("utf-8", errors="replace")
+        tail = tail.decode("utf-8", errors="replace")
+        if self.truncated:
+            return f"{head}\n... [{self.truncated} bytes truncated] ...\n{tail}"
+        return head + tail
+
+
+class ShellResult:
+    """Exit code, captured output and accounting for one command."""
+
+    def __init__(self, exit_code, capture, duration, timed_out=False):
+        self.exit_code = exit_code
+        self.output = capture.text()
+        self.total_bytes = capture.total
+        self.truncated_bytes = capture.truncated
+        self.duration = duration
+        self.timed_out = timed_out
+
+    def __str__(self):
+        status = "timed out" if self.timed_out else f"exit code {self.exit_code}"
+        footer = (f"[{status}, {self.duration:.2f}s, {self.total_bytes} bytes output, "
+                  f"{self.truncated_bytes} truncated]")
+        return f"{self.output.rstrip(chr(10))}\n{footer}" if self.output else footer
+
+
+def _kill_group(proc):
+    """Kill the process and everything it started."""
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def run_command(command, timeout=DEFAULT_TIMEOUT, head_bytes=HEAD_BYTES, tail_bytes=TAIL_BYTES):
+    """Run one command in a fresh shell with bounded output and a wall-clock timeout."""
+    capture = BoundedCapture(head_bytes, tail_bytes)
+    start = time.monotonic()
+    proc = subprocess.Popen(
+        command,
+        shell=True,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        start_new_session=os.name == "posix",
+    )
+
+    def pump():
+        for chunk in iter(lambda: proc.stdout.read1(65536), b""):
+            capture.write(chunk)
+
+    reader = threading.Thread(target=pump, daemon=True)
+    reader.start()
+    timed_out = False
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        _kill_group(proc)
+        proc.wait()
+    reader.join(timeout=5)
+    return ShellResult(proc.returncode, capture, time.monotonic() - start, timed_out)
+
+
+class ShellSession:
+    """A long-lived shell process that runs commands one after another.
+
+    Starting bash once and feeding it commands over stdin avoids paying
+    fork/exec and shell startup on every tool call. State such as the
+    working directory and exported variables carries over between commands,
+    like in a terminal. Output (stdout and stderr merged) is streamed into a
+    BoundedCapture up to a sentinel that also carries the exit code. A
+    command that runs past `timeout` has its whole process group killed and
+    the session is restarted on the next call. POSIX only.
+    """
+
+    def __init__(self, shell=None, cwd=None, timeout=DEFAULT_TIMEOUT,
+                 head_bytes=HEAD_BYTES, tail_bytes=TAIL_BYTES):
+        self.shell = shell or ("/bin/bash" if os.path.exists("/bin/bash") else "/bin/sh")
+        self.cwd = cwd
+        self.timeout = timeout
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.proc = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        self.proc = subprocess.Popen(
+            [self.shell],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=self.cwd,
+            start_new_session=True,
+        )
+
+    @property
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def run(self, command, timeout=None):
+        """Run `command` in the session and return a ShellResult."""
+        timeout = self.timeout if timeout is None else timeout
+        with self.lock:
+            if not self.alive:
+                self.start()
+            start = time.monotonic()
+            capture = BoundedCapture(self.head_bytes, self.tail_bytes)
+            marker = f"__END_{uuid.uuid4().hex}__ ".encode()
+            # stdin comes from /dev/null so a command can't swallow the next ones.
+            script = f"{{ {command}\n}} < /dev/null\nprintf '%s%s\\n' '{marker.decode()}' $?\n"
+            self.proc.stdin.write(script.encode())
+            self.proc.stdin.flush()
+
+            fd = self.proc.stdout.fileno()
+            pending = b""
+            deadline = start + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                    capture.write(pending)
+                    _kill_group(self.proc)
+                    self.proc.wait()
+                    self.proc = None
+                    return ShellResult(None, capture, time.monotonic() - start, timed_out=True)
+
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    # The shell exited (e.g. the command ran `exit`); start fresh next time.
+                    capture.write(pending)
+                    code = self.proc.wait()
+                    self.proc = None
+                    return ShellResult(code, capture, time.monotonic() - start)
+
+                pending += chunk
+                index = pending.find(marker)
+                if index != -1:
+                    end = pending.find(b"\n", index)
+                    if end != -1:
+                        capture.write(pending[:index])
+                        code = int(pending[index + len(marker):end])
+                        return ShellResult(code, capture, time.monotonic() - start)
+                    continue
+                # Keep enough bytes back to spot a marker split across reads.
+                keep = len(marker)
+                capture.write(pending[:-keep])
+                pending = pending[-keep:]
+
+    def close(self):
+        if self.alive:
+            self.proc.stdin.close()
+            try:
+                self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                _kill_group(self.proc)
+        self.proc = None
@@ -1,126 +1,221 @@
 # -*- coding: utf-8 -*-
 import os
-import getpass
-import shutil
-import subprocess
-from dotenv import load_dotenv
-from langchain_core.tools import tool
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.agents import initialize_agent, AgentType
+import sys
 import argparse
+from pathlib import Path
+# shell and dirindex are imported where they are used, so `--help` stays fast.
 
 # -----------------------------
 # 1. Wrap shell commands
 # -----------------------------
-def run_shell(command: str) -> str:
-    """Run any shell command and return output."""
+def run_shell(command: str, session=None, timeout: int = None) -> str:
+    """Run any shell command and return output.
+
+    With a ShellSession the command runs in that long-lived shell instead of
+    a fresh process. Output is capped (head and tail are kept), the command
+    is killed after `timeout` seconds (shell.DEFAULT_TIMEOUT by default),
+    and a footer reports the exit code, duration and how many bytes were
+    truncated.
+    """
+    from shell import DEFAULT_TIMEOUT, run_command
+
+    if timeout is None:
+        timeout = DEFAULT_TIMEOUT
     try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        return result.stdout or result.stderr
+        if session is not None:
+            return str(session.run(command, timeout))
+        return str(run_command(command, timeout))
     except Exception as e:
         return str(e)
 
 def make_dir(name: str) -> str:
-    """Create a new folder."""
-    return run_shell(f"mkdir {name}")
+    """Create a new folder (and any missing parents)."""
+    try:
+        Path(name).mkdir(parents=True, exist_ok=True)
+        return f"Created folder: {os.path.abspath(name)}"
+    except OSError as e:
+        return f"Error creating {name}: {e}"
+
+def list_dir(path: str = ".", offset: int = 0, limit: int = 200) -> str:
+    """List files and folders in the directory, `limit` entries at a time."""
+    try:
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda e: e.name.lower())
+    except OSError as e:
+        return f"Error listing {path}: {e}"
 
-def list_dir(path: str = ".") -> str:
-    """List files and folders in the directory."""
-    return run_shell(f"dir {path}")
+    lines = []
+    for entry in entries[offset:offset + limit]:
+        try:
+            if entry.is_dir():
+                lines.append(f"{entry.name}/")
+            else:
+                lines.append(f"{entry.name}  ({entry.stat().st_size} bytes)")
+        except OSError:
+            lines.append(entry.name)
 
-def read_file(path: str) -> str:
-    """Read the contents of a file."""
-    return run_shell(f"type {path}")
+    end = min(offset + limit, len(entries))
+    lines.append(f"-- entries {offset}-{end} of {len(entries)} in {os.path.abspath(path)}")
+    if end < len(entries):
+        lines.append(f"-- more available: call again with \"{path}:{end}\"")
+    return "\n".join(lines)
+
+def read_file(path: str, offset: int = 0, max_bytes: int = 64 * 1024) -> str:
+    """Read up to `max_bytes` of a file starting at byte `offset`."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read(max_bytes + 1)
+    except OSError as e:
+        return f"Error reading {path}: {e}"
+
+    text = data[:max_bytes].decode("utf-8", errors="replace")
+    if len(data) > max_bytes:
+        text += f"\n-- truncated at {max_bytes} bytes: call again with \"{path}:{offset + max_bytes}\""
+    return text
 
 def delete_file(path: str) -> str:
     """Delete a file."""
-    return run_shell(f"del {path}")
+    try:
+        target = Path(path)
+        if target.is_dir():
+            return f"{path} is a folder, not a file"
+        target.unlink()
+        return f"Deleted file: {os.path.abspath(path)}"
+    except OSError as e:
+        return f"Error deleting {path}: {e}"
 
-def delete_folder_recursive(folder_name: str, start_path: str = ".") -> str:
+_index = None
+
+def get_index():
+    """Folder index of the current workspace, built on first use and kept up to date."""
+    from dirindex import DirIndex
+
+    global _index
+    if _index is None or _index.root != os.path.abspath("."):
+        if _index is not None:
+            _index.stop()
+        _index = DirIndex(".")
+    return _index
+
+def _is_folder(path):
+    """A real folder, not a symlink to one (deleting through a link would empty its target)."""
+    return os.path.isdir(path) and not os.path.islink(path)
+
+def find_folder(folder_name: str, start_path: str = "."):
     """
-    Search upwards from start_path for a folder with folder_name
-    and delete it if found.
+    Find the folder_name closest to start_path among start_path and its
+    parents, like searching upwards one level at a time.
     """
-    current_path = os.path.abspath(start_path)
+    start = os.path.abspath(start_path)
+    index = get_index()
+
+    # Inside the workspace: pick the match whose parent is the deepest ancestor of start.
+    best = None
+    for path in index.lookup(folder_name):
+        parent = os.path.dirname(path)
+        if not _is_folder(path):  # stale entry: moved, deleted or replaced by a link
+            continue
+        if (start == parent or start.startswith(parent.rstrip(os.sep) + os.sep)) \
+                and (best is None or len(parent) > len(os.path.dirname(best))):
+            best = path
+    if best is not None:
+        return best
 
+    # Not in the index: above the workspace, or created since it last refreshed.
+    # Probe start and its parents directly, a few stat calls.
+    current_path = start
     while True:
         target = os.path.join(current_path, folder_name)
-        if os.path.exists(target) and os.path.isdir(target):
-            try:
-                shutil.rmtree(target)  # removes folder + all contents
-                return f"Deleted folder: {target}"
-            except Exception as e:
-                return f"Error deleting {target}: {str(e)}"
-
-        # move up one directory
+        if _is_folder(target):
+            return target
         parent = os.path.dirname(current_path)
         if parent == current_path:  # reached root
-            break
+            return None
         current_path = parent
 
-    return f"Folder '{folder_name}' not found anywhere upwards from {os.path.abspath(start_path)}"
+def delete_folder_recursive(folder_name: str, start_path: str = ".") -> str:
+    """
+    Search upwards from start_path for a folder with folder_name
+    and delete it if found.
+    """
+    from dirindex import remove_tree
 
-def gitcommit(message: str) -> str:
+    target = find_folder(folder_name, start_path)
+    if target is None:
+        return f"Folder '{folder_name}' not found anywhere upwards from {os.path.abspath(start_path)}"
+
+    # Progress goes to stderr so it never mixes with the agent's output; the counts
+    # are in the tool result.
+    def report(done, total):
+        print(f"  deleting {target}: {done}/{total} files", file=sys.stderr, flush=True)
+
+    try:
+        files, folders = remove_tree(target, progress=report)  # removes folder + all contents
+        get_index().forget(target)
+        return f"Deleted folder: {target} ({files} files, {folders} folders)"
+    except Exception as e:
+        return f"Error deleting {target}: {str(e)}"
+
+def gitcommit(message: str, session=None) -> str:
     """Check git status, add all changes, commit, and push."""
     return run_shell(
-        f"git status && git add . && git commit -m \"{message}\" && git push && git status"
+        f"git status && git add . && git commit -m \"{message}\" && git push && git status",
+        session
     )
 
+def _split_offset(arg: str):
+    """Split a "path:offset" tool argument into (path, offset); a plain path means offset 0."""
+    path, sep, offset = arg.strip().rpartition(":")
+    if sep and offset.strip().isdigit():
+        return path, int(offset)
+    return arg.strip(), 0
+
 # -----------------------------
 # 2. Expose functions as tools
 # -----------------------------
-@tool("run_shell")
-def run_shell_tool(command: str) -> str:
-    """Run a Windows shell command."""
-    return run_shell(command)
-
-@tool("make_dir")
-def make_dir_tool(name: str) -> str:
-    """Create a folder."""
-    return make_dir(name)
-
-@tool("list_dir")
-def list_dir_tool(path: str = ".") -> str:
-    """List directory contents."""
-    return list_dir(path)
-
-@tool("read_file")
-def read_file_tool(path: str) -> str:
-    """Read file contents."""
-    return read_file(path)
-
-@tool("delete_file")
-def delete_file_tool(path: str) -> str:
-    """Delete a single FILE in the current directory only (not folders)."""
-    return delete_file(path)
-
-@tool("delete_folder_recursive")
-def delete_folder_recursive_tool(folder_name: str) -> str:
-    """Delete a FOLDER by name. If not in current directory, search parent directories until found."""
-    return delete_folder_recursive(folder_name)
-
-@tool("git_commit")
-def git_commit_tool(message: str) -> str:
-    """Stage all changes, commit with a message, and push to remote repo."""
-    return gitcommit(message)
-#----------------------
-# 3. Load Gemini API Key
-# -----------------------------
-load_dotenv()
+# LangChain is only imported once the agent is actually built, so that
+# `shellAgent.py --help` and other quick invocations start fast.
+def build_tools(session=None):
+    from langchain_core.tools import tool
 
-if not os.getenv("GEMINI_API_KEY"):
-    os.environ["GEMINI_API_KEY"] = getpass.getpass("Enter your Gemini API key: ")
+    @tool("run_shell")
+    def run_shell_tool(command: str) -> str:
+        """Run a shell command. The shell persists between calls (cd, variables)."""
+        return run_shell(command, session)
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",
-    google_api_key=os.getenv("GEMINI_API_KEY")
-)
+    @tool("make_dir")
+    def make_dir_tool(name: str) -> str:
+        """Create a folder."""
+        return make_dir(name)
 
+    # The ReAct agent only takes single-input tools, so paging is "path:offset".
+    @tool("list_dir")
+    def list_dir_tool(path: str = ".") -> str:
+        """List directory contents, 200 entries at a time. Pass "path:offset" for the next page."""
+        return list_dir(*_split_offset(path or "."))
 
-# -----------------------------
-# 4. Create the Agent
-# -----------------------------
-tools = [
+    @tool("read_file")
+    def read_file_tool(path: str) -> str:
+        """Read file contents, up to 64 KB. Pass "path:offset" to continue from a byte offset."""
+        return read_file(*_split_offset(path))
+
+    @tool("delete_file")
+    def delete_file_tool(path: str) -> str:
+        """Delete a single FILE in the current directory only (not folders)."""
+        return delete_file(path)
+
+    @tool("delete_folder_recursive")
+    def delete_folder_recursive_tool(folder_name: str) -> str:
+        """Delete a FOLDER by name. If not in current directory, search parent directories until found."""
+        return delete_folder_recursive(folder_name)
+
+    @tool("git_commit")
+    def git_commit_tool(message: str) -> str:
+        """Stage all changes, commit with a message, and push to remote repo."""
+        return gitcommit(message, session)
+
+    return [
         run_shell_tool,
         make_dir_tool,
         list_dir_tool,
@@ -130,21 +225,57 @@ tools = [
         git_commit_tool
         ]
 
-agent = initialize_agent(
-    tools=tools,
-    llm=llm,
-    agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-    verbose=True
-)
+
+# -----------------------------
+# 3. Create the Agent
+# -----------------------------
+def build_agent(verbose=True, stream=False):
+    """Load the Gemini client and build the agent (first use only).
+
+    Each agent gets its own persistent shell session on POSIX systems.
+    With `stream=True` the model streams, so a TokenStreamHandler passed as
+    a callback sees tokens as they arrive.
+    """
+    from langchain.agents import initialize_agent, AgentType
+    from llm import get_llm
+    from shell import ShellSession
+
+    session = ShellSession() if os.name == "posix" else None
+    return initialize_agent(
+        tools=build_tools(session),
+        llm=get_llm(streaming=True) if stream else get_llm(),
+        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        verbose=verbose
+    )
 
 
 # -----------------------------
-# 5. Test the Agent
+# 4. Test the Agent
 # -----------------------------
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('prompt', nargs='*', help='Prompt to send to Gemini')
+    parser.add_argument('--trace', metavar='PATH', help='Record per-step timings to a JSONL trace')
+    parser.add_argument('--stream', action='store_true', help='Print tokens as they arrive; timing goes to stderr')
     args = parser.parse_args()
     prompt = " ".join(args.prompt) if args.prompt else input("Enter your prompt: ")
-    print(agent.run(prompt))
\ No newline at end of file
+    # The streamed steps already show the reasoning, so skip the verbose echo
+    agent = build_agent(verbose=not args.stream, stream=args.stream)
+
+    from tracing import MetricsHandler, TraceHandler
+
+    callbacks = [MetricsHandler()]
+    if args.trace:
+        callbacks.append(TraceHandler(args.trace))
+    if args.stream:
+        from streamhandler import TokenStreamHandler
+        streamer = TokenStreamHandler()
+        callbacks.append(streamer)
+        answer = agent.run(prompt, callbacks=callbacks)
+        streamer.finish()
+        streamer.writer.write(f"\nFinal answer: {answer}\n")
+    else:
+        print(agent.run(prompt, callbacks=callbacks))
+    if args.trace:
+        print(f"Trace written to {args.trace}; summarize with: python Langchain/tracing.py {args.trace}")
@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from streaming import StreamStats, StreamWriter
+
+
+class TokenStreamHandler(BaseCallbackHandler):
+    """Print LLM tokens as they arrive and time the whole run.
+
+    Use with a model created with streaming=True (get_llm(streaming=True)).
+    Tokens of every LLM call (for an agent: each thought/action step) go to
+    stdout through a StreamWriter. `stats` measures time to first token and
+    tokens/sec over the run, using the model's token counts when reported.
+    """
+
+    def __init__(self, out=None):
+        self.writer = StreamWriter(out)
+        self.stats = StreamStats()
+        self.reported_tokens = 0
+
+    def on_llm_new_token(self, token, **kwargs):
+        text = token if isinstance(token, str) else str(token)
+        self.stats.record(text)
+        self.writer.write(text)
+
+    def on_llm_end(self, response, **kwargs):
+        self.writer.write("\n")
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    self.reported_tokens += usage.get("output_tokens", 0)
+        if self.reported_tokens:
+            self.stats.tokens = self.reported_tokens
+
+    def finish(self, report=sys.stderr):
+        self.stats.end = time.perf_counter()
+        if report is not None:
+            print(self.stats, file=report)
+        return self.stats
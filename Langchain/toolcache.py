@@ -0,0 +1,106 @@
+import copy
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+_registry = {}  # "module.qualname" -> CacheStats
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses + self.coalesced
+        return (self.hits + self.coalesced) / total if total else 0.0
+
+    def as_dict(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "coalesced": self.coalesced, "hit_rate": self.hit_rate}
+
+
+def normalize(value):
+    """Make equivalent arguments compare equal: trim, collapse spaces, ignore case."""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    return value
+
+
+def cached(ttl=300, maxsize=256, key=normalize):
+    """Cache a tool function's results for `ttl` seconds, keyed on normalized args.
+
+    Put it directly under @tool so the tool schema still comes from the
+    wrapped function. Concurrent calls with the same key share one
+    in-flight call instead of each doing the work. Every caller gets its
+    own deep copy of the result, so mutating it never changes what later
+    callers see. Statistics are available through stats().
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        entries = OrderedDict()
+        inflight = {}
+        lock = threading.Lock()
+        stats = _registry[f"{fn.__module__}.{fn.__qualname__}"] = CacheStats()
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            cache_key = json.dumps({k: key(v) for k, v in bound.arguments.items()},
+                                   sort_keys=True, default=str)
+
+            with lock:
+                entry = entries.get(cache_key)
+                if entry is not None and entry[0] > time.monotonic():
+                    entries.move_to_end(cache_key)
+                    stats.hits += 1
+                    return copy.deepcopy(entry[1])
+                future = inflight.get(cache_key)
+                leader = future is None
+                if leader:
+                    future = inflight[cache_key] = Future()
+                    stats.misses += 1
+                else:
+                    stats.coalesced += 1
+
+            if not leader:
+                return copy.deepcopy(future.result())
+
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                with lock:
+                    del inflight[cache_key]
+                future.set_exception(e)
+                raise
+
+            with lock:
+                entries[cache_key] = (time.monotonic() + ttl, result)
+                entries.move_to_end(cache_key)
+                while len(entries) > maxsize:
+                    entries.popitem(last=False)
+                del inflight[cache_key]
+            future.set_result(result)
+            return copy.deepcopy(result)
+
+        def cache_clear():
+            with lock:
+                entries.clear()
+
+        wrapper.cache_stats = stats
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
+
+
+def stats():
+    """Hit/miss/coalesced counts for every cached tool, by module and qualified name."""
+    return {name: s.as_dict() for name, s in _registry.items()}
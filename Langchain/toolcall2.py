@@ -1,13 +1,5 @@
-import os
-from dotenv import load_dotenv
 from pydantic import BaseModel, Field
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-# Load API key
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("⚠️ Please set GEMINI_API_KEY in your .env file")
+from llm import get_llm
 
 # Step 1: Define schema
 class SearchResult(BaseModel):
@@ -37,7 +29,7 @@ search_tool = {
 }
 
 # Step 3: Setup Gemini model
-llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", google_api_key=api_key)
+llm = get_llm()
 llm_with_search = llm.bind_tools([search_tool])
 
 # Step 4: Enforce structured output with Pydantic
@@ -0,0 +1,119 @@
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables.config import ensure_config, get_callback_manager_for_config, patch_config
+
+
+class ToolExecutor:
+    """Run the tool calls from one model turn concurrently.
+
+    Tools are indexed by name once. Every call in a turn is submitted to a
+    shared thread pool and gets `timeout` seconds from when it starts
+    running. The turn as a whole is bounded too: it gets `timeout` for
+    every round of `max_workers` calls, and calls still queued when that
+    runs out are cancelled. The results come back as ToolMessages in the
+    same order as the calls, ready to be appended to the conversation; a
+    call that runs out of time gets an error ToolMessage of its own. A
+    thread stuck in a timed-out call cannot be stopped, so the executor
+    moves to a fresh pool and the stuck thread never delays later calls.
+    The raw tool output is kept in `ToolMessage.artifact`. The turn is one
+    "tool_calls" run in the callbacks, with every tool run nested under it,
+    and under the caller's run when `config` comes from one (e.g.
+    AgentLoop's turn).
+    """
+
+    def __init__(self, tools, max_workers=8, timeout=30):
+        self.tools = {t.name: t for t in tools}
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.pool = self._new_pool()
+
+    def _new_pool(self):
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool")
+
+    def run(self, tool_calls, config=None):
+        """Execute `tool_calls`; `config` (e.g. callbacks) is passed to every tool."""
+        config = ensure_config(config)
+        run_manager = get_callback_manager_for_config(config).on_chain_start(
+            None, {"tool_calls": tool_calls}, name="tool_calls")
+        try:
+            messages = self._run(tool_calls, patch_config(config, callbacks=run_manager.get_child()))
+        except BaseException as e:
+            run_manager.on_chain_error(e)
+            raise
+        run_manager.on_chain_end({"messages": messages})
+        return messages
+
+    def _run(self, tool_calls, config):
+        started = [None] * len(tool_calls)
+        jobs = {}
+        futures = [None] * len(tool_calls)
+        for i, call in enumerate(tool_calls):
+            tool = self.tools.get(call["name"])
+            if tool is not None:
+                jobs[i] = (tool, call["args"])
+                futures[i] = self.pool.submit(self._invoke, started, i, tool, call["args"], config)
+        failed = self._wait(futures, started, jobs, config)
+
+        messages = []
+        for i, (call, future) in enumerate(zip(tool_calls, futures)):
+            if future is None:
+                messages.append(self._error(call, f"Unknown tool: {call['name']}"))
+                continue
+            if i in failed:
+                messages.append(self._error(call, f"{call['name']} {failed[i]}"))
+                continue
+            try:
+                result = future.result()
+            except Exception as e:
+                messages.append(self._error(call, f"Error executing {call['name']}: {e}"))
+                continue
+            content = result if isinstance(result, str) else json.dumps(result, default=str)
+            messages.append(ToolMessage(content, tool_call_id=call["id"], name=call["name"], artifact=result))
+        return messages
+
+    @staticmethod
+    def _invoke(started, i, tool, args, config):
+        started[i] = time.monotonic()
+        return tool.invoke(args, config)
+
+    def _wait(self, futures, started, jobs, config):
+        """Wait for every call to finish or run out of time; returns {index: reason} for those that didn't."""
+        rounds = -(-len(jobs) // self.max_workers)
+        turn_deadline = time.monotonic() + self.timeout * rounds
+        pending = set(jobs)
+        failed = {}
+        while pending:
+            now = time.monotonic()
+            abandoned = False
+            for i in list(pending):
+                if futures[i].done():
+                    pending.discard(i)
+                elif started[i] is None and now >= turn_deadline and futures[i].cancel():
+                    failed[i] = f"did not start within the turn's {self.timeout * rounds}s"
+                    pending.discard(i)
+                elif now >= min(turn_deadline, (started[i] or now) + self.timeout):
+                    failed[i] = f"timed out after {self.timeout}s"
+                    pending.discard(i)
+                    abandoned = True
+            if abandoned:
+                # The stuck threads keep their pool; queued calls move to a fresh one.
+                old, self.pool = self.pool, self._new_pool()
+                for i in pending:
+                    if started[i] is None and futures[i].cancel():
+                        futures[i] = self.pool.submit(self._invoke, started, i, *jobs[i], config)
+                old.shutdown(wait=False)
+            if not pending:
+                break
+            # A call still queued starts no earlier than now, so its deadline is at least `timeout` away.
+            deadlines = [started[i] + self.timeout for i in pending if started[i] is not None]
+            wake = min(deadlines + [now + self.timeout, turn_deadline])
+            wait([futures[i] for i in pending], timeout=max(wake - now, 0), return_when=FIRST_COMPLETED)
+        return failed
+
+    def _error(self, call, text):
+        return ToolMessage(text, tool_call_id=call["id"], name=call["name"], status="error")
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,246 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import metrics
+
+
+def _size(value):
+    """Rough payload size in characters of whatever a callback received."""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(_size(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_size(v) for v in value.values())
+    content = getattr(value, "content", None)
+    if content is not None:
+        return _size(content)
+    return len(str(value))
+
+
+def _kind(name):
+    lowered = name.lower()
+    if "prompt" in lowered:
+        return "prompt"
+    if "parser" in lowered:
+        return "parse"
+    return "chain"
+
+
+class TraceHandler(BaseCallbackHandler):
+    """Record one span per LLM call, tool call and chain step into a JSONL file.
+
+    Each line has the span name and kind (llm, tool, prompt, parse, chain),
+    run/parent ids, start time, wall time, input/output payload sizes and,
+    for LLM calls, prompt/completion token counts. Summarize a trace with
+    `python Langchain/tracing.py TRACE.jsonl`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.open_spans = {}
+
+    def _start(self, run_id, parent_run_id, name, kind, payload):
+        self.open_spans[run_id] = {
+            "name": name,
+            "kind": kind,
+            "run_id": str(run_id),
+            "parent_id": str(parent_run_id) if parent_run_id else None,
+            "start": time.time(),
+            "t0": time.perf_counter(),
+            "thread": threading.get_ident(),
+            "input_size": _size(payload),
+        }
+
+    def _end(self, run_id, output=None, error=None, **extra):
+        span = self.open_spans.pop(run_id, None)
+        if span is None:
+            return
+        span["duration_ms"] = (time.perf_counter() - span.pop("t0")) * 1e3
+        span["output_size"] = _size(output)
+        if error is not None:
+            span["error"] = repr(error)
+        span.update(extra)
+        line = json.dumps(span) + "\n"
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    @staticmethod
+    def _name(serialized, kwargs, default):
+        if kwargs.get("name"):
+            return kwargs["name"]
+        serialized = serialized or {}
+        return serialized.get("name") or (serialized.get("id") or [default])[-1]
+
+    # --- LLM calls ---
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "llm"), "llm", prompts)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "chat_model"), "llm", messages)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt_tokens = completion_tokens = None
+        texts = []
+        for generations in response.generations:
+            for generation in generations:
+                texts.append(generation.text)
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    prompt_tokens = (prompt_tokens or 0) + usage.get("input_tokens", 0)
+                    completion_tokens = (completion_tokens or 0) + usage.get("output_tokens", 0)
+        self._end(run_id, texts, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    # --- tools ---
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "tool"), "tool", input_str)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id, output)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    # --- chains, prompt formatting and parsers ---
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        name = self._name(serialized, kwargs, "chain")
+        self._start(run_id, parent_run_id, name, _kind(name), inputs)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id, outputs)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+
+class MetricsHandler(BaseCallbackHandler):
+    """Record each tool call's latency and errors in metrics.
+
+    Model calls are already recorded by the clients from llm.get_llm, so
+    this only has to cover tools.
+    """
+
+    def __init__(self):
+        self.started = {}
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self.started[run_id] = (TraceHandler._name(serialized, kwargs, "tool"), time.perf_counter())
+
+    def _end(self, run_id, error):
+        name, start = self.started.pop(run_id, (None, None))
+        if name is not None:
+            metrics.record_tool(name, time.perf_counter() - start, error=error)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id, getattr(output, "status", None) == "error")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, True)
+
+
+def trace_callbacks():
+    """Callbacks to pass as `callbacks`: MetricsHandler, plus TraceHandler when TRACE_FILE is set."""
+    path = os.getenv("TRACE_FILE")
+    return [MetricsHandler()] + ([TraceHandler(path)] if path else [])
+
+
+# --- reading traces back ---
+def load_spans(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def to_chrome(spans):
+    """Convert spans to the Chrome trace format (chrome://tracing, Perfetto)."""
+    events = []
+    for span in spans:
+        events.append({
+            "name": span["name"],
+            "cat": span["kind"],
+            "ph": "X",
+            "ts": span["start"] * 1e6,
+            "dur": span["duration_ms"] * 1e3,
+            "pid": 1,
+            "tid": span.get("thread", 1),
+            "args": {k: v for k, v in span.items()
+                     if k not in ("name", "kind", "start", "duration_ms", "thread")},
+        })
+    return {"traceEvents": events}
+
+
+def self_times(spans):
+    """Wall time of each span minus the time spent in its direct children."""
+    by_id = {s["run_id"]: s for s in spans}
+    child_ms = defaultdict(float)
+    for span in spans:
+        if span["parent_id"] in by_id:
+            child_ms[span["parent_id"]] += span["duration_ms"]
+    return {s["run_id"]: max(0.0, s["duration_ms"] - child_ms[s["run_id"]]) for s in spans}
+
+
+def breakdown(spans):
+    """Aggregate spans by their call path: {path tuple: [count, total_ms, self_ms]}."""
+    by_id = {s["run_id"]: s for s in spans}
+    self_ms = self_times(spans)
+
+    def path(span):
+        names = []
+        while span is not None:
+            names.append(f"{span['kind']}:{span['name']}")
+            span = by_id.get(span["parent_id"])
+        return tuple(reversed(names))
+
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    for span in spans:
+        row = totals[path(span)]
+        row[0] += 1
+        row[1] += span["duration_ms"]
+        row[2] += self_ms[span["run_id"]]
+    return totals
+
+
+def print_breakdown(spans):
+    totals = breakdown(spans)
+    grand_total = sum(row[1] for p, row in totals.items() if len(p) == 1) or 1.0
+    print(f"{'total ms':>10} {'self ms':>10} {'%':>6} {'calls':>6}  step")
+    for p in sorted(totals):
+        count, total, self_ms = totals[p]
+        print(f"{total:>10.1f} {self_ms:>10.1f} {100 * total / grand_total:>5.1f}% {count:>6}  "
+              f"{'  ' * (len(p) - 1)}{p[-1]}")
+
+    by_kind = defaultdict(float)
+    self_ms = self_times(spans)
+    for span in spans:
+        by_kind[span["kind"]] += self_ms[span["run_id"]]
+    print("\nSelf time by kind:")
+    for kind, ms in sorted(by_kind.items(), key=lambda kv: -kv[1]):
+        print(f"  {kind:<8} {ms:>10.1f} ms {100 * ms / grand_total:>5.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a TraceHandler JSONL trace")
+    parser.add_argument("trace", help="JSONL file written by TraceHandler")
+    parser.add_argument("--chrome", metavar="OUT", help="Also write a Chrome trace JSON file")
+    args = parser.parse_args()
+
+    spans = load_spans(args.trace)
+    print_breakdown(spans)
+    if args.chrome:
+        with open(args.chrome, "w", encoding="utf-8") as f:
+            json.dump(to_chrome(spans), f)
+        print(f"\nChrome trace written to {args.chrome}")
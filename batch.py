@@ -0,0 +1,105 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BatchResult:
+    """Outcome of one item in a batch: either a value or the error it raised."""
+
+    __slots__ = ("index", "item", "value", "error")
+
+    def __init__(self, index, item, value=None, error=None):
+        self.index = index
+        self.item = item
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return f"BatchResult(index={self.index}, value={self.value!r})"
+        return f"BatchResult(index={self.index}, error={self.error!r})"
+
+
+def _check_concurrency(concurrency):
+    if not isinstance(concurrency, int) or concurrency < 1:
+        raise ValueError(f"concurrency must be a positive integer, got {concurrency!r}")
+
+
+async def _run_one(fn, index, item, semaphore, executor):
+    async with semaphore:
+        try:
+            value = await asyncio.get_running_loop().run_in_executor(executor, fn, item)
+            return BatchResult(index, item, value=value)
+        except Exception as e:
+            return BatchResult(index, item, error=e)
+
+
+async def run_many(fn, items, concurrency=8):
+    """Run the blocking `fn` over `items` with at most `concurrency` calls in flight.
+
+    Results come back in input order. A failing item is captured in its
+    BatchResult instead of failing the whole batch. Cancelling it cancels
+    the calls that have not started, without blocking the event loop on
+    the ones already running.
+    """
+    _check_concurrency(concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    # A dedicated pool, so concurrency is not capped by the loop's default executor.
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        tasks = [_run_one(fn, i, item, semaphore, executor) for i, item in enumerate(items)]
+        return await asyncio.gather(*tasks)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def iter_many(fn, items, concurrency=8):
+    """Like run_many, but yield each BatchResult as soon as it completes.
+
+    Closing the generator early cancels the calls that have not started;
+    the pool is shut down without waiting, so the event loop never blocks
+    on calls already running.
+    """
+    _check_concurrency(concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    tasks = [
+        asyncio.ensure_future(_run_one(fn, i, item, semaphore, executor))
+        for i, item in enumerate(items)
+    ]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def map_threaded(fn, items, concurrency=8):
+    """Thread-pool fallback for sync callers: yield BatchResults in input order.
+
+    `items` may be any iterable, including a lazy generator; at most
+    `concurrency` items are pulled from it ahead of the consumer, so memory
+    stays bounded no matter how long the input is.
+    """
+    _check_concurrency(concurrency)
+
+    def call(index, item):
+        try:
+            return BatchResult(index, item, value=fn(item))
+        except Exception as e:
+            return BatchResult(index, item, error=e)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = deque()
+        for index, item in enumerate(items):
+            pending.append(pool.submit(call, index, item))
+            if len(pending) >= concurrency:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,97 @@
+"""Turn latency of long AgentLoop conversations, with and without memory compaction.
+
+    python benchmarks/bench_agentloop.py --turns 50
+    python benchmarks/bench_agentloop.py --prefill-rate 5000 --latency fixed:0.05
+
+Runs --sessions conversations of --turns questions through
+Langchain/agentloop.py against the fake backend. Every turn is one tool
+call, its result sent back, and a final answer. The fake model's time to
+first token grows with the prompt (--prefill-rate prompt tokens/s), as a
+real model's does. "full" keeps every earlier turn verbatim; "compacted"
+uses ConversationMemory(--max-tokens). Reports p50 turn latency of the
+first and last ten turns, the prompt tokens sent on the last model call,
+and the total session time.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "Langchain"))
+os.environ["GEMINI_BACKEND"] = "fake"
+
+import fakes
+from langchain_core.tools import tool
+from agentloop import AgentLoop, ConversationMemory
+from llm import get_llm
+from prompts import CompiledPrompt
+from toolexec import ToolExecutor
+
+
+@tool
+def lookup(topic: str):
+    """Look up a short fact about a topic."""
+    return {"topic": topic, "fact": f"{topic} was first described in 1896 and is still studied today."}
+
+
+CALL = {"tool_calls": [{"name": "lookup", "args": {"topic": "photosynthesis in desert plants"}}]}
+ANSWER = {"text": "Desert plants mostly use CAM photosynthesis: they open their stomata at night "
+                  "to save water and fix carbon dioxide during the day.", "tool_calls": []}
+PROMPT = CompiledPrompt([
+    ("system", "You are a helpful assistant. Use the lookup tool for facts."),
+    ("placeholder", "{history}"),
+    ("human", "{input}"),
+    ("placeholder", "{scratchpad}"),
+])
+
+
+def session(agent, turns):
+    """Latency of each turn in seconds, and prompt tokens of the last model call."""
+    samples = []
+    last = None
+    for i in range(turns):
+        t0 = time.perf_counter()
+        result = agent.run(f"Question {i}: how do desert plants photosynthesize without losing water?")
+        samples.append(time.perf_counter() - t0)
+        last = result.steps[-1].usage_metadata["input_tokens"]
+    return samples, last
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=3)
+    parser.add_argument("--max-tokens", type=int, default=1500, help="ConversationMemory budget")
+    parser.add_argument("--latency", default="fixed:0.02", help="Fake time to first token (see fakes.Latency)")
+    parser.add_argument("--prefill-rate", type=float, default=20000.0,
+                        help="Fake prompt tokens/s added to the time to first token (0 = none)")
+    args = parser.parse_args()
+    fakes.configure([CALL, ANSWER], latency=args.latency, prefill_rate=args.prefill_rate, seed=0)
+    llm = get_llm().bind_tools([lookup])
+    executor = ToolExecutor([lookup])
+
+    memories = {"full": lambda: ConversationMemory(max_tokens=None),
+                "compacted": lambda: ConversationMemory(max_tokens=args.max_tokens)}
+    window = min(10, args.turns)
+    print(f"{args.turns} turns x {args.sessions} sessions, latency {args.latency}, "
+          f"prefill {args.prefill_rate:.0f} tok/s\n")
+    print(f"{'memory':<11}{'p50 first ms':>14}{'p50 last ms':>13}{'last prompt tok':>17}{'session s':>11}{'compactions':>13}")
+    for name, make in memories.items():
+        first, last, tokens, totals = [], [], [], []
+        for _ in range(args.sessions):
+            memory = make()
+            samples, last_tokens = session(AgentLoop(llm, PROMPT, executor, memory=memory), args.turns)
+            first += samples[:window]
+            last += samples[-window:]
+            tokens.append(last_tokens)
+            totals.append(sum(samples))
+        print(f"{name:<11}{statistics.median(first) * 1e3:>14.1f}{statistics.median(last) * 1e3:>13.1f}"
+              f"{statistics.median(tokens):>17.0f}{statistics.median(totals):>11.2f}{memory.compactions:>13}")
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Throughput of the batch helpers against a local fake model.
+
+    python benchmarks/bench_batch.py --items 200 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import run_many, map_threaded
+
+
+def fake_model(latency, jitter, error_rate):
+    def ask(prompt):
+        time.sleep(max(0.0, random.gauss(latency, jitter)))
+        if random.random() < error_rate:
+            raise RuntimeError("fake model error")
+        return f"answer to {prompt}"
+    return ask
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean seconds per fake call")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 2, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    ask = fake_model(args.latency, args.jitter, args.error_rate)
+    prompts = [f"prompt {i}" for i in range(args.items)]
+
+    print(f"{'N':>4} {'mode':>8} {'seconds':>8} {'req/s':>8} {'errors':>6}")
+    for n in args.concurrency:
+        start = time.perf_counter()
+        results = asyncio.run(run_many(ask, prompts, concurrency=n))
+        elapsed = time.perf_counter() - start
+        errors = sum(not r.ok for r in results)
+        print(f"{n:>4} {'asyncio':>8} {elapsed:>8.2f} {len(prompts) / elapsed:>8.1f} {errors:>6}")
+
+        start = time.perf_counter()
+        results = list(map_threaded(ask, prompts, concurrency=n))
+        elapsed = time.perf_counter() - start
+        errors = sum(not r.ok for r in results)
+        print(f"{n:>4} {'threads':>8} {elapsed:>8.2f} {len(prompts) / elapsed:>8.1f} {errors:>6}")
+
+
+if __name__ == "__main__":
+    main()
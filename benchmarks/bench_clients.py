@@ -0,0 +1,50 @@
+"""Per-call client setup cost with and without the shared client registry.
+
+    python benchmarks/bench_clients.py --calls 2000
+
+Only client construction is timed; no request is sent, so a dummy API key
+is enough.
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "Langchain"))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-dummy-key")
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    import google.generativeai as genai
+    import clients
+
+    clients.configure()
+    fresh = per_call(lambda: genai.GenerativeModel("gemini-1.5-flash"), args.calls)
+    shared = per_call(lambda: clients.get_model("gemini-1.5-flash"), args.calls)
+    print(f"GenerativeModel        fresh {fresh:10.1f} us/call   shared {shared:8.2f} us/call")
+
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    import llm
+
+    key = os.environ["GEMINI_API_KEY"]
+    calls = max(1, args.calls // 10)
+    fresh = per_call(lambda: ChatGoogleGenerativeAI(model="gemini-1.5-flash", google_api_key=key), calls)
+    shared = per_call(lambda: llm.get_llm("gemini-1.5-flash"), calls)
+    print(f"ChatGoogleGenerativeAI fresh {fresh:10.1f} us/call   shared {shared:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Wall-clock time and peak memory of map-reduce summarization vs document size.
+
+    python benchmarks/bench_document.py --sizes 100000 1000000 10000000
+
+Documents are generated lazily and the model is a local fake that sleeps
+for --latency seconds per call, so only the pipeline itself is measured.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docsummary import summarize_document
+
+
+class SyntheticDocument:
+    """File-like object producing `size` characters of prose without storing them."""
+
+    def __init__(self, size):
+        self.remaining = size
+        self.sentence = 0
+
+    def read(self, n=-1):
+        if n < 0:
+            n = self.remaining
+        parts = []
+        length = 0
+        while length < min(n, self.remaining):
+            self.sentence += 1
+            s = f"Sentence {self.sentence} describes fact {self.sentence % 97} in some detail. "
+            if self.sentence % 12 == 0:
+                s += "\n\n"
+            parts.append(s)
+            length += len(s)
+        text = "".join(parts)[:min(n, self.remaining)]
+        self.remaining -= len(text)
+        return text
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="*", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    calls = 0
+
+    def fake_ask(prompt):
+        nonlocal calls
+        calls += 1
+        time.sleep(args.latency)
+        return "A short partial summary of the text. " * 5
+
+    print(f"{'chars':>12} {'calls':>7} {'seconds':>8} {'peak MiB':>9}")
+    for size in args.sizes:
+        calls = 0
+        tracemalloc.start()
+        start = time.perf_counter()
+        summarize_document(SyntheticDocument(size), fake_ask, concurrency=args.concurrency)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+        print(f"{size:>12} {calls:>7} {elapsed:>8.2f} {peak:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
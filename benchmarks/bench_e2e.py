@@ -0,0 +1,167 @@
+"""End-to-end client overhead of every entry point, against the fake backend.
+
+    python benchmarks/bench_e2e.py --iterations 50
+    python benchmarks/bench_e2e.py --latency lognormal:0.3:0.5 --rate 150
+    python benchmarks/bench_e2e.py --write-thresholds   # after an intended change
+
+Runs each path in-process with GEMINI_BACKEND=fake (see fakes.py), so no
+API key or network is needed. With the default zero fake latency, the
+numbers are purely our own code: prompt building, caching, parsing, tool
+execution and LangChain plumbing. Reports p50/p99 latency, throughput and
+peak Python memory (tracemalloc) per path. It then compares them with
+benchmarks/e2e_thresholds.json and exits non-zero on a regression.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import runpy
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "Langchain"))
+os.environ["GEMINI_BACKEND"] = "fake"
+os.environ.pop("GEMINI_CACHE", None)
+os.environ.pop("TRACE_FILE", None)
+THRESHOLDS = os.path.join(ROOT, "benchmarks", "e2e_thresholds.json")
+
+QUIZ = json.dumps({
+    "summary": "Photosynthesis turns light, water and carbon dioxide into sugar and oxygen.",
+    "quiz": [{"question": f"Question {i}?", "options": ["a", "b", "c", "d"], "answer_index": i % 4}
+             for i in range(3)],
+})
+TEXT = "Photosynthesis is the process plants use to turn light into chemical energy. " * 20
+
+
+def fake_search(query, max_results):
+    return [{"title": f"{query} {i}", "href": f"https://example.com/{i}", "body": "snippet"}
+            for i in range(max_results)]
+
+
+def run_script(name):
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            namespace = runpy.run_path(os.path.join(ROOT, "Langchain", name), run_name="__bench__")
+        if "executor" in namespace:
+            namespace["executor"].shutdown()
+    return run
+
+
+def build_paths(timing):
+    """name -> (setup, run); setup scripts the fake backend for that path."""
+    import fakes
+    import test
+    import summary
+
+    def script(responses=None, **kwargs):
+        return lambda: fakes.configure(responses, **kwargs, **timing)
+
+    paths = {
+        "main.ask": (script(words=60),
+                     lambda: test.askGemini("What is photosynthesis?", bypass_cache=True)),
+        "main.ask_stream": (script(words=60),
+                            lambda: list(test.askGemini_stream("What is photosynthesis?", bypass_cache=True))),
+        "summary.quiz": (script([QUIZ]),
+                         lambda: summary.summarize_and_quiz(TEXT, bypass_cache=True)),
+        "summary.quiz_stream": (script([QUIZ]),
+                                lambda: list(summary.summarize_and_quiz_stream(TEXT, bypass_cache=True))),
+    }
+
+    import search
+    search.set_backend(fake_search)
+    web_call = {"tool_calls": [{"name": "web_search", "args": {"query": "donald trump age", "num_results": 3}}]}
+    # The agent loop sends tool results back, so each run is a tool call then a final answer.
+    final = {"text": "Here is what I found.", "tool_calls": []}
+    paths["project.py"] = (script([web_call, final]), run_script("project.py"))
+    joke_call = {"tool_calls": [{"name": "joke", "args": {"setup": "a", "punchline": "b", "rating": 3}}]}
+    paths["mini-project.py"] = (script([joke_call, final]), run_script("mini-project.py"))
+
+    try:
+        import shellAgent
+        agent = shellAgent.build_agent(verbose=False)
+    except ImportError as e:
+        print(f"skipping shellAgent: {e}")
+    else:
+        paths["shellAgent"] = (script(["Thought: nothing to run\nFinal Answer: done"]),
+                               lambda: agent.run("say done"))
+    return paths
+
+
+def measure(setup, run, iterations, memory_runs):
+    setup()
+    run()  # warm up imports and caches
+    samples = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in range(memory_runs):
+        run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    samples.sort()
+    return {
+        "p50_ms": statistics.median(samples) * 1e3,
+        "p99_ms": samples[max(0, int(len(samples) * 0.99) - 1)] * 1e3,
+        "ops_per_s": iterations / elapsed,
+        "peak_kb": peak / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--memory-runs", type=int, default=3)
+    parser.add_argument("--latency", default="fixed:0", help="Fake time to first token (see fakes.Latency)")
+    parser.add_argument("--rate", type=float, default=0.0, help="Fake output tokens/s (0 = instant)")
+    parser.add_argument("--only", nargs="*", help="Run only these paths")
+    parser.add_argument("--thresholds", default=THRESHOLDS)
+    parser.add_argument("--write-thresholds", action="store_true",
+                        help="Save current numbers x --headroom as the new thresholds")
+    parser.add_argument("--headroom", type=float, default=3.0)
+    args = parser.parse_args()
+    timing = {"latency": args.latency, "rate": args.rate, "seed": 0}
+
+    results = {}
+    print(f"{'path':<22}{'p50 ms':>10}{'p99 ms':>10}{'ops/s':>10}{'peak KB':>10}")
+    for name, (setup, run) in build_paths(timing).items():
+        if args.only and name not in args.only:
+            continue
+        r = results[name] = measure(setup, run, args.iterations, args.memory_runs)
+        print(f"{name:<22}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['ops_per_s']:>10.1f}{r['peak_kb']:>10.0f}")
+
+    if args.write_thresholds:
+        # Floors keep sub-millisecond paths from failing on timer noise alone.
+        limits = {name: {"p50_ms": round(max(r["p50_ms"] * args.headroom, 1.0), 2),
+                         "peak_kb": round(max(r["peak_kb"] * args.headroom, 64))}
+                  for name, r in results.items()}
+        with open(args.thresholds, "w", encoding="utf-8") as f:
+            json.dump(limits, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"thresholds written to {args.thresholds}")
+        return
+
+    if args.latency != "fixed:0" or args.rate or not os.path.exists(args.thresholds):
+        return  # thresholds describe client overhead only
+    with open(args.thresholds, encoding="utf-8") as f:
+        limits = json.load(f)
+    failures = [f"{name}: {key} {results[name][key]:.2f} > {limit}"
+                for name, keys in limits.items() if name in results
+                for key, limit in keys.items() if results[name][key] > limit]
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
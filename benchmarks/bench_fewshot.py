@@ -0,0 +1,82 @@
+"""Selection latency of ExampleSelector over a large example bank.
+
+    python benchmarks/bench_fewshot.py --examples 10000 --queries 2000
+
+Builds a synthetic bank of tool-calling examples, then times picking the
+top-k for fresh inputs (index lookup + budget + render) and for repeated
+inputs (served from the render cache). Also prints the prompt size of
+the selected examples next to sending the whole bank. --no-numpy times
+the pure-Python scoring used when numpy is not installed.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "Langchain"))
+
+TOPICS = ["cats", "planes", "trains", "coffee", "python", "taxes", "rain", "pizza", "robots", "cheese",
+          "dentists", "penguins", "printers", "mondays", "socks", "wifi", "bananas", "pirates"]
+VERBS = ["Tell me a joke about", "Something funny about", "Make fun of", "Give me a pun on", "Roast"]
+
+
+def make_bank(n, rng):
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+    bank = []
+    for i in range(n):
+        topic = f"{rng.choice(TOPICS)} {rng.choice(TOPICS)}{i % 500}"
+        args = {"setup": f"Why did the {topic} cross the road?", "punchline": "To get a rating", "rating": i % 10}
+        bank.append([
+            HumanMessage(f"{rng.choice(VERBS)} {topic}", name="example_user"),
+            AIMessage("", name="example_assistant",
+                      tool_calls=[{"name": "joke", "args": args, "id": "1"}]),
+            ToolMessage(str(args), tool_call_id="1"),
+        ])
+    return bank
+
+
+def timed(fn, inputs):
+    samples = []
+    for text in inputs:
+        t0 = time.perf_counter()
+        fn(text)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return statistics.median(samples) * 1e3, samples[int(len(samples) * 0.99) - 1] * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--examples", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--no-numpy", action="store_true", help="Time the pure-Python scoring path")
+    args = parser.parse_args()
+
+    from fewshot import ExampleSelector
+
+    rng = random.Random(0)
+    bank = make_bank(args.examples, rng)
+    start = time.perf_counter()
+    selector = ExampleSelector(bank, k=args.k, cache_size=args.queries * 2)
+    if args.no_numpy:
+        selector.arrays = None
+    print(f"index built for {args.examples} examples in {time.perf_counter() - start:.2f}s")
+
+    queries = [f"{rng.choice(VERBS)} {rng.choice(TOPICS)} {rng.choice(TOPICS)}{rng.randrange(500)} "
+               f"#{i}" for i in range(args.queries)]
+    p50, p99 = timed(selector.messages, queries)
+    print(f"fresh input   p50 {p50:7.3f} ms   p99 {p99:7.3f} ms")
+    p50, p99 = timed(selector.messages, queries)
+    print(f"cached input  p50 {p50:7.3f} ms   p99 {p99:7.3f} ms")
+
+    chosen = sum(selector.costs[i] for i in selector.select(queries[0]))
+    print(f"prompt tokens for examples: {chosen} selected vs {sum(selector.costs)} for the whole bank")
+
+
+if __name__ == "__main__":
+    main()
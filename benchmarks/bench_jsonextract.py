@@ -0,0 +1,112 @@
+"""Throughput of jsonextract against the old regex + json.loads path.
+
+    python benchmarks/bench_jsonextract.py --messages 20000
+
+The corpus mimics what Gemini actually sends back: fenced blocks with
+preamble and trailing prose, bare JSON, several blocks per message,
+strings containing braces and fences, and outputs truncated mid-value.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jsonextract import extract_json, first_json
+
+PREAMBLES = ["", "Sure! Here is the JSON you asked for:\n\n", "Based on the text, here's the result.\n"]
+TRAILERS = ["", "\n\nLet me know if you need anything else!", "\n\nNote: heights are approximate [1]."]
+
+
+def quiz(rng):
+    return {
+        "summary": "The passage explains {braces} and \"quotes\" in " + "detail " * rng.randint(5, 40),
+        "quiz": [
+            {
+                "question": f"Question {i}: what does ``` mean here?",
+                "options": [f"option {j}" for j in range(4)],
+                "answer_index": rng.randint(0, 3),
+            }
+            for i in range(rng.randint(3, 10))
+        ],
+    }
+
+
+def people(rng):
+    return {"people": [{"name": f"Person {i}", "height_in_meters": round(rng.uniform(1.4, 2.1), 2)}
+                       for i in range(rng.randint(1, 20))]}
+
+
+def message(rng):
+    value = json.dumps(rng.choice([quiz, people])(rng), indent=rng.choice([None, 2]))
+    kind = rng.random()
+    if kind < 0.6:
+        body = f"```json\n{value}\n```"
+    elif kind < 0.8:
+        body = value
+    elif kind < 0.95:
+        body = f"```json\n{value}\n```\nAnd a second one:\n```json\n{json.dumps(people(rng))}\n```"
+    else:
+        body = "```json\n" + value[: rng.randint(len(value) // 2, len(value) - 1)]
+    return rng.choice(PREAMBLES) + body + rng.choice(TRAILERS)
+
+
+def regex_path(text):
+    matches = re.findall(r"```json(.*?)```", text, re.DOTALL)
+    out = []
+    for match in matches:
+        try:
+            out.append(json.loads(match.strip()))
+        except ValueError:
+            pass
+    return out
+
+
+# Regression checks: (text, what first_json(text, repair_truncated=True) must return).
+CHECKS = [
+    # A quiz cut off mid-question: the complete Q1 nested inside must not win over the repair.
+    ('```json\n{"summary": "S", "quiz": [{"question": "Q1", "options": ["a", "b", "c", "d"], '
+     '"answer_index": 1}, {"question": "Q2", "opt',
+     {"summary": "S", "quiz": [{"question": "Q1", "options": ["a", "b", "c", "d"], "answer_index": 1},
+                               {"question": "Q2"}]}),
+    # A stray brace in prose must not hide the block after it.
+    ('Use {braces carefully. ```json\n{"a": 1}\n```', {"a": 1}),
+]
+
+
+def check():
+    for text, expected in CHECKS:
+        got = first_json(text, repair_truncated=True)
+        if got != expected:
+            sys.exit(f"REGRESSION first_json({text[:40]!r}...) returned {got!r}, expected {expected!r}")
+
+
+def run(name, fn, corpus):
+    start = time.perf_counter()
+    found = sum(len(fn(text)) for text in corpus)
+    elapsed = time.perf_counter() - start
+    size = sum(len(t) for t in corpus) / 2**20
+    print(f"{name:<22} {elapsed:>7.3f}s {len(corpus) / elapsed:>10.0f} msg/s {size / elapsed:>7.1f} MiB/s  values={found}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    check()
+
+    rng = random.Random(args.seed)
+    corpus = [message(rng) for _ in range(args.messages)]
+
+    run("regex + json.loads", regex_path, corpus)
+    run("jsonextract", extract_json, corpus)
+    run("jsonextract (repair)", lambda t: extract_json(t, repair_truncated=True), corpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Per-invoke prompt rendering cost: ChatPromptTemplate vs CompiledPrompt.
+
+    python benchmarks/bench_prompts.py --calls 5000
+
+Times only the prompt step (no model call) for the shapes used in the
+scripts: a system prompt + few-shot placeholder + input, and the
+customparsing prompt with a JSON schema partial.
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "Langchain"))
+
+
+def per_call(fn, calls):
+    fn()
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--system-chars", type=int, default=4000, help="Size of the system prompt")
+    args = parser.parse_args()
+
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+    from langchain_core.prompts import ChatPromptTemplate
+    from prompts import CompiledPrompt
+    from schemas import People, json_schema
+
+    system = "You are a helpful AI research assistant. " * (args.system_chars // 41 + 1)
+    examples = []
+    for i in range(3):
+        examples += [
+            HumanMessage(f"Search for topic {i}", name="example_user"),
+            AIMessage("", name="example_assistant",
+                      tool_calls=[{"name": "web_search", "args": {"query": f"topic {i}"}, "id": str(i)}]),
+            ToolMessage('{"results": []}', tool_call_id=str(i)),
+        ]
+    spec = [("system", system), ("placeholder", "{examples}"), ("human", "{input}")]
+    inputs = {"input": "how old is donald trump", "examples": examples}
+
+    template = ChatPromptTemplate.from_messages(spec)
+    compiled = CompiledPrompt(spec)
+    before = per_call(lambda: template.invoke(inputs), args.calls)
+    after = per_call(lambda: compiled.invoke(inputs), args.calls)
+    print(f"few-shot prompt   ChatPromptTemplate {before:8.1f} us   CompiledPrompt {after:8.1f} us"
+          f"   ({before / after:.1f}x)")
+
+    schema_spec = [("system", "Output JSON matching: ```json\n{schema}\n```"), ("human", "{query}")]
+    template = ChatPromptTemplate.from_messages(schema_spec).partial(schema=json_schema(People))
+    compiled = CompiledPrompt(schema_spec, schema=json_schema(People))
+    before = per_call(lambda: template.invoke({"query": "Anna is 23"}), args.calls)
+    after = per_call(lambda: compiled.invoke({"query": "Anna is 23"}), args.calls)
+    print(f"schema prompt     ChatPromptTemplate {before:8.1f} us   CompiledPrompt {after:8.1f} us"
+          f"   ({before / after:.1f}x)")
+
+    # Without the Runnable wrapper (callback manager, config), i.e. the rendering itself.
+    before = per_call(lambda: template.format_messages(query="Anna is 23"), args.calls)
+    after = per_call(lambda: compiled.format_messages(query="Anna is 23"), args.calls)
+    print(f"format_messages   ChatPromptTemplate {before:8.1f} us   CompiledPrompt {after:8.1f} us"
+          f"   ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
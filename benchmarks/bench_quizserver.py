@@ -0,0 +1,141 @@
+"""Load test for the summary.py --serve mode, against the fake backend.
+
+    python benchmarks/bench_quizserver.py --requests 400 --clients 32
+    python benchmarks/bench_quizserver.py --latency 0.8 --drop-rate 0.1
+
+Starts quizserver in-process on a free port with GEMINI_BACKEND=fake and
+fires --requests POST /quiz calls from --clients keep-alive connections.
+The fake answers the combined prompt with one entry per <text id> (and
+leaves out a --drop-rate share of them, to exercise the per-text
+fallback). Each call takes the --latency median plus time per output
+token, so a batch costs more than a single text but much less than one
+call per text. Runs once unbatched (window 0, one text per call) and
+once batched, reporting p50/p99 latency, requests/s and LLM calls.
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["GEMINI_BACKEND"] = "fake"
+os.environ.pop("GEMINI_CACHE", None)
+
+QUIZ = [{"question": f"Question {i}?", "options": ["a", "b", "c", "d"], "answer_index": i % 4}
+        for i in range(3)]
+
+
+def responder(drop_rate, rng):
+    def answer(prompt):
+        ids = [int(i) for i in re.findall(r'<text id="(\d+)">', prompt)]
+        if not ids:
+            return json.dumps({"summary": "One text.", "quiz": QUIZ})
+        kept = [i for i in ids if rng.random() >= drop_rate]
+        return json.dumps({"results": [{"id": i, "summary": f"Text {i}.", "quiz": QUIZ} for i in kept]})
+    return answer
+
+
+def start_server(options):
+    ready = threading.Event()
+    state = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        state["loop"] = loop
+
+        def on_ready(port):
+            state["port"] = port
+            ready.set()
+
+        from quizserver import serve
+        state["task"] = loop.create_task(serve("127.0.0.1", 0, ready=on_ready, bypass_cache=True, **options))
+        try:
+            loop.run_until_complete(state["task"])
+        except asyncio.CancelledError:
+            pass
+        loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    ready.wait()
+
+    def stop():
+        state["loop"].call_soon_threadsafe(state["task"].cancel)
+        thread.join(5)
+    return state["port"], stop
+
+
+def client(port, texts):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    samples, errors = [], 0
+    for text in texts:
+        t0 = time.perf_counter()
+        conn.request("POST", "/quiz", json.dumps({"text": text}), {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        body = json.loads(response.read())
+        samples.append(time.perf_counter() - t0)
+        if response.status != 200 or "quiz" not in body:
+            errors += 1
+    conn.close()
+    return samples, errors
+
+
+def run(label, options, args):
+    import fakes
+    import random
+
+    fake = fakes.configure(latency=f"lognormal:{args.latency}:0.3", rate=args.rate, seed=0,
+                           responder=responder(args.drop_rate, random.Random(0)))
+    port, stop = start_server(options)
+    texts = [f"Document {i}. " + "Plants turn light into chemical energy. " * args.text_words
+             for i in range(args.requests)]
+    shards = [texts[i::args.clients] for i in range(args.clients)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.clients) as pool:
+        outcomes = list(pool.map(lambda shard: client(port, shard), shards))
+    elapsed = time.perf_counter() - start
+
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.request("GET", "/stats")
+    stats = json.loads(conn.getresponse().read())
+    conn.close()
+    stop()
+
+    samples = sorted(s for shard, _ in outcomes for s in shard)
+    errors = sum(e for _, e in outcomes)
+    p99 = samples[max(0, int(len(samples) * 0.99) - 1)]
+    print(f"{label:<10} p50 {statistics.median(samples) * 1e3:7.1f} ms  p99 {p99 * 1e3:7.1f} ms  "
+          f"{len(samples) / elapsed:7.1f} req/s  LLM calls {fake.calls:>4}  "
+          f"texts/batch {stats['texts_per_batch']:5.2f}  fallbacks {stats['fallbacks']:>3}  errors {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent keep-alive connections")
+    parser.add_argument("--latency", type=float, default=0.3, help="Median fake time to first token (s)")
+    parser.add_argument("--rate", type=float, default=2000.0, help="Fake output tokens/s")
+    parser.add_argument("--drop-rate", type=float, default=0.02, help="Share of texts the batch reply leaves out")
+    parser.add_argument("--text-words", type=int, default=40, help="Repeats of the sample sentence per text")
+    parser.add_argument("--window-ms", type=float, default=20)
+    parser.add_argument("--batch-tokens", type=int, default=8000)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=8, help="Batches in flight at once")
+    args = parser.parse_args()
+
+    run("unbatched", {"window": 0, "max_batch": 1, "workers": args.clients}, args)
+    run("batched", {"window": args.window_ms / 1000, "max_tokens": args.batch_tokens,
+                    "max_batch": args.batch_size, "workers": args.workers}, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Validation cost per 10k structured responses, cold vs cached validators.
+
+    python benchmarks/bench_schemas.py --responses 10000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "Langchain"))
+
+from pydantic import TypeAdapter
+
+import schemas
+from schemas import FinalResponse, Joke, JokeDict, People
+
+
+def joke(rng):
+    return {"setup": f"Why did cat {rng.randint(0, 999)} cross the road?",
+            "punchline": "To get to the other side!", "rating": rng.randint(1, 10)}
+
+
+def final(rng):
+    if rng.random() < 0.5:
+        return {"final_output": joke(rng)}
+    return {"final_output": {"response": "Happy to help! " * rng.randint(1, 5)}}
+
+
+def people(rng):
+    return {"people": [{"name": f"Person {i}", "height_in_meters": rng.uniform(1.4, 2.1)}
+                       for i in range(rng.randint(1, 10))]}
+
+
+def timed(label, fn, n):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<40} {elapsed * 1e3:>9.1f} ms per {n}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--responses", type=int, default=10000)
+    args = parser.parse_args()
+    n = args.responses
+    rng = random.Random(0)
+
+    for schema, make in [(Joke, joke), (JokeDict, joke), (FinalResponse, final), (People, people)]:
+        raw = [json.dumps(make(rng)) for _ in range(n)]
+        print(f"{schema.__name__}:")
+        timed("TypeAdapter rebuilt per response", lambda: [TypeAdapter(schema).validate_json(r) for r in raw], n)
+        if hasattr(schema, "model_validate"):
+            timed("json.loads + model_validate", lambda: [schema.model_validate(json.loads(r)) for r in raw], n)
+        timed("cached validate_json", lambda: [schemas.validate_json(schema, r) for r in raw], n)
+        timed("cached validate_many_json", lambda: schemas.validate_many_json(schema, raw), n)
+
+
+if __name__ == "__main__":
+    main()
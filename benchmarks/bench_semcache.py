@@ -0,0 +1,87 @@
+"""Hit rate, false-hit rate and lookup latency of SemanticCache.
+
+    python benchmarks/bench_semcache.py --entries 100000 --queries 2000
+
+The cache is filled with synthetic questions ("what is the population of
+kalomiren ka42 in 1942"). Queries are paraphrases of cached questions (should
+hit) and questions about entities that were never cached (should miss);
+a hit on the second kind, or on the wrong cached question, is a false hit.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEMPLATES = [
+    ("what is the population of {e} in {y}", "{e} population in {y}, what is it"),
+    ("how old is {e} as of {y}", "as of {y} how old is {e}?"),
+    ("who founded {e} in {y}", "Who founded {e} back in {y}?"),
+    ("what is the capital of {e} in {y}", "in {y} what was the capital of {e}"),
+]
+
+
+SYLLABLES = ["ka", "lo", "mi", "ren", "tu", "sa", "vel", "dor", "ni", "pra", "zu", "ek", "mor", "li", "an", "qui"]
+
+
+def name(entity):
+    """A made-up place name that is unique per entity number."""
+    rng = random.Random(entity)
+    return "".join(rng.choice(SYLLABLES) for _ in range(4)) + f" {rng.choice(SYLLABLES)}{entity % 97}"
+
+
+def question(entity, paraphrase=False):
+    template = TEMPLATES[entity % len(TEMPLATES)][1 if paraphrase else 0]
+    return template.format(e=name(entity), y=1900 + entity % 120)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    args = parser.parse_args()
+
+    from semcache import SemanticCache
+
+    rng = random.Random(0)
+    cache = SemanticCache(threshold=args.threshold, max_entries=args.entries)
+    start = time.perf_counter()
+    for entity in range(args.entries):
+        cache.add(question(entity), f"answer {entity}")
+    print(f"filled {len(cache)} entries in {time.perf_counter() - start:.1f}s")
+
+    latencies = []
+    hits = wrong = misses_expected = false_hits = 0
+    for i in range(args.queries):
+        if i % 2 == 0:
+            entity = rng.randrange(args.entries)
+            q = question(entity, paraphrase=True)
+            t0 = time.perf_counter()
+            answer, _ = cache.lookup(q)
+            latencies.append(time.perf_counter() - t0)
+            if answer is not None:
+                hits += 1
+                wrong += answer != f"answer {entity}"
+        else:
+            q = question(args.entries + rng.randrange(10**6))
+            t0 = time.perf_counter()
+            answer, _ = cache.lookup(q)
+            latencies.append(time.perf_counter() - t0)
+            misses_expected += 1
+            false_hits += answer is not None
+
+    paraphrases = args.queries - misses_expected
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1e3
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1e3
+    print(f"paraphrase hit rate   {hits / paraphrases:6.1%}  ({wrong} answered with the wrong entry)")
+    print(f"unseen false-hit rate {false_hits / misses_expected:6.1%}")
+    print(f"lookup latency        p50 {p50:.2f} ms   p99 {p99:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Per-tool-call latency of the shell agent's tools, before and after.
+
+    python benchmarks/bench_shell.py --calls 200
+
+"before" shells out for every call the way the tools used to (with the
+POSIX equivalents of dir/type); "after" uses os.scandir / buffered reads
+and a persistent ShellSession.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "Langchain"))
+
+from shell import ShellSession
+from shellAgent import list_dir, read_file
+
+
+def shell_out(command):
+    result = subprocess.run(command, shell=True, capture_output=True, text=True)
+    return result.stdout or result.stderr
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--files", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for i in range(args.files):
+            with open(os.path.join(workdir, f"file{i:04}.txt"), "w") as f:
+                f.write("some line of text\n" * 50)
+        sample = os.path.join(workdir, "file0000.txt")
+        session = ShellSession()
+
+        rows = [
+            ("list_dir", lambda: shell_out(f"ls -la {workdir}"), lambda: list_dir(workdir)),
+            ("read_file", lambda: shell_out(f"cat {sample}"), lambda: read_file(sample)),
+            ("run_shell", lambda: shell_out("echo hello"), lambda: session.run("echo hello")),
+        ]
+        print(f"{'tool':<10} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for name, before, after in rows:
+            b = per_call(before, args.calls)
+            a = per_call(after, args.calls)
+            print(f"{name:<10} {b:>10.3f} {a:>10.3f} {b / a:>7.1f}x")
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Startup time of the CLIs, measured with `python -X importtime`.
+
+    python benchmarks/bench_startup.py --runs 10 --target-ms 100
+
+Runs each entry point with --help, reports the median wall time and the
+slowest imports, and exits non-zero if any median is over the target.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINTS = ["main.py", "summary.py", os.path.join("Langchain", "shellAgent.py")]
+
+
+def run_once(script):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", script, "--help"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    elapsed = (time.perf_counter() - start) * 1e3
+    if proc.returncode != 0:
+        raise RuntimeError(f"{script} --help failed:\n{proc.stderr}")
+    return elapsed, proc.stderr
+
+
+def slowest_imports(importtime_output, top):
+    rows = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Only top-level imports (one leading space), so nothing is counted twice.
+        if not name.startswith("  "):
+            rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--target-ms", type=float, default=100.0)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    over = []
+    for script in ENTRY_POINTS:
+        times = []
+        for _ in range(args.runs):
+            elapsed, importtime = run_once(script)
+            times.append(elapsed)
+        median = statistics.median(times)
+        status = "ok" if median <= args.target_ms else "OVER"
+        print(f"{script:<26} median {median:7.1f} ms  min {min(times):7.1f} ms  [{status}]")
+        for cumulative_us, name in slowest_imports(importtime, args.top):
+            print(f"    {cumulative_us / 1e3:7.1f} ms  {name}")
+        if median > args.target_ms:
+            over.append(script)
+
+    if over:
+        print(f"\nOver the {args.target_ms:.0f} ms target: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Speed and accuracy of the local token estimator (tokens.py).
+
+    python benchmarks/bench_tokens.py --docs 20000
+    python benchmarks/bench_tokens.py --calibration token_calibration.json
+
+Reports the cost of one count() (uncached and cached), of count_many()
+against a count() loop over --docs synthetic documents, and the
+estimates of the old len(text) // 4 rule and of the estimator on prose,
+code, numbers and non-Latin text. With --calibration, the calibrated
+weights are the reference and the mean error of both rules is reported
+(calibrate against real count_tokens answers first).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import tokens
+
+WORDS = ("the plant turns light water and carbon dioxide into sugar oxygen energy chlorophyll "
+         "photosynthesis process leaf cell membrane reaction electron transport").split()
+SAMPLES = {
+    "prose": "Photosynthesis converts light energy into chemical energy stored in glucose. " * 4,
+    "code": "def add(a, b):\n    return {'sum': a + b, 'ok': True}  # helper\n" * 4,
+    "numbers": "2024-05-17 12:30:45, 3.14159, 42, 1000000, 0x1F, 98.6% " * 4,
+    "non_latin": "光合作用は光エネルギーを化学エネルギーに変換します。" * 4,
+}
+
+
+def documents(n, max_words, rng):
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(5, max_words))) for _ in range(n)]
+
+
+def per_call_us(fn, arg, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--max-words", type=int, default=80, help="Document length is 5..max-words words")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--calibration", help="Weights from `tokens.py calibrate` to compare against")
+    args = parser.parse_args()
+    rng = random.Random(0)
+    estimator = tokens.Estimator()
+
+    prompt = SAMPLES["prose"] * 10
+    print(f"count() on {len(prompt)} chars: uncached {per_call_us(estimator._count, prompt, args.repeat):.1f} us, "
+          f"cached {per_call_us(estimator.count, prompt, args.repeat):.2f} us")
+
+    docs = documents(args.docs, args.max_words, rng)
+    start = time.perf_counter()
+    looped = [estimator._count(d) for d in docs]
+    loop_s = time.perf_counter() - start
+    start = time.perf_counter()
+    vectorized = estimator.count_many(docs)
+    vec_s = time.perf_counter() - start
+    assert looped == vectorized.tolist()
+    chars = sum(map(len, docs))
+    print(f"{args.docs} docs ({chars / 1e6:.1f} M chars): loop {loop_s * 1e3:.0f} ms, "
+          f"count_many {vec_s * 1e3:.0f} ms ({loop_s / vec_s:.1f}x, {args.docs / vec_s:,.0f} docs/s)")
+
+    reference = tokens.Estimator.load(args.calibration) if args.calibration else None
+    print(f"\n{'text':<10}{'chars/4':>9}{'estimate':>10}{'calibrated':>12}")
+    for name, text in SAMPLES.items():
+        calibrated = reference.count(text) if reference else "-"
+        print(f"{name:<10}{len(text) // 4:>9}{estimator.count(text):>10}{calibrated:>12}")
+    if reference is None:
+        return
+    texts = list(SAMPLES.values()) + docs[:200]
+    truth = reference.count_many(texts)
+    naive = np.array([len(t) // 4 for t in texts])
+    print(f"mean error: chars/4 {np.mean(np.abs(naive - truth) / truth):.1%}, "
+          f"estimator {estimator.error(texts, truth):.1%}")
+
+
+if __name__ == "__main__":
+    main()
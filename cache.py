@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def make_key(model_name, prompt, generation_config=None):
+    """Hash (model_name, prompt, generation config) into a cache key."""
+    payload = json.dumps(
+        [model_name, prompt, generation_config or {}],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """On-disk response cache backed by SQLite in WAL mode.
+
+    Safe to share between worker processes: every process opens its own
+    connection and SQLite handles the locking. Entries expire after `ttl`
+    seconds and the least recently used ones are evicted once the cache
+    holds more than `max_entries` rows or `max_bytes` of response text,
+    down to `low_water` of both limits so eviction runs once every many
+    writes rather than on each one. Triggers keep the row and byte totals
+    in a one-row table, so checking the limits costs one lookup.
+
+    Reads stay reads: a hit only notes its access time in memory, and the
+    noted times are written in one transaction every `touch_batch` hits or
+    `touch_interval` seconds, and before any eviction.
+    """
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=10000, max_bytes=256 * 1024 * 1024,
+                 low_water=0.9, touch_batch=256, touch_interval=5.0):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        self.touch_batch = touch_batch
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # guards the counters and the noted access times
+        self._touched = {}
+        self._last_flush = time.monotonic()
+        # Expired rows are also dropped on a miss; a full sweep runs at most this often.
+        self._next_sweep = 0.0
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        # A connection must not be shared across a fork, so reopen per pid.
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_db(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS totals ("
+                " id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL, bytes INTEGER NOT NULL)"
+            )
+            # Seeded from the rows already there when an older cache file gains the table.
+            conn.execute(
+                "INSERT OR IGNORE INTO totals SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses BEGIN"
+                " UPDATE totals SET entries = entries + 1, bytes = bytes + new.size; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses BEGIN"
+                " UPDATE totals SET entries = entries - 1, bytes = bytes - old.size; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_update AFTER UPDATE OF size ON responses BEGIN"
+                " UPDATE totals SET bytes = bytes + new.size - old.size; END"
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, key):
+        """Return the cached response for `key`, or None on a miss."""
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+            if row is not None:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self._touched[key] = now
+            due = (len(self._touched) >= self.touch_batch
+                   or time.monotonic() - self._last_flush >= self.touch_interval)
+        if due:
+            self.flush()
+        return row[0]
+
+    def flush(self):
+        """Write the access times noted by get() since the last flush."""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            self._last_flush = time.monotonic()
+        if not touched:
+            return
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "UPDATE responses SET accessed_at = MAX(accessed_at, ?) WHERE key = ?",
+                [(at, key) for key, at in touched.items()],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def set(self, key, value):
+        """Store `value` under `key` and evict old entries if over the limits."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "INSERT INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+            "created_at = excluded.created_at, accessed_at = excluded.accessed_at",
+            (key, value, len(value.encode("utf-8")), now, now),
+        )
+        entries, size = conn.execute("SELECT entries, bytes FROM totals").fetchone()
+        if ((self.max_entries is not None and entries > self.max_entries)
+                or (self.max_bytes is not None and size > self.max_bytes)
+                or (self.ttl is not None and now >= self._next_sweep)):
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones down to the low-water mark."""
+        self.flush()
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.ttl is not None:
+                conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+                self._next_sweep = now + min(self.ttl, 60)
+            entries, size = conn.execute("SELECT entries, bytes FROM totals").fetchone()
+            if self.max_entries is not None and entries > self.max_entries:
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (int(self.max_entries * self.low_water),),
+                )
+            if self.max_bytes is not None and size > self.max_bytes:
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM ("
+                    "  SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC) AS total FROM responses"
+                    " ) WHERE total > ?)",
+                    (int(self.max_bytes * self.low_water),),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        with self._lock:
+            self._touched = {}
+        self._connect().execute("DELETE FROM responses")
+
+    def stats(self):
+        """Return hit/miss counters for this process plus the on-disk size."""
+        count, size = self._connect().execute("SELECT entries, bytes FROM totals").fetchone()
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "entries": count,
+            "bytes": size,
+        }
+
+
+_default_cache = None
+
+
+def get_cache():
+    """Return the cache configured by GEMINI_CACHE, or None if caching is off."""
+    global _default_cache
+    path = os.getenv("GEMINI_CACHE")
+    if not path:
+        return None
+    if _default_cache is None or _default_cache.path != path:
+        ttl = os.getenv("GEMINI_CACHE_TTL")
+        _default_cache = ResponseCache(path, ttl=float(ttl) if ttl else 7 * 24 * 3600)
+    return _default_cache
@@ -0,0 +1,59 @@
+import json
+import os
+import threading
+
+# The Gemini SDK is slow to import, so it is only loaded on first use.
+
+_lock = threading.Lock()
+_models = {}
+_configured = False
+
+
+def configure():
+    """Load .env and configure the Gemini SDK once per process."""
+    global _configured
+    if _configured:
+        return
+    with _lock:
+        if _configured:
+            return
+        from dotenv import load_dotenv
+        import google.generativeai as genai
+
+        load_dotenv()
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("API key not found. Please set GEMINI_API_KEY in your .env file.")
+        genai.configure(api_key=api_key)
+        _configured = True
+
+
+def get_model(model_name="gemini-1.5-flash", generation_config=None):
+    """Return the shared GenerativeModel for (model_name, generation_config).
+
+    Each combination is built once; all models share the SDK's configured
+    client, so the underlying connection is reused between calls. With
+    GEMINI_BACKEND=fake an offline FakeGenerativeModel is returned instead.
+    """
+    key = (model_name, json.dumps(generation_config or {}, sort_keys=True, default=str))
+    model = _models.get(key)
+    if model is None and os.getenv("GEMINI_BACKEND", "").lower() == "fake":
+        from fakes import FakeGenerativeModel
+
+        model = _models.setdefault(key, FakeGenerativeModel(model_name, generation_config))
+    if model is None:
+        configure()
+        import google.generativeai as genai
+
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                model = genai.GenerativeModel(model_name, generation_config=generation_config)
+                _models[key] = model
+    return model
+
+
+def clear():
+    """Forget every cached model (mainly for benchmarks)."""
+    with _lock:
+        _models.clear()
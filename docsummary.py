@@ -0,0 +1,106 @@
+from batch import map_threaded
+from tokens import count, prefix_length
+
+CHUNK_PROMPT = """
+You are summarizing one part of a longer document. Write a dense summary of
+the PART below in at most {words} words. Keep key facts, names, numbers and
+definitions; skip filler.
+
+PART:
+{text}
+"""
+
+REDUCE_PROMPT = """
+Combine the partial summaries below (they cover consecutive parts of one
+document, in order) into a single coherent summary of at most {words} words.
+Keep the most important facts and remove repetition.
+
+PARTIAL SUMMARIES:
+{text}
+"""
+
+
+def _cut_point(text, limit):
+    """Best place to end a chunk at or before `limit`: paragraph, sentence, then word."""
+    for sep in ("\n\n", ". ", "\n", " "):
+        cut = text.rfind(sep, limit // 2, limit)
+        if cut != -1:
+            return cut + len(sep)
+    return limit
+
+
+def iter_chunks(stream, max_tokens=2000, overlap_tokens=200, block_size=1 << 16):
+    """Split a text stream into chunks of about `max_tokens`, overlapping by `overlap_tokens`.
+
+    Sizes are measured with the local token estimator (tokens.py). The
+    stream is read `block_size` characters at a time, so only about one
+    chunk plus one block is held in memory however large the input is.
+    Each chunk starts at least halfway into the previous one, so the overlap
+    must be under half of `max_tokens`.
+    """
+    if max_tokens < 1:
+        raise ValueError(f"max_tokens must be at least 1, got {max_tokens}")
+    if overlap_tokens < 0 or (overlap_tokens and overlap_tokens >= max_tokens // 2):
+        raise ValueError(f"overlap_tokens must be under half of max_tokens ({max_tokens // 2}), "
+                         f"got {overlap_tokens}")
+
+    buffer = ""
+    eof = False
+    while not eof or buffer.strip():
+        while not eof and count(buffer) <= max_tokens:
+            block = stream.read(block_size)
+            if not block:
+                eof = True
+            buffer += block
+        if eof and count(buffer) <= max_tokens:
+            if buffer.strip():
+                yield buffer.strip()
+            return
+
+        # At least one character, even if a single one is over max_tokens.
+        cut = max(_cut_point(buffer, prefix_length(buffer, max_tokens)), 1)
+        yield buffer[:cut].strip()
+        # Start the next chunk about `overlap_tokens` before the cut, on a word boundary,
+        # but never before the middle of this chunk, so every step makes progress.
+        overlap_chars = cut * overlap_tokens // max(count(buffer[:cut]), 1)
+        start = max(cut - overlap_chars, cut // 2)
+        space = buffer.find(" ", start, cut)
+        buffer = buffer[space + 1 if space != -1 else cut:]
+
+
+def summarize_document(stream, ask, max_tokens=2000, overlap_tokens=200,
+                       fanout=8, concurrency=8, summary_words=150):
+    """Map-reduce summary of an arbitrarily large text stream.
+
+    Chunks are summarized `concurrency` at a time with `ask(prompt) -> str`.
+    Partial summaries are merged `fanout` at a time as soon as enough of
+    them exist, so only O(fanout * levels) summaries are ever kept around.
+    """
+    levels = [[]]
+
+    def reduce(summaries):
+        text = "\n\n".join(f"[{i}] {s}" for i, s in enumerate(summaries, start=1))
+        return ask(REDUCE_PROMPT.format(words=summary_words, text=text)).strip()
+
+    def push(level, summary):
+        if level == len(levels):
+            levels.append([])
+        levels[level].append(summary)
+        if len(levels[level]) == fanout:
+            merged = reduce(levels[level])
+            levels[level] = []
+            push(level + 1, merged)
+
+    chunks = iter_chunks(stream, max_tokens, overlap_tokens)
+    summarize = lambda chunk: ask(CHUNK_PROMPT.format(words=summary_words, text=chunk)).strip()
+    for result in map_threaded(summarize, chunks, concurrency):
+        if not result.ok:
+            raise result.error
+        push(0, result.value)
+
+    # Fold whatever is left over, from the lowest level up, into one summary.
+    carry = []
+    for level in levels:
+        pending = level + carry
+        carry = [reduce(pending)] if len(pending) > 1 else pending
+    return carry[0] if carry else ""
@@ -0,0 +1,238 @@
+"""Offline stand-in for the Gemini API.
+
+Set GEMINI_BACKEND=fake and clients.get_model() returns a FakeGenerativeModel
+and Langchain's get_llm() a FakeChatGemini, so every entry point runs with
+no network or API key. Responses and timing come from the environment or
+from configure():
+
+    GEMINI_FAKE_SCRIPT   JSONL file, one response per line: a string, or
+                         {"text": ...} / {"tool_calls": [{"name", "args"}]}
+    GEMINI_FAKE_MODE     cycle (default) or random, how script entries are picked
+    GEMINI_FAKE_LATENCY  time to first token, e.g. fixed:0.2, uniform:0.1:0.5,
+                         normal:0.3:0.05 or lognormal:0.3:0.6 (median, sigma)
+    GEMINI_FAKE_RATE     output tokens per second after the first (0 = instant)
+    GEMINI_FAKE_PREFILL_RATE   prompt tokens per second added to the time to
+                         first token (0 = prompt size doesn't matter)
+    GEMINI_FAKE_SEED     seed for random picks, latencies and generated text
+    GEMINI_FAKE_ERROR_RATE     fraction of calls failing with a 429
+    GEMINI_FAKE_MAX_INFLIGHT   calls beyond this many at once get a 429
+
+Without a script the reply is a few random words, sized by `words`. From
+code, configure(responder=fn) answers each prompt with fn(prompt) instead.
+"""
+import contextlib
+import itertools
+import json
+import os
+import random
+import threading
+import time
+
+from tokens import count as estimate_tokens
+
+WORDS = ("the model returns a short answer about latency tokens cache prompt stream "
+         "agent tool search result summary quiz question python shell file").split()
+
+
+class FakeAPIError(Exception):
+    """An HTTP error from the fake server; `code` is the status (429 for throttling)."""
+
+    def __init__(self, code, message):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class Latency:
+    """A delay distribution parsed from "kind:arg[:arg]"."""
+
+    def __init__(self, spec="fixed:0", rng=None):
+        self.spec = spec
+        kind, *args = spec.split(":")
+        self.kind = kind
+        self.args = [float(a) for a in args] or [0.0]
+        self.rng = rng or random.Random()
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self):
+        a = self.args
+        if self.kind == "fixed":
+            value = a[0]
+        elif self.kind == "uniform":
+            value = self.rng.uniform(a[0], a[1])
+        elif self.kind == "normal":
+            value = self.rng.gauss(a[0], a[1])
+        else:
+            value = a[0] * self.rng.lognormvariate(0.0, a[1]) if a[0] > 0 else 0.0
+        return max(0.0, value)
+
+
+class FakeBackend:
+    """Picks the next response and paces its delivery."""
+
+    def __init__(self, responses=None, mode="cycle", latency="fixed:0", rate=0.0,
+                 words=40, chunk_chars=24, seed=None, error_rate=0.0, max_inflight=None,
+                 responder=None, prefill_rate=0.0):
+        self.rng = random.Random(seed)
+        self.responses = [self._entry(r) for r in responses] if responses else None
+        self.mode = mode
+        self.responder = responder
+        self.latency = latency if isinstance(latency, Latency) else Latency(latency, self.rng)
+        self.rate = rate
+        self.prefill_rate = prefill_rate
+        self.words = words
+        self.chunk_chars = chunk_chars
+        self.lock = threading.Lock()
+        self._cycle = itertools.cycle(self.responses) if self.responses else None
+        self.calls = 0
+        self.error_rate = error_rate
+        self.max_inflight = max_inflight
+        self.inflight = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls):
+        responses = None
+        path = os.getenv("GEMINI_FAKE_SCRIPT")
+        if path:
+            with open(path, encoding="utf-8") as f:
+                responses = [json.loads(line) for line in f if line.strip()]
+        seed = os.getenv("GEMINI_FAKE_SEED")
+        max_inflight = os.getenv("GEMINI_FAKE_MAX_INFLIGHT")
+        return cls(responses,
+                   mode=os.getenv("GEMINI_FAKE_MODE", "cycle"),
+                   latency=os.getenv("GEMINI_FAKE_LATENCY", "fixed:0"),
+                   rate=float(os.getenv("GEMINI_FAKE_RATE", "0")),
+                   prefill_rate=float(os.getenv("GEMINI_FAKE_PREFILL_RATE", "0")),
+                   seed=int(seed) if seed else None,
+                   error_rate=float(os.getenv("GEMINI_FAKE_ERROR_RATE", "0")),
+                   max_inflight=int(max_inflight) if max_inflight else None)
+
+    @staticmethod
+    def _entry(response):
+        return {"text": response} if isinstance(response, str) else dict(response)
+
+    def next(self, prompt=""):
+        """The next response entry: {"text": str, "tool_calls": [...]}."""
+        if self.responder is not None:
+            with self.lock:
+                self.calls += 1
+            return self._entry(self.responder(prompt))
+        with self.lock:
+            self.calls += 1
+            if self.responses is None:
+                return {"text": " ".join(self.rng.choice(WORDS) for _ in range(self.words))}
+            if self.mode == "random":
+                return dict(self.rng.choice(self.responses))
+            return dict(next(self._cycle))
+
+    @contextlib.contextmanager
+    def admit(self):
+        """Hold a server slot for one call, or raise a 429 like an overloaded API."""
+        with self.lock:
+            throttled = (self.max_inflight is not None and self.inflight >= self.max_inflight) or \
+                (self.error_rate and self.rng.random() < self.error_rate)
+            if throttled:
+                self.rejected += 1
+            else:
+                self.inflight += 1
+        if throttled:
+            time.sleep(self.latency.sample() / 10)  # rejections come back fast
+            raise FakeAPIError(429, "Resource has been exhausted (e.g. check quota).")
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.inflight -= 1
+
+    def wait_first(self, prompt_tokens=0):
+        prefill = prompt_tokens / self.prefill_rate if self.prefill_rate else 0.0
+        time.sleep(self.latency.sample() + prefill)
+
+    def chunks(self, text):
+        """Split `text` into streaming chunks, sleeping between them at `rate` tokens/s."""
+        for i in range(0, len(text), self.chunk_chars) or [0]:
+            piece = text[i:i + self.chunk_chars]
+            if i and self.rate:
+                time.sleep(estimate_tokens(piece) / self.rate)
+            yield piece
+
+    def generation_time(self, text):
+        return estimate_tokens(text) / self.rate if self.rate else 0.0
+
+
+_lock = threading.Lock()
+_backend = None
+
+
+def backend():
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                _backend = FakeBackend.from_env()
+    return _backend
+
+
+def configure(*args, **kwargs):
+    """Replace the shared backend (same arguments as FakeBackend)."""
+    global _backend
+    with _lock:
+        _backend = FakeBackend(*args, **kwargs)
+    return _backend
+
+
+# --- google.generativeai look-alike ---
+class UsageMetadata:
+    def __init__(self, prompt_tokens, candidates_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = candidates_tokens
+        self.total_token_count = prompt_tokens + candidates_tokens
+
+
+class TokenCount:
+    def __init__(self, prompt):
+        self.total_tokens = estimate_tokens(prompt)
+
+
+class FakeResponse:
+    def __init__(self, text, prompt_tokens=0, candidates_tokens=None):
+        self.text = text
+        if candidates_tokens is None:
+            candidates_tokens = estimate_tokens(text)
+        self.usage_metadata = UsageMetadata(prompt_tokens, candidates_tokens)
+
+
+class FakeGenerativeModel:
+    """Drop-in for genai.GenerativeModel: generate_content(prompt, stream=False)."""
+
+    def __init__(self, model_name="gemini-1.5-flash", generation_config=None):
+        self.model_name = model_name
+        self.generation_config = generation_config
+
+    def count_tokens(self, prompt):
+        prompt = prompt if isinstance(prompt, str) else json.dumps(prompt, default=str)
+        return TokenCount(prompt)
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        fake = backend()
+        prompt = prompt if isinstance(prompt, str) else json.dumps(prompt, default=str)
+        if stream:
+            return self._stream(fake, prompt)
+        with fake.admit():
+            text = fake.next(prompt).get("text", "")
+            prompt_tokens = estimate_tokens(prompt)
+            fake.wait_first(prompt_tokens)
+            time.sleep(fake.generation_time(text))
+        return FakeResponse(text, prompt_tokens)
+
+    @staticmethod
+    def _stream(fake, prompt):
+        with fake.admit():
+            text = fake.next(prompt).get("text", "")
+            prompt_tokens, total, sent = estimate_tokens(prompt), estimate_tokens(text), 0
+            fake.wait_first(prompt_tokens)
+            for piece in fake.chunks(text):
+                sent += len(piece)
+                # Like the API, a chunk's usage counts everything generated so far.
+                yield FakeResponse(piece, prompt_tokens, total * sent // max(len(text), 1))
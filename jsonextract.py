@@ -0,0 +1,176 @@
+import json
+import re
+
+
+def _loads(text):
+    """Parse a repaired fragment, with orjson when it is installed."""
+    try:
+        import orjson
+    except ImportError:
+        return json.loads(text)
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError as e:
+        raise json.JSONDecodeError(str(e), text, 0) from None
+
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+# A complete string literal, a bracket, or a quote that is never closed.
+_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]]|"')
+_OPEN = re.compile(r"[{\[]")
+# What can follow an opener in valid JSON. Anything else is prose, and skipping the
+# decoder for it matters: each JSONDecodeError counts the lines before its position.
+_VALUE_START = re.compile(r'\{\s*["}]|\[\s*(?:[]{\["\-0-9]|true|false|null)')
+_decoder = json.JSONDecoder()
+
+
+def _scan(text, start):
+    """Find the end of the JSON value opening at text[start].
+
+    Only used when the fast path fails. Jumps from bracket to bracket with a
+    compiled regex (string literals are skipped whole) rather than walking
+    every character. Returns (end, closers, opened): `end` is the index just past the matching
+    bracket, or None if the text ran out first, in which case `closers` is
+    the stack of brackets still open (used for repair) and `opened` the
+    positions of the brackets on it.
+    """
+    closers = []
+    opened = []
+    for match in _TOKEN.finditer(text, start):
+        token = match.group()
+        if token == '"':
+            closers.append('"')
+            return None, closers, opened
+        if token[0] == '"':
+            continue
+        if token in _CLOSERS:
+            closers.append(_CLOSERS[token])
+            opened.append(match.start())
+        elif not closers or closers.pop() != token:
+            return match.end(), None, None
+        else:
+            opened.pop()
+            if not closers:
+                return match.end(), None, None
+    return None, closers, opened
+
+
+def repair(fragment, closers):
+    """Best-effort close of a truncated JSON fragment so it can be parsed.
+
+    Closes an open string, drops a dangling comma, colon or object key at the
+    cut, then closes the open arrays and objects in the right order.
+    """
+    if closers and closers[-1] == '"':
+        fragment += '"'
+        closers = closers[:-1]
+    while True:
+        trimmed = fragment.rstrip().rstrip(",")
+        if trimmed.endswith(":"):
+            trimmed = trimmed[:-1].rstrip()
+        # In an object, a string preceded by "{" or "," is a key with no value.
+        if closers and closers[-1] == "}" and trimmed.endswith('"'):
+            key_start = trimmed.rfind('"', 0, len(trimmed) - 1)
+            before = trimmed[:key_start].rstrip()
+            if before.endswith(("{", ",")):
+                trimmed = before
+        if trimmed == fragment:
+            break
+        fragment = trimmed
+    return fragment + "".join(reversed(closers))
+
+
+def _repair_at(text, start, closers):
+    """The repaired value of the truncated text[start:], or None if it does not parse."""
+    if closers is None:
+        return None
+    try:
+        return _loads(repair(text[start:], closers))
+    except json.JSONDecodeError:
+        return None
+
+
+def iter_json(text, repair_truncated=False):
+    """Yield every JSON object or array found in `text`, in one pass.
+
+    Works on fenced blocks (```json ... ```), bare JSON and JSON mixed with
+    prose. A bracketed span that is not valid JSON is skipped as a whole,
+    which keeps the scan linear. An opener that is never closed (a stray
+    "{" in prose) is skipped on its own, so the values after it are still
+    found. With `repair_truncated`, the first opener that starts like a
+    JSON value but runs to the end of the text is taken as a truncated
+    value: the complete values found inside it (e.g. the finished questions
+    of a cut-off quiz) are held back, and the repaired value is yielded in
+    their place. Prose after the cut is dropped; if the value still cannot
+    be repaired, the values inside it are yielded instead.
+    """
+    i = 0
+    truncated = None
+    inside = []  # values found after `truncated` started, held back until it is repaired
+    inside_ends = []
+    unclosed = {}  # opener position -> (closers, k) for openers known to run to the end
+    while True:
+        match = _OPEN.search(text, i)
+        if match is None:
+            break
+        start = match.start()
+        # Fast path: the C decoder parses the value and tells us where it ends.
+        value = end = None
+        if _VALUE_START.match(text, start):
+            try:
+                value, end = _decoder.raw_decode(text, start)
+            except json.JSONDecodeError:
+                pass
+        if end is not None:
+            if repair_truncated and truncated is not None:
+                inside.append(value)
+                inside_ends.append(end)
+            else:
+                yield value
+            i = end
+            continue
+
+        if start in unclosed:
+            end, (closers, k) = None, unclosed[start]
+        else:
+            end, closers, opened = _scan(text, start)
+            k = 0
+            if end is None:
+                # Every bracket still open at the end is unclosed too; never rescan them.
+                for j, position in enumerate(opened):
+                    unclosed[position] = closers, j
+        if end is None:
+            # Runs to the end of the text: a truncated value, or a stray opener in prose.
+            if truncated is None and _VALUE_START.match(text, start):
+                truncated = start, closers[k:]
+            i = start + 1
+            continue
+        # Balanced brackets but not JSON (e.g. "[see above]"): skip the span.
+        i = end
+
+    if repair_truncated and truncated is not None:
+        start, closers = truncated
+        value = _repair_at(text, start, closers)
+        # Prose after the cut: retry from just past one of the last complete values inside it.
+        for cut in reversed(inside_ends[-3:]):
+            if value is not None:
+                break
+            _, closers, _ = _scan(text[:cut], start)
+            value = _repair_at(text[:cut], start, closers)
+        if value is None:
+            yield from inside
+        else:
+            yield value
+
+
+def extract_json(text, repair_truncated=False):
+    """Return all JSON objects and arrays in `text` as a list."""
+    return list(iter_json(text, repair_truncated))
+
+
+def first_json(text, repair_truncated=False):
+    """Return the first JSON object or array in `text`; raise ValueError if there is none."""
+    for value in iter_json(text, repair_truncated):
+        return value
+    raise ValueError("No JSON found in text")
@@ -0,0 +1,91 @@
+import json
+
+
+class QuizStreamParser:
+    """Incrementally parse a streamed {"summary": ..., "quiz": [...]} response.
+
+    Feed it text chunks as they arrive. It scans each character once and
+    returns events as soon as they are complete:
+
+        ("summary", "<summary text>")
+        ("question", {"question": ..., "options": [...], "answer_index": ...})
+
+    Anything before the first "{" (such as a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.start = None
+        self.end = None
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.expect_key = True
+        self.key = None
+        self.item_start = None
+
+    @property
+    def done(self):
+        return self.end is not None
+
+    def feed(self, chunk):
+        """Consume `chunk` and return the list of events it completed."""
+        self.buffer += chunk
+        events = []
+        buf = self.buffer
+        i = self.pos
+        n = len(buf)
+        while i < n and not self.done:
+            c = buf[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    self._string_closed(i, events)
+            elif self.start is None:
+                if c == "{":
+                    self.start = i
+                    self.depth = 1
+            elif c == '"':
+                self.in_string = True
+                self.string_start = i
+            elif c in "{[":
+                self.depth += 1
+                if self.depth == 3 and c == "{" and self.key == "quiz":
+                    self.item_start = i
+            elif c in "}]":
+                self.depth -= 1
+                if self.depth == 2 and c == "}" and self.key == "quiz" and self.item_start is not None:
+                    events.append(("question", json.loads(buf[self.item_start:i + 1])))
+                    self.item_start = None
+                elif self.depth == 0:
+                    self.end = i + 1
+            elif self.depth == 1:
+                if c == ":":
+                    self.expect_key = False
+                elif c == ",":
+                    self.expect_key = True
+                    self.key = None
+            i += 1
+        self.pos = i
+        return events
+
+    def _string_closed(self, i, events):
+        if self.depth != 1:
+            return
+        text = json.loads(self.buffer[self.string_start:i + 1])
+        if self.expect_key:
+            self.key = text
+        elif self.key == "summary":
+            events.append(("summary", text))
+
+    def result(self):
+        """Return the whole parsed object once the stream has finished."""
+        if not self.done:
+            raise ValueError("Stream ended before the JSON object was complete")
+        return json.loads(self.buffer[self.start:self.end])
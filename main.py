@@ -1,19 +1,44 @@
-import os
-from dotenv import load_dotenv
-import google.generativeai as genai
-from test import askGemini
 import argparse
 
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("API key not found")
-
-genai.configure(api_key=api_key)
-
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('prompt', nargs='*', help='Prompt to send to Gemini')
+    parser.add_argument('--no-cache', action='store_true', help='Skip the response cache (GEMINI_CACHE)')
+    parser.add_argument('--batch', metavar='FILE', help='Send every line of FILE as its own prompt')
+    parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight with --batch')
+    parser.add_argument('--semantic-cache', metavar='PATH', help='Answer near-duplicate single prompts from a semantic cache at PATH (needs numpy; matches by meaning with sentence-transformers if installed)')
+    parser.add_argument('--threshold', type=float, default=0.9, help='Cosine similarity needed for a semantic cache hit')
+    parser.add_argument('--stream', action='store_true', help='Print the answer as it is generated; timing goes to stderr')
     args = parser.parse_args()
-    prompt = " ".join(args.prompt) if args.prompt else input("Enter your prompt: ")
-    print(askGemini(prompt))
\ No newline at end of file
+
+    # Imported after argument parsing so --help never touches the Gemini SDK
+    from test import askGemini, askGemini_many_sync, askGemini_stream
+
+    semcache = None
+    if args.semantic_cache and not args.no_cache:
+        from semcache import SemanticCache
+        semcache = SemanticCache(args.semantic_cache, threshold=args.threshold)
+
+    if args.batch:
+        with open(args.batch, encoding="utf-8") as f:
+            prompts = (line.strip() for line in f if line.strip())
+            for result in askGemini_many_sync(prompts, args.concurrency, bypass_cache=args.no_cache):
+                if result.ok:
+                    print(result.value)
+                else:
+                    print(f"[{result.index}] error: {result.error}")
+    else:
+        prompt = " ".join(args.prompt) if args.prompt else input("Enter your prompt: ")
+        answer = semcache.lookup(prompt)[0] if semcache else None
+        if answer is not None:
+            print(answer)
+        else:
+            if args.stream:
+                from streaming import stream_to
+                answer, _ = stream_to(askGemini_stream(prompt, bypass_cache=args.no_cache))
+            else:
+                answer = askGemini(prompt, bypass_cache=args.no_cache)
+                print(answer)
+            if semcache:
+                semcache.add(prompt, answer)
+                semcache.save()
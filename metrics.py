@@ -0,0 +1,259 @@
+"""Counters and latency histograms for every model and tool call.
+
+askGemini/askGemini_stream, the LangChain clients from llm.get_llm and
+tools run with MetricsHandler all record here, labelled by model (or
+tool) and entry point. The entry point is the running script unless
+code sets one with `with metrics.entry_point("name"):`. Output is opt-in:
+
+    METRICS_SUMMARY=1       print a table of calls, tokens and latency on exit
+    METRICS_PROM=PATH       write Prometheus text exposition format on exit
+    METRICS_JSONL=PATH      append one JSON line per call as it finishes
+
+quizserver.py also serves the Prometheus text at GET /metrics.
+"""
+import atexit
+import bisect
+import contextlib
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# Seconds; the same shape as Prometheus' default buckets, stretched for LLM calls.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_entry = contextvars.ContextVar("metrics_entry", default=None)
+
+
+def current_entry():
+    name = _entry.get()
+    if name is None:
+        name = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "python"
+    return name
+
+
+@contextlib.contextmanager
+def entry_point(name):
+    """Attribute calls made inside the block to `name` instead of the script."""
+    token = _entry.set(name)
+    try:
+        yield
+    finally:
+        _entry.reset(token)
+
+
+class Histogram:
+    """Bucket counts for export, plus the latest samples for exact percentiles in the summary."""
+
+    __slots__ = ("counts", "sum", "count", "recent")
+
+    def __init__(self, keep=1024):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=keep)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantile(self, q):
+        samples = sorted(self.recent)
+        return samples[min(len(samples) - 1, int(len(samples) * q))] if samples else 0.0
+
+
+class Registry:
+    """Per-series counters and histograms behind one lock.
+
+    A series is (kind, name, entry): kind is "model" or "tool", name the
+    model or tool name. Each series counts calls, errors, cache hits,
+    retries and prompt/completion tokens, and keeps a latency histogram.
+    """
+
+    COUNTERS = ("calls", "errors", "cached", "retries", "prompt_tokens", "completion_tokens")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}
+        self.sink = None
+        self.sink_path = None
+
+    def record(self, kind, name, entry=None, seconds=None, error=False, cached=False,
+               retries=0, prompt_tokens=0, completion_tokens=0):
+        entry = entry or current_entry()
+        with self.lock:
+            series = self.series.get((kind, name, entry))
+            if series is None:
+                series = self.series[(kind, name, entry)] = (dict.fromkeys(self.COUNTERS, 0), Histogram())
+            counts, latency = series
+            counts["calls"] += 1
+            counts["errors"] += bool(error)
+            counts["cached"] += bool(cached)
+            counts["retries"] += retries
+            counts["prompt_tokens"] += prompt_tokens or 0
+            counts["completion_tokens"] += completion_tokens or 0
+            if seconds is not None and not cached:
+                latency.observe(seconds)
+            if self.sink is not None:
+                self.sink.write(json.dumps({
+                    "ts": time.time(), "kind": kind, "name": name, "entry": entry,
+                    "seconds": seconds, "error": error, "cached": cached, "retries": retries,
+                    "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                }) + "\n")
+
+    def open_sink(self, path):
+        with self.lock:
+            self.sink = open(path, "a", encoding="utf-8", buffering=1)
+            self.sink_path = path
+        atexit.register(self.close_sink)
+
+    def close_sink(self):
+        with self.lock:
+            if self.sink is not None:
+                self.sink.close()
+                self.sink = None
+
+    def snapshot(self):
+        with self.lock:
+            return {key: (dict(counts), latency) for key, (counts, latency) in self.series.items()}
+
+    def reset(self):
+        with self.lock:
+            self.series.clear()
+
+    # --- export ---
+    def prometheus(self):
+        """All series in the Prometheus text exposition format."""
+        lines = []
+        snapshot = sorted(self.snapshot().items())
+        for counter in self.COUNTERS:
+            metric = f"gemini_{counter}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (kind, name, entry), (counts, _) in snapshot:
+                lines.append(f'{metric}{{kind="{kind}",name="{_escape(name)}",entry="{_escape(entry)}"}} '
+                             f"{counts[counter]}")
+        lines.append("# TYPE gemini_call_seconds histogram")
+        for (kind, name, entry), (_, latency) in snapshot:
+            labels = f'kind="{kind}",name="{_escape(name)}",entry="{_escape(entry)}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS + ("+Inf",), latency.counts):
+                cumulative += n
+                lines.append(f'gemini_call_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"gemini_call_seconds_sum{{{labels}}} {latency.sum:.6f}")
+            lines.append(f"gemini_call_seconds_count{{{labels}}} {latency.count}")
+        return "\n".join(lines) + "\n"
+
+    def table(self):
+        """A plain-text summary table, busiest series first."""
+        rows = sorted(self.snapshot().items(), key=lambda item: -item[1][0]["calls"])
+        if not rows:
+            return "no model or tool calls recorded"
+        header = (f"{'kind':<6}{'name':<28}{'entry':<20}{'calls':>7}{'errors':>7}{'cached':>7}"
+                  f"{'retries':>8}{'prompt tok':>11}{'compl tok':>10}{'p50 ms':>9}{'p99 ms':>9}")
+        lines = [header, "-" * len(header)]
+        for (kind, name, entry), (c, latency) in rows:
+            lines.append(f"{kind:<6}{name[:27]:<28}{entry[:19]:<20}{c['calls']:>7}{c['errors']:>7}"
+                         f"{c['cached']:>7}{c['retries']:>8}{c['prompt_tokens']:>11}"
+                         f"{c['completion_tokens']:>10}{latency.quantile(0.5) * 1e3:>9.1f}"
+                         f"{latency.quantile(0.99) * 1e3:>9.1f}")
+        return "\n".join(lines)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+
+
+class ModelCall:
+    """Measures one model call; see model_call()."""
+
+    def __init__(self, model, entry):
+        self.model = model
+        self.entry = entry or current_entry()
+        self.attempts = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def attempt(self, fn):
+        """Wrap `fn` (what the Scheduler calls) so each retry is counted."""
+        def counted():
+            self.attempts += 1
+            return fn()
+        return counted
+
+    def usage(self, prompt_tokens=0, completion_tokens=0):
+        self.prompt_tokens = prompt_tokens or 0
+        self.completion_tokens = completion_tokens or 0
+
+
+@contextlib.contextmanager
+def model_call(model, entry=None):
+    """Time the block as one call to `model`, recording errors, retries and token usage.
+
+        with metrics.model_call(model_name) as call:
+            response = scheduler.call(call.attempt(lambda: ...))
+            call.usage(prompt_tokens, completion_tokens)
+    """
+    _init()
+    call = ModelCall(model, entry)
+    start = time.perf_counter()
+    error = False
+    try:
+        yield call
+    except Exception:
+        error = True
+        raise
+    finally:
+        registry.record("model", model, call.entry, time.perf_counter() - start, error=error,
+                        retries=max(0, call.attempts - 1), prompt_tokens=call.prompt_tokens,
+                        completion_tokens=call.completion_tokens)
+
+
+def record_cached(model, entry=None):
+    """Count a call answered from a cache without reaching the model."""
+    _init()
+    registry.record("model", model, entry, cached=True)
+
+
+def record_tool(name, seconds, error=False, entry=None):
+    _init()
+    registry.record("tool", name, entry, seconds, error=error)
+
+
+# --- exporters configured from the environment ---
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def _init():
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        _initialized = True
+        _start_exporters()
+
+
+def _start_exporters():
+    if os.getenv("METRICS_JSONL"):
+        registry.open_sink(os.environ["METRICS_JSONL"])
+    if os.getenv("METRICS_PROM") or os.getenv("METRICS_SUMMARY"):
+        atexit.register(_on_exit)
+
+
+def _on_exit():
+    path = os.getenv("METRICS_PROM")
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(registry.prometheus())
+    if os.getenv("METRICS_SUMMARY", "") not in ("", "0"):
+        print("\n" + registry.table(), file=sys.stderr)
@@ -0,0 +1,231 @@
+"""HTTP service for summary/quiz generation with request micro-batching.
+
+    python summary.py --serve 127.0.0.1:8080 --batch-window-ms 25
+
+    POST /quiz        {"text": "..."}            -> {"summary": ..., "quiz": [...]}
+    POST /quiz/batch  {"texts": ["...", ...]}    -> {"results": [{...} | {"error": ...}]}
+    GET  /stats                                  -> batching counters
+    GET  /metrics                                -> model call metrics, Prometheus text
+
+Requests that arrive within the batch window are combined into one
+multi-text prompt (summary.build_batch_prompt) up to a token budget, so
+the long instructions are sent once per batch instead of once per text.
+Texts the combined reply doesn't cover fall back to their own call.
+Standard library only: asyncio streams and a small HTTP/1.1 parser with
+keep-alive.
+"""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tokens import count as count_tokens
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+MAX_BODY = 16 * 1024 * 1024
+# Tokens the batch instructions and JSON framing cost on top of the texts.
+PROMPT_OVERHEAD = 200
+RESULT_TOKENS = 250
+
+
+class MicroBatcher:
+    """Collect texts for up to `window` seconds into batches sent as one request.
+
+    A batch closes when the window ends, when `max_batch` texts are in it,
+    or when the next text would take the prompt past `max_tokens`. That
+    text then starts the next batch. Up to `workers` batches are processed
+    at once on a thread pool, since askGemini blocks.
+    """
+
+    def __init__(self, window=0.02, max_tokens=8000, max_batch=16, workers=8, bypass_cache=False):
+        self.window = window
+        self.max_tokens = max_tokens
+        self.max_batch = max_batch
+        self.bypass_cache = bypass_cache
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quizbatch")
+        self.slots = asyncio.Semaphore(workers)
+        # The loop only keeps weak references to tasks, so batches in flight are held here.
+        self.tasks = set()
+        self.stats = {"requests": 0, "batches": 0, "llm_texts": 0, "fallbacks": 0, "errors": 0}
+
+    @staticmethod
+    def cost(text):
+        return count_tokens(text) + RESULT_TOKENS
+
+    async def submit(self, text):
+        future = asyncio.get_running_loop().create_future()
+        self.stats["requests"] += 1
+        await self.queue.put((text, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        carry = None
+        while True:
+            first = carry or await self.queue.get()
+            carry = None
+            batch = [first]
+            tokens = PROMPT_OVERHEAD + self.cost(first[0])
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if tokens + self.cost(item[0]) > self.max_tokens:
+                    carry = item
+                    break
+                batch.append(item)
+                tokens += self.cost(item[0])
+            await self.slots.acquire()
+            task = asyncio.create_task(self._process(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    def _count(self, name, amount=1):
+        self.stats[name] += amount
+
+    async def _process(self, batch):
+        from summary import summarize_and_quiz_batch
+
+        texts = [text for text, _ in batch]
+        loop = asyncio.get_running_loop()
+
+        def fell_back(count):  # called on a worker thread
+            loop.call_soon_threadsafe(self._count, "fallbacks", count)
+
+        try:
+            results = await loop.run_in_executor(
+                self.executor, summarize_and_quiz_batch, texts, self.bypass_cache, 8, fell_back)
+        except Exception as e:
+            results = None
+            error = e
+        finally:
+            self.slots.release()
+        self.stats["batches"] += 1
+        self.stats["llm_texts"] += len(texts)
+        for i, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if results is None:
+                self.stats["errors"] += 1
+                future.set_exception(error)
+            elif results[i].ok:
+                future.set_result(results[i].value)
+            else:
+                self.stats["errors"] += 1
+                future.set_exception(results[i].error)
+
+
+class QuizServer:
+    def __init__(self, batcher):
+        self.batcher = batcher
+        self.started = time.time()
+
+    async def route(self, method, path, body):
+        if path == "/metrics":
+            import metrics
+            return 200, metrics.registry.prometheus()
+        if path == "/stats":
+            stats = dict(self.batcher.stats)
+            stats["texts_per_batch"] = stats["llm_texts"] / stats["batches"] if stats["batches"] else 0.0
+            stats["uptime_s"] = round(time.time() - self.started, 1)
+            return 200, stats
+        if path not in ("/quiz", "/quiz/batch"):
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        try:
+            data = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            return 400, {"error": f"invalid JSON: {e}"}
+
+        if path == "/quiz":
+            text = data.get("text") if isinstance(data, dict) else None
+            if not isinstance(text, str) or not text.strip():
+                return 400, {"error": 'expected {"text": "..."}'}
+            try:
+                return 200, await self.batcher.submit(text)
+            except Exception as e:
+                return 500, {"error": str(e)}
+
+        texts = data.get("texts") if isinstance(data, dict) else None
+        if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+            return 400, {"error": 'expected {"texts": ["...", ...]}'}
+        outcomes = await asyncio.gather(*(self.batcher.submit(t) for t in texts), return_exceptions=True)
+        return 200, {"results": [{"error": str(o)} if isinstance(o, Exception) else o for o in outcomes]}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, path, _ = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "bad request line"}, close=True)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length") or 0)
+                    if length < 0:
+                        raise ValueError
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "bad Content-Length"}, close=True)
+                    break
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, {"error": "body too large"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self.route(method.upper(), path.split("?")[0], body)
+                close = headers.get("connection", "").lower() == "close"
+                await self.respond(writer, status, payload, close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def respond(writer, status, payload, close=False):
+        if isinstance(payload, str):
+            data, content_type = payload.encode(), "text/plain; version=0.0.4"
+        else:
+            data, content_type = json.dumps(payload, ensure_ascii=False).encode(), "application/json"
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(data)}\r\nConnection: {'close' if close else 'keep-alive'}\r\n\r\n")
+        writer.write(head.encode() + data)
+        await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=8080, ready=None, **batch_options):
+    """Run the server until cancelled; `ready(port)` is called once it is listening."""
+    batcher = MicroBatcher(**batch_options)
+    server = QuizServer(batcher)
+    listener = await asyncio.start_server(server.handle, host, port)
+    batching = asyncio.create_task(batcher.run())
+    port = listener.sockets[0].getsockname()[1]
+    if ready is not None:
+        ready(port)
+    else:
+        print(f"Quiz server listening on http://{host}:{port} "
+              "(POST /quiz, POST /quiz/batch, GET /stats, GET /metrics)")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        batching.cancel()
+        batcher.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,256 @@
+"""Local store of generated summaries and quizzes, so material can be re-quizzed for free.
+
+    QUIZ_STORE=quizzes.db python summary.py "some text"    # saved after generation
+    python summary.py --store quizzes.db --search photosynthesis
+    python summary.py --store quizzes.db --replay 3
+    python quizstore.py quizzes.db export - | gzip > quizzes.jsonl.gz
+    zcat quizzes.jsonl.gz | python quizstore.py other.db import -
+
+Results are keyed by a SHA-256 of the whitespace-normalized source text,
+so the same material is stored once. The source is kept zlib-compressed.
+A contentless FTS5 index covers the source, summary and question text
+without storing a second copy of it.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+
+IMPORT_BATCH = 500
+
+
+def content_hash(text):
+    """Hash of `text` with runs of whitespace collapsed, so reformatting doesn't split entries."""
+    normalized = re.sub(r"\s+", " ", text).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _questions(quiz):
+    return "\n".join(f"{q.get('question', '')} {' '.join(map(str, q.get('options', ())))}"
+                     for q in quiz if isinstance(q, dict))
+
+
+def _fts_query(query):
+    """Quote each word so user input can't trip FTS5 query syntax; words are ANDed."""
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{w}"' for w in words)
+
+
+class QuizStore:
+    """SQLite-backed {summary, quiz} store with full-text search.
+
+    Like ResponseCache, each thread and process opens its own WAL-mode
+    connection, so the store can be shared by the quiz server's workers.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS quizzes (
+                id INTEGER PRIMARY KEY,
+                hash TEXT NOT NULL UNIQUE,
+                source BLOB NOT NULL,
+                summary TEXT NOT NULL,
+                quiz TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS quizzes_fts "
+            "USING fts5(source, summary, questions, content='')"
+        )
+
+    # --- writing ---
+    def _insert(self, conn, text, result, digest=None, created_at=None):
+        digest = digest or content_hash(text)
+        quiz = result["quiz"]
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO quizzes (hash, source, summary, quiz, created_at) VALUES (?, ?, ?, ?, ?)",
+            (digest, zlib.compress(text.encode("utf-8")), result["summary"],
+             json.dumps(quiz, ensure_ascii=False, separators=(",", ":")), created_at or time.time()),
+        )
+        if not cursor.rowcount:
+            return None
+        conn.execute(
+            "INSERT INTO quizzes_fts (rowid, source, summary, questions) VALUES (?, ?, ?, ?)",
+            (cursor.lastrowid, text, result["summary"], _questions(quiz)),
+        )
+        return cursor.lastrowid
+
+    def add(self, text, result):
+        """Store `result` for `text`; returns the new id, or None if the text was already stored."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row_id = self._insert(conn, text, result)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row_id
+
+    # --- reading ---
+    @staticmethod
+    def _row(row, with_source=False):
+        entry = {"id": row[0], "hash": row[1], "summary": row[2], "quiz": json.loads(row[3]),
+                 "created_at": row[4]}
+        if with_source:
+            entry["source"] = zlib.decompress(row[5]).decode("utf-8")
+        return entry
+
+    _COLUMNS = "id, hash, summary, quiz, created_at, source"
+
+    def get(self, text):
+        """The stored entry for `text` (by content hash), or None."""
+        return self.get_by_hash(content_hash(text))
+
+    def get_by_hash(self, digest):
+        row = self._connect().execute(
+            f"SELECT {self._COLUMNS} FROM quizzes WHERE hash = ?", (digest,)).fetchone()
+        return self._row(row) if row else None
+
+    def find(self, ref):
+        """Look up an entry by id, or by a hash prefix of at least 6 characters."""
+        conn = self._connect()
+        if str(ref).isdigit():
+            row = conn.execute(f"SELECT {self._COLUMNS} FROM quizzes WHERE id = ?", (int(ref),)).fetchone()
+        elif len(ref) >= 6:
+            # hash is UNIQUE, so this range scan uses its index.
+            row = conn.execute(f"SELECT {self._COLUMNS} FROM quizzes WHERE hash >= ? AND hash < ? LIMIT 1",
+                               (ref.lower(), ref.lower() + "g")).fetchone()
+        else:
+            row = None
+        return self._row(row) if row else None
+
+    def latest(self):
+        row = self._connect().execute(
+            f"SELECT {self._COLUMNS} FROM quizzes ORDER BY id DESC LIMIT 1").fetchone()
+        return self._row(row) if row else None
+
+    def search(self, query, limit=10):
+        """Best matches for `query` over source, summary and questions, best first."""
+        match = _fts_query(query)
+        if not match:
+            return []
+        rows = self._connect().execute(
+            """
+            SELECT q.id, q.hash, q.summary, q.quiz, q.created_at, q.source
+            FROM (SELECT rowid, rank FROM quizzes_fts WHERE quizzes_fts MATCH ? ORDER BY rank LIMIT ?) AS m
+            JOIN quizzes AS q ON q.id = m.rowid
+            ORDER BY m.rank
+            """,
+            (match, limit),
+        ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM quizzes").fetchone()[0]
+
+    def stats(self):
+        count, size = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(source) + LENGTH(summary) + LENGTH(quiz)), 0) FROM quizzes"
+        ).fetchone()
+        files = [self.path, self.path + "-wal"]
+        return {"entries": count, "bytes": size,
+                "file_bytes": sum(os.path.getsize(f) for f in files if os.path.exists(f))}
+
+    # --- bulk JSONL ---
+    def export_jsonl(self, out):
+        """Write every entry as one JSON line, oldest first; returns the count.
+
+        Rows are read from a cursor as they are written, so memory use does
+        not grow with the store.
+        """
+        count = 0
+        for row in self._connect().execute(f"SELECT {self._COLUMNS} FROM quizzes ORDER BY id"):
+            entry = self._row(row, with_source=True)
+            del entry["id"]
+            out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            count += 1
+        return count
+
+    def import_jsonl(self, lines):
+        """Add entries from JSON lines (as written by export_jsonl); returns (added, skipped).
+
+        Lines are consumed one at a time and committed every IMPORT_BATCH
+        entries. Entries already in the store, by hash, are skipped.
+        """
+        conn = self._connect()
+        added = skipped = pending = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for line in lines:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                text = entry["source"]
+                if self._insert(conn, text, entry, content_hash(text), entry.get("created_at")) is None:
+                    skipped += 1
+                else:
+                    added += 1
+                pending += 1
+                if pending >= IMPORT_BATCH:
+                    conn.execute("COMMIT")
+                    conn.execute("BEGIN IMMEDIATE")
+                    pending = 0
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return added, skipped
+
+
+def get_store(path=None):
+    """The store at `path`, or at QUIZ_STORE; None if neither is set."""
+    path = path or os.getenv("QUIZ_STORE")
+    return QuizStore(path) if path else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import, export or inspect a quiz store")
+    parser.add_argument("store", help="SQLite file")
+    parser.add_argument("command", choices=["import", "export", "stats"])
+    parser.add_argument("file", nargs="?", default="-", help="JSONL file for import/export, '-' for stdin/stdout")
+    args = parser.parse_args()
+
+    store = QuizStore(args.store)
+    if args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+    elif args.command == "export":
+        if args.file == "-":
+            count = store.export_jsonl(sys.stdout)
+        else:
+            with open(args.file, "w", encoding="utf-8") as f:
+                count = store.export_jsonl(f)
+        print(f"exported {count} entries", file=sys.stderr)
+    else:
+        if args.file == "-":
+            added, skipped = store.import_jsonl(sys.stdin)
+        else:
+            with open(args.file, encoding="utf-8") as f:
+                added, skipped = store.import_jsonl(f)
+        print(f"imported {added} entries, {skipped} already stored", file=sys.stderr)
@@ -0,0 +1,279 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+
+TRANSIENT_CODES = {408, 500, 502, 503, 504}
+
+
+def _chain(error):
+    """The error and everything it was raised from (SDK wrappers hide the HTTP error)."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def _status(error):
+    for e in _chain(error):
+        for attr in ("code", "status_code"):
+            code = getattr(e, attr, None)
+            code = getattr(code, "value", code)  # HTTPStatus / grpc enums
+            if isinstance(code, int) and 100 <= code < 600:
+                return code
+    return None
+
+
+def is_throttled(error):
+    """True for 429 / RESOURCE_EXHAUSTED responses."""
+    if _status(error) == 429:
+        return True
+    return any(name in type(e).__name__ for e in _chain(error)
+               for name in ("RateLimit", "ResourceExhausted", "TooManyRequests"))
+
+
+def is_transient(error):
+    """True for errors worth retrying: throttling, 5xx, timeouts and dropped connections."""
+    if is_throttled(error) or _status(error) in TRANSIENT_CODES:
+        return True
+    return any(isinstance(e, (ConnectionError, TimeoutError)) or
+               type(e).__name__ in ("ServiceUnavailable", "InternalServerError", "DeadlineExceeded")
+               for e in _chain(error))
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request could not be sent or retried before its deadline."""
+
+
+class TokenBucket:
+    """Allow `rate` units per second with bursts up to `capacity`.
+
+    acquire() reserves its units right away (the level may go negative) and
+    then sleeps off the debt, so waiters are served in arrival order
+    without a polling loop.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount=1, deadline=None):
+        """Block until `amount` units are available; return the seconds waited."""
+        amount = min(amount, self.capacity)
+        with self.lock:
+            now = time.monotonic()
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = max(0.0, (amount - self.level) / self.rate)
+            if deadline is not None and now + wait > deadline:
+                raise DeadlineExceeded(f"rate limit wait of {wait:.1f}s passes the deadline")
+            self.level -= amount
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+_END = object()
+
+
+class Scheduler:
+    """Shared gate for Gemini calls: rate limits, adaptive concurrency and retries.
+
+    - Token buckets cap requests per minute (`rpm`) and tokens per minute
+      (`tpm`, using the caller's estimate).
+    - The number of calls in flight follows AIMD. Each success raises the
+      limit by about 1/limit. A 429 halves it, at most once per observed
+      latency so a burst of 429s counts once. A latency above
+      `latency_target` shrinks it by 10%.
+    - Throttled and transient failures are retried with full-jitter
+      exponential backoff until `max_retries` or the call's `deadline`.
+
+    metrics() reports queue depth, wait times, the current limit, retries
+    and throttles.
+    """
+
+    def __init__(self, rpm=None, tpm=None, max_concurrency=16, min_concurrency=1,
+                 initial_concurrency=4, deadline=120.0, max_retries=6,
+                 base_delay=0.5, max_delay=30.0, latency_target=None):
+        self.requests = TokenBucket(rpm / 60.0, max(1, rpm // 6)) if rpm else None
+        self.tokens = TokenBucket(tpm / 60.0, max(1, tpm // 6)) if tpm else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(min(initial_concurrency, max_concurrency))
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.latency_target = latency_target
+        self.cond = threading.Condition()
+        self.in_flight = 0
+        self.waiting = 0
+        self.last_decrease = 0.0
+        self.last_latency = 1.0
+        self.waits = deque(maxlen=1000)
+        self.counts = {"calls": 0, "succeeded": 0, "failed": 0, "retries": 0, "throttled": 0}
+
+    # --- admission ---
+    def _acquire(self, cost, deadline):
+        start = time.monotonic()
+        with self.cond:
+            self.waiting += 1
+            try:
+                while self.in_flight >= int(self.limit):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise DeadlineExceeded("no free slot before the deadline")
+                    self.cond.wait(remaining)
+                self.in_flight += 1
+            finally:
+                self.waiting -= 1
+        try:
+            if self.requests:
+                self.requests.acquire(1, deadline)
+            if self.tokens:
+                self.tokens.acquire(cost, deadline)
+        except DeadlineExceeded:
+            self._release()
+            raise
+        self.waits.append(time.monotonic() - start)
+
+    def _release(self):
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify()
+
+    # --- AIMD ---
+    def _on_success(self, latency):
+        with self.cond:
+            self.last_latency = latency
+            if self.latency_target and latency > self.latency_target:
+                self.limit = max(self.min_concurrency, self.limit * 0.9)
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+            self.cond.notify_all()
+
+    def _on_throttle(self):
+        with self.cond:
+            now = time.monotonic()
+            if now - self.last_decrease >= self.last_latency:
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self.last_decrease = now
+
+    def _count(self, name):
+        with self.cond:
+            self.counts[name] += 1
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    # --- calls ---
+    def _run(self, fn, cost, deadline):
+        """Run `fn()` with retries; returns (result, start) with the slot still held."""
+        deadline = time.monotonic() + (self.deadline if deadline is None else deadline)
+        self._count("calls")
+        attempt = 0
+        while True:
+            self._acquire(cost, deadline)
+            start = time.monotonic()
+            try:
+                return fn(), start
+            except Exception as e:
+                self._release()
+                retry = is_transient(e) and attempt < self.max_retries
+                if is_throttled(e):
+                    self._count("throttled")
+                    self._on_throttle()
+                delay = self.backoff(attempt)
+                if not retry or time.monotonic() + delay >= deadline:
+                    self._count("failed")
+                    raise
+                self._count("retries")
+                attempt += 1
+                time.sleep(delay)
+
+    def _done(self, start):
+        self._release()
+        self._on_success(time.monotonic() - start)
+        self._count("succeeded")
+
+    def call(self, fn, cost=1, deadline=None):
+        """Run `fn()` under the limits, retrying throttled/transient errors."""
+        result, start = self._run(fn, cost, deadline)
+        self._done(start)
+        return result
+
+    def stream(self, fn, cost=1, deadline=None):
+        """Yield the items of the iterable `fn()` returns, under the limits.
+
+        Errors before the first item are retried like call(); once an item
+        has been yielded a failure is final. The slot is held until the
+        stream is exhausted or closed, so streamed generations count against
+        the concurrency limit and AIMD sees the whole generation time.
+        """
+        def first():
+            items = iter(fn())
+            return next(items, _END), items
+
+        (head, items), start = self._run(first, cost, deadline)
+        try:
+            if head is not _END:
+                yield head
+                yield from items
+        except Exception:
+            self._release()
+            self._count("failed")
+            raise
+        except GeneratorExit:
+            # Closed early by the consumer: free the slot, but the partial time says nothing about latency.
+            self._release()
+            self._count("succeeded")
+            raise
+        self._done(start)
+
+    def metrics(self):
+        waits = sorted(self.waits)
+        with self.cond:
+            return {
+                **self.counts,
+                "queue_depth": self.waiting,
+                "in_flight": self.in_flight,
+                "concurrency_limit": round(self.limit, 2),
+                "wait_p50_s": waits[len(waits) // 2] if waits else 0.0,
+                "wait_max_s": waits[-1] if waits else 0.0,
+            }
+
+
+_lock = threading.Lock()
+_scheduler = None
+
+
+def get_scheduler():
+    """The process-wide Scheduler, configured from the environment on first use.
+
+    GEMINI_RPM / GEMINI_TPM set the request and token rate limits (unset =
+    unlimited), GEMINI_MAX_CONCURRENCY caps calls in flight and
+    GEMINI_DEADLINE is the per-call budget in seconds, retries included.
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _lock:
+            if _scheduler is None:
+                env = os.getenv
+                _scheduler = Scheduler(
+                    rpm=int(env("GEMINI_RPM")) if env("GEMINI_RPM") else None,
+                    tpm=int(env("GEMINI_TPM")) if env("GEMINI_TPM") else None,
+                    max_concurrency=int(env("GEMINI_MAX_CONCURRENCY", "16")),
+                    deadline=float(env("GEMINI_DEADLINE", "120")),
+                )
+    return _scheduler
+
+
+def set_scheduler(scheduler):
+    """Replace the shared scheduler (e.g. with different limits in a benchmark)."""
+    global _scheduler
+    _scheduler = scheduler
@@ -0,0 +1,210 @@
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    """Cheap CPU embedding: hashed word unigrams, bigrams and character trigrams.
+
+    Needs no model download and gives the same vector in every process
+    (crc32, not Python's salted hash), so a cache saved by one run can be
+    reused by the next.
+
+    It is purely lexical: it measures shared words, not shared meaning.
+    "how old is donald trump" and "what is donald trump's age" score about
+    0.56, while "capital of France" and "capital of Spain" score 0.80 and a
+    question and its negation ("is aspirin safe..." / "...not safe...")
+    0.89. At the default 0.9 threshold it only catches reworded near-copies;
+    any lower threshold starts returning wrong answers. It is the fallback
+    when sentence-transformers is not installed.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim=512):
+        self.dim = dim
+
+    def features(self, text):
+        words = _WORD.findall(text.lower())
+        feats = list(words)
+        feats += [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"<{word}>"
+            feats += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        return feats
+
+    def embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feat in self.features(text):
+            h = zlib.crc32(feat.encode())
+            vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SentenceEmbedder:
+    """Embedding from a local sentence-transformers model, which matches paraphrases by meaning."""
+
+    def __init__(self, model_name="all-MiniLM-L6-v2"):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+        self.name = f"sentence-transformers/{model_name}"
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, text):
+        return self.model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+
+def default_embedder(dim=512):
+    """A SentenceEmbedder when sentence-transformers and its model are available, else HashingEmbedder(dim)."""
+    try:
+        return SentenceEmbedder()
+    except (ImportError, OSError):
+        return HashingEmbedder(dim)
+
+
+class SemanticCache:
+    """Answer near-duplicate prompts from earlier answers.
+
+    Prompts are embedded with `embedder` (default_embedder() if not given)
+    and kept in one NumPy matrix, so a lookup is a single matrix-vector
+    product. If the best cosine
+    similarity reaches `threshold` the cached answer is returned, and the
+    pair is written to an audit log so false hits can be reviewed. Past
+    `max_entries` the least recently used entry is replaced. The cache is
+    saved to `path` (.npz for vectors, .json for text) with save(); a saved
+    cache is only loaded back with the same embedder.
+    """
+
+    def __init__(self, path=None, threshold=0.9, max_entries=100_000, dim=512, audit_path=None,
+                 embedder=None):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.embedder = embedder if embedder is not None else default_embedder(dim)
+        dim = self.embedder.dim
+        self.audit_path = audit_path or (f"{path}.audit.jsonl" if path else None)
+        self.lock = threading.Lock()
+        self.vectors = np.zeros((1024, dim), dtype=np.float32)
+        self.last_used = np.zeros(1024, dtype=np.float64)
+        self.prompts = []
+        self.answers = []
+        self.exact = {}
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(f"{path}.npz"):
+            self.load()
+
+    def __len__(self):
+        return len(self.prompts)
+
+    def lookup(self, prompt):
+        """Return (answer, score) for the closest cached prompt, or (None, best score)."""
+        with self.lock:
+            index = self.exact.get(prompt)
+            if index is not None:
+                score = 1.0
+            elif self.prompts:
+                scores = self.vectors[:len(self.prompts)] @ self.embedder.embed(prompt)
+                index = int(np.argmax(scores))
+                score = float(scores[index])
+                if score < self.threshold:
+                    self.misses += 1
+                    return None, score
+            else:
+                self.misses += 1
+                return None, 0.0
+
+            self.hits += 1
+            self.last_used[index] = time.time()
+            if score < 1.0:
+                self._audit(prompt, self.prompts[index], score)
+            return self.answers[index], score
+
+    def add(self, prompt, answer):
+        vector = self.embedder.embed(prompt)
+        with self.lock:
+            if prompt in self.exact:
+                index = self.exact[prompt]
+            elif len(self.prompts) >= self.max_entries:
+                index = int(np.argmin(self.last_used[:len(self.prompts)]))
+                del self.exact[self.prompts[index]]
+                self.prompts[index] = prompt
+            else:
+                index = len(self.prompts)
+                if index == len(self.vectors):
+                    self._grow()
+                self.prompts.append(prompt)
+                self.answers.append(None)
+            self.vectors[index] = vector
+            self.answers[index] = answer
+            self.last_used[index] = time.time()
+            self.exact[prompt] = index
+
+    def _grow(self):
+        size = min(len(self.vectors) * 2, max(self.max_entries, 1))
+        vectors = np.zeros((size, self.vectors.shape[1]), dtype=np.float32)
+        vectors[:len(self.vectors)] = self.vectors
+        last_used = np.zeros(size, dtype=np.float64)
+        last_used[:len(self.last_used)] = self.last_used
+        self.vectors, self.last_used = vectors, last_used
+
+    def _audit(self, prompt, matched, score):
+        if not self.audit_path:
+            return
+        record = {"time": time.time(), "prompt": prompt, "matched": matched, "score": round(score, 4)}
+        with open(self.audit_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def save(self):
+        """Write the cache, each file through a temporary one so a crash never leaves it half written."""
+        with self.lock:
+            n = len(self.prompts)
+            _replace(f"{self.path}.npz", "wb",
+                     lambda f: np.savez(f, vectors=self.vectors[:n], last_used=self.last_used[:n]))
+            _replace(f"{self.path}.json", "w", lambda f: json.dump(
+                {"embedder": self.embedder.name, "dim": self.embedder.dim,
+                 "prompts": self.prompts, "answers": self.answers}, f))
+
+    def load(self):
+        with open(f"{self.path}.json", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("embedder", "hashing") != self.embedder.name or data["dim"] != self.embedder.dim:
+            return
+        arrays = np.load(f"{self.path}.npz")
+        n = len(data["prompts"])
+        if len(arrays["vectors"]) != n:  # the two files are from different saves
+            return
+        self.vectors = np.zeros((max(n, 1024), self.embedder.dim), dtype=np.float32)
+        self.vectors[:n] = arrays["vectors"]
+        self.last_used = np.zeros(len(self.vectors), dtype=np.float64)
+        self.last_used[:n] = arrays["last_used"]
+        self.prompts = data["prompts"]
+        self.answers = data["answers"]
+        self.exact = {p: i for i, p in enumerate(self.prompts)}
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+
+def _replace(path, mode, write):
+    """Write `path` with write(file) to a temporary file beside it, then swap it in."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
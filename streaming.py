@@ -0,0 +1,146 @@
+import os
+import queue
+import sys
+import threading
+import time
+
+from tokens import count
+
+
+class StreamStats:
+    """Perceived-latency numbers for one streamed response."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first = None
+        self.end = None
+        self.chars = 0
+        self.estimated = 0
+        self.tokens = None  # exact count when the caller knows it
+
+    def record(self, text):
+        if text and self.first is None:
+            self.first = time.perf_counter()
+        self.chars += len(text)
+        self.estimated += count(text)
+
+    @property
+    def ttft(self):
+        return None if self.first is None else self.first - self.start
+
+    @property
+    def token_count(self):
+        return self.tokens if self.tokens is not None else self.estimated
+
+    @property
+    def tokens_per_sec(self):
+        if self.first is None:
+            return 0.0
+        elapsed = (self.end or time.perf_counter()) - self.first
+        return self.token_count / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self):
+        end = self.end or time.perf_counter()
+        ttft = f"{self.ttft:.2f}s" if self.first is not None else "n/a"
+        approx = "" if self.tokens is not None else "~"
+        return (f"[first token {ttft}, {approx}{self.token_count} tokens in {end - self.start:.2f}s, "
+                f"{self.tokens_per_sec:.1f} tokens/s]")
+
+
+class StreamWriter:
+    """Write text to a stream as it arrives, flushing every write.
+
+    stdout is block-buffered when it is a pipe, so without a flush nothing
+    shows up until the buffer fills. If the reader goes away (e.g. `| head`)
+    the BrokenPipeError is swallowed, stdout is pointed at /dev/null so
+    the interpreter doesn't fail again at exit, and later writes are dropped.
+    """
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self.closed = False
+
+    def write(self, text):
+        if self.closed or not text:
+            return
+        try:
+            self.out.write(text)
+            self.out.flush()
+        except BrokenPipeError:
+            self.closed = True
+            try:
+                devnull = os.open(os.devnull, os.O_WRONLY)
+                os.dup2(devnull, self.out.fileno())
+            except (OSError, ValueError, AttributeError):
+                pass
+
+
+_DONE = object()
+
+
+def stream_to(chunks, out=None, report=sys.stderr, max_pending=256):
+    """Print text chunks as they arrive; return (full text, StreamStats).
+
+    Chunks are pulled from the model on a background thread while this
+    thread writes them out, so a short stall in a slow reader on the other
+    end of a pipe never stalls the HTTP stream: whatever arrived during a
+    slow write is joined and written in one go on the next round. At most
+    `max_pending` chunks wait in between; past that the pump blocks, so a
+    reader that stays slow throttles the stream instead of growing memory.
+    The stats line goes to `report` (stderr by default, so piped output
+    stays clean).
+    """
+    writer = StreamWriter(out)
+    stats = StreamStats()
+    pending = queue.Queue(maxsize=max_pending)
+    stopped = threading.Event()
+    state = {"error": None}
+
+    def pump():
+        try:
+            for chunk in chunks:
+                pending.put(chunk)
+                if stopped.is_set():
+                    return
+        except BaseException as e:
+            state["error"] = e
+        finally:
+            if not stopped.is_set():
+                pending.put(_DONE)
+
+    threading.Thread(target=pump, daemon=True, name="stream-pump").start()
+    parts = []
+    finished = False
+    try:
+        while not finished:
+            batch = [pending.get()]
+            while True:
+                try:
+                    batch.append(pending.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is _DONE:
+                batch.pop()
+                finished = True
+            if batch:
+                text = "".join(batch)
+                stats.record(text)
+                parts.append(text)
+                writer.write(text)
+    finally:
+        if not finished:
+            # Interrupted: let a pump blocked on a full queue run to its stop check.
+            stopped.set()
+            while True:
+                try:
+                    pending.get_nowait()
+                except queue.Empty:
+                    break
+
+    stats.end = time.perf_counter()
+    if state["error"] is not None:
+        raise state["error"]
+    writer.write("\n")
+    if report is not None:
+        print(stats, file=report)
+    return "".join(parts), stats
@@ -1,10 +1,16 @@
-import json
-from test import askGemini
+import io
+import queue
+import sys
+import threading
+from test import askGemini, askGemini_stream
+from tokens import count as count_tokens
+from jsonstream import QuizStreamParser
+from jsonextract import first_json
 import argparse
 
 
-def summarize_and_quiz(text):
-    prompt = f"""
+def build_prompt(text):
+    return f"""
 You are a helpful exam tutor. Read the TEXT below and return ONLY valid JSON with keys:
 - summary: a short 2-3 sentence summary
 - quiz: a list of 3 multiple-choice questions. Each question must be an object with:
@@ -17,21 +23,205 @@ TEXT:
 
 Return only JSON.
 """
-    raw = askGemini(prompt).strip()
 
-    if raw.startswith("```"):
-        raw = raw.split("```")[1]
-        if raw.startswith("json"):
-            raw = raw[len("json"):].strip()
+
+def build_batch_prompt(texts):
+    """One prompt covering several texts, so the instructions are sent once."""
+    documents = "\n".join(f'<text id="{i}">\n{text}\n</text>' for i, text in enumerate(texts))
+    return f"""
+You are a helpful exam tutor. Below are {len(texts)} TEXTs, each inside <text id="N"> tags.
+Handle each TEXT on its own. Return ONLY valid JSON of the form
+{{"results": [{{"id": N, "summary": ..., "quiz": [...]}}, ...]}} with exactly one entry per TEXT, where:
+- summary: a short 2-3 sentence summary of that TEXT
+- quiz: a list of 3 multiple-choice questions about that TEXT. Each question must be an object with:
+  - question (string)
+  - options (list of 4 strings)
+  - answer_index (0-3) which is the index of the correct option
+
+{documents}
+
+Return only JSON.
+"""
+
+
+def over_budget(text, budget):
+    return budget is not None and count_tokens(build_prompt(text)) > budget
+
+
+def _quiz(prompt, bypass_cache, budget=None):
+    raw = askGemini(prompt, bypass_cache=bypass_cache, budget=budget).strip()
 
     try:
-        return json.loads(raw)
-    except json.JSONDecodeError:
+        return first_json(raw, repair_truncated=True)
+    except ValueError:
         print("Failed to parse JSON. Raw response:")
         print(raw)
         raise
 
 
+def summarize_and_quiz(text, bypass_cache=False, budget=None):
+    """Summary and quiz for `text`; with a token `budget`, a text too large for one prompt is chunked."""
+    if over_budget(text, budget):
+        return summarize_and_quiz_document(io.StringIO(text), bypass_cache=bypass_cache, budget=budget)
+    return _quiz(build_prompt(text), bypass_cache)
+
+
+def summarize_and_quiz_stream(text, bypass_cache=False, budget=None):
+    """Yield ("summary", str) and then ("question", dict) events while Gemini is still generating."""
+    if over_budget(text, budget):
+        # Chunked map-reduce has no single stream to parse; replay its result as events.
+        result = summarize_and_quiz(text, bypass_cache, budget)
+        yield "summary", result["summary"]
+        for question in result["quiz"]:
+            yield "question", question
+        return
+    parser = QuizStreamParser()
+    for chunk in askGemini_stream(build_prompt(text), bypass_cache=bypass_cache):
+        yield from parser.feed(chunk)
+    if not parser.done:
+        print("Failed to parse JSON. Raw response:")
+        print(parser.buffer)
+        raise ValueError("Incomplete JSON in streamed response")
+
+
+# Smallest useful slice of a document per chunk prompt when a budget is set.
+MIN_CHUNK_TOKENS = 100
+
+
+def summarize_and_quiz_document(stream, concurrency=8, bypass_cache=False, budget=None):
+    """Summary and quiz for a document too large for one prompt.
+
+    The stream is summarized chunk by chunk (map-reduce) and the quiz is
+    generated from the reduced summary. With a token `budget`, chunks are
+    sized so every prompt fits in it, and any that still doesn't is
+    rejected before it is sent. Replies are cut to the length asked for, so
+    the reduce and quiz prompts fit too. A budget too small for the fixed
+    prompt text plus MIN_CHUNK_TOKENS of document fails up front, before
+    any call is made.
+    """
+    from docsummary import CHUNK_PROMPT, REDUCE_PROMPT, summarize_document
+    from tokens import TokenBudgetExceeded, truncate
+
+    max_tokens, summary_words, fanout = 2000, 150, 8
+    if budget is not None:
+        overhead = max(count_tokens(CHUNK_PROMPT), count_tokens(REDUCE_PROMPT), count_tokens(build_prompt(""))) + 20
+        if budget - overhead < MIN_CHUNK_TOKENS:
+            raise TokenBudgetExceeded(overhead + MIN_CHUNK_TOKENS, budget, "the fixed prompt text plus a minimal chunk")
+        max_tokens = min(max_tokens, budget - overhead)
+        # Replies are capped at about 2 tokens a word, so `fanout` of them (plus
+        # their "[i]" labels) fit in a reduce prompt, and the last one in the quiz prompt.
+        summary_words = min(summary_words, max_tokens // 5)
+        fanout = max(2, min(fanout, max_tokens // (summary_words * 2 + 10)))
+    ask = lambda prompt: askGemini(prompt, bypass_cache=bypass_cache, budget=budget)
+    if budget is not None:
+        # A reply longer than the words asked for would overflow the next reduce prompt.
+        ask = lambda prompt, ask=ask: truncate(ask(prompt), summary_words * 2)
+    reduced = summarize_document(stream, ask, max_tokens=max_tokens, overlap_tokens=max_tokens // 10,
+                                 fanout=fanout, concurrency=concurrency, summary_words=summary_words)
+    if budget is not None:
+        # Never fail the quiz prompt after every chunk has been paid for.
+        reduced = truncate(reduced, budget - count_tokens(build_prompt("")) - 20)
+    return _quiz(build_prompt(reduced), bypass_cache, budget)
+
+
+async def summarize_and_quiz_many(texts, concurrency=8, bypass_cache=False):
+    """Summarize many texts concurrently; returns BatchResults in input order."""
+    from batch import run_many
+    return await run_many(lambda t: summarize_and_quiz(t, bypass_cache), texts, concurrency)
+
+
+def summarize_and_quiz_many_sync(texts, concurrency=8, bypass_cache=False):
+    """Thread-pool version of summarize_and_quiz_many for sync callers."""
+    from batch import map_threaded
+    return map_threaded(lambda t: summarize_and_quiz(t, bypass_cache), texts, concurrency)
+
+
+def _is_result(value):
+    return isinstance(value, dict) and isinstance(value.get("summary"), str) \
+        and isinstance(value.get("quiz"), list)
+
+
+def split_batch_response(raw, count):
+    """Results of a build_batch_prompt reply by text id; None where one is missing or malformed."""
+    results = [None] * count
+    try:
+        data = first_json(raw, repair_truncated=True)
+    except ValueError:
+        return results
+    entries = data.get("results") if isinstance(data, dict) else data
+    for position, entry in enumerate(entries if isinstance(entries, list) else ()):
+        if not isinstance(entry, dict):
+            continue
+        index = entry.get("id", position)
+        if isinstance(index, int) and 0 <= index < count and _is_result(entry):
+            results[index] = {"summary": entry["summary"], "quiz": entry["quiz"]}
+    return results
+
+
+def summarize_and_quiz_batch(texts, bypass_cache=False, concurrency=8, on_fallback=None):
+    """Summary and quiz for several texts with one combined request.
+
+    Any text whose part of the combined reply is missing or unparsable
+    falls back to its own summarize_and_quiz call; on_fallback(n) is told
+    how many did. Returns BatchResults in input order.
+    """
+    from batch import BatchResult, map_threaded
+
+    texts = list(texts)
+    results = [None] * len(texts)
+    if len(texts) > 1:
+        try:
+            raw = askGemini(build_batch_prompt(texts), bypass_cache=bypass_cache)
+            results = split_batch_response(raw, len(texts))
+        except Exception:
+            pass  # every text falls back below
+    batch = [BatchResult(i, text, value=value) for i, (text, value) in enumerate(zip(texts, results))]
+
+    missing = [i for i, value in enumerate(results) if value is None]
+    if missing and len(texts) > 1 and on_fallback is not None:
+        on_fallback(len(missing))
+    fallback = map_threaded(lambda t: summarize_and_quiz(t, bypass_cache), [texts[i] for i in missing],
+                            concurrency)
+    for i, result in zip(missing, fallback):
+        batch[i] = BatchResult(i, texts[i], value=result.value, error=result.error)
+    return batch
+
+
+def stored(events, store, text):
+    """Pass summarize_and_quiz_stream events through, saving the result to `store` once complete."""
+    result = {"summary": "", "quiz": []}
+    for kind, value in events:
+        if kind == "summary":
+            result["summary"] = value
+        else:
+            result["quiz"].append(value)
+        yield kind, value
+    store.add(text, result)
+
+
+def list_matches(entries):
+    for entry in entries:
+        questions = len(entry["quiz"])
+        print(f"[{entry['id']}] {entry['hash'][:10]}  {questions} questions  {entry['summary'][:100]}")
+
+
+def ask_question(i, q):
+    """Print one question, read the answer and return True if it was right."""
+    print(f"\n{i}. {q['question']}")
+    for j, option in enumerate(q["options"], start=1):
+        print(f"   {chr(96+j)}) {option}")  # a), b), c), d)
+
+    user_input = input("Your answer (a/b/c/d): ").strip().lower()
+
+    correct_letter = chr(97 + q["answer_index"])
+    correct_option = q["options"][q["answer_index"]]
+
+    if user_input == correct_letter:
+        return True
+    print(f" ❌ Wrong. correct anser: {correct_letter}) {correct_option}")
+    return False
+
+
 def display(result):
     """Nicely print the summary and quiz from Gemini response"""
     print("\n📌 Summary:")
@@ -42,32 +232,117 @@ def display(result):
     number_of_quiz = len(result["quiz"])
 
     for i, q in enumerate(result["quiz"], start=1):
-        print(f"\n{i}. {q['question']}")
-        for j, option in enumerate(q["options"], start=1):
-            print(f"   {chr(96+j)}) {option}")  # a), b), c), d)
+        if ask_question(i, q):
+            score+= 1
+            print(f" correct! ✅, score current score is {score} / {number_of_quiz}")
 
-        user_input = input("Your answer (a/b/c/d): ").strip().lower()
+    print("\n Total score: ")
+    print(f"you got {score} out of {number_of_quiz}")
 
-        correct_letter = chr(97 + q["answer_index"])
-        correct_option = q["options"][q["answer_index"]]
-        
 
-        if user_input == correct_letter:
-            score+= 1
-            print(f" correct! ✅, score current score is {score} / {number_of_quiz}")
+def display_stream(events):
+    """Like display, but start asking questions while the rest are still generating.
+
+    `events` comes from summarize_and_quiz_stream. It is consumed on a
+    background thread so generation keeps going while we wait for input.
+    """
+    pending = queue.Queue()
+
+    def produce():
+        try:
+            for event in events:
+                pending.put(event)
+        except Exception as e:
+            pending.put(("error", e))
+        pending.put(None)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    score = 0
+    asked = 0
+    while True:
+        event = pending.get()
+        if event is None:
+            break
+        kind, value = event
+        if kind == "error":
+            raise value
+        if kind == "summary":
+            print("\n📌 Summary:")
+            print(value)
+            print("\n📝 Quiz:")
         else:
-            print(f" ❌ Wrong. correct anser: {correct_letter}) {correct_option}")
+            asked += 1
+            if ask_question(asked, value):
+                score += 1
+                print(f" correct! ✅, score current score is {score} / {asked}")
 
     print("\n Total score: ")
-    print(f"you got {score} out of {number_of_quiz}")
+    print(f"you got {score} out of {asked}")
 
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('prompt', nargs='*', help='Prompt to send to Gemini')
+    parser.add_argument('--no-cache', action='store_true', help='Skip the response cache (GEMINI_CACHE)')
+    parser.add_argument('--stream', action='store_true', help='Start the quiz before the whole response has arrived')
+    parser.add_argument('--file', metavar='PATH', help="Summarize a (large) document from PATH, or '-' for stdin")
+    parser.add_argument('--concurrency', type=int, default=8, help='Chunks summarized in parallel with --file')
+    parser.add_argument('--max-prompt-tokens', type=int, metavar='N',
+                        help='Token budget per request; longer input is summarized in chunks that fit')
+    parser.add_argument('--serve', nargs='?', const='127.0.0.1:8080', metavar='HOST:PORT',
+                        help='Run as an HTTP service that batches concurrent requests (see quizserver.py)')
+    parser.add_argument('--batch-window-ms', type=float, default=20, help='How long --serve collects a batch')
+    parser.add_argument('--batch-tokens', type=int, default=8000, help='Estimated prompt tokens per batch')
+    parser.add_argument('--batch-size', type=int, default=16, help='Most texts in one batch')
+    parser.add_argument('--store', metavar='PATH', help='Quiz store to save results to and replay from (QUIZ_STORE)')
+    parser.add_argument('--replay', nargs='?', const='latest', metavar='ID|HASH',
+                        help='Retake a stored quiz (default: the latest) without calling Gemini')
+    parser.add_argument('--search', metavar='QUERY', help='List stored quizzes matching QUERY')
     args = parser.parse_args()
-    prompt = " ".join(args.prompt) if args.prompt else input("Enter your prompt: ")
 
-    result = summarize_and_quiz(prompt)
-    display(result)
+    from quizstore import get_store
+    store = get_store(args.store)
+    if (args.replay or args.search) and store is None:
+        parser.error("--replay and --search need --store PATH or QUIZ_STORE")
+
+    if args.search:
+        list_matches(store.search(args.search))
+    elif args.replay:
+        entry = store.latest() if args.replay == "latest" else store.find(args.replay)
+        if entry is None:
+            sys.exit(f"No stored quiz matches {args.replay!r}")
+        display(entry)
+    elif args.serve:
+        import asyncio
+        from quizserver import serve
+
+        host, _, port = args.serve.rpartition(":")
+        try:
+            asyncio.run(serve(host or "127.0.0.1", int(port), window=args.batch_window_ms / 1000,
+                              max_tokens=args.batch_tokens, max_batch=args.batch_size,
+                              workers=args.concurrency, bypass_cache=args.no_cache))
+        except KeyboardInterrupt:
+            pass
+    elif args.file == "-":
+        display(summarize_and_quiz_document(sys.stdin, args.concurrency, args.no_cache, args.max_prompt_tokens))
+    elif args.file:
+        with open(args.file, encoding="utf-8") as f:
+            result = summarize_and_quiz_document(f, args.concurrency, args.no_cache, args.max_prompt_tokens)
+        display(result)
+    else:
+        prompt = " ".join(args.prompt) if args.prompt else input("Enter your prompt: ")
+        entry = store.get(prompt) if store is not None and not args.no_cache else None
+
+        if entry is not None:
+            print(f"(replaying stored quiz {entry['id']})", file=sys.stderr)
+            display(entry)
+        elif args.stream:
+            events = summarize_and_quiz_stream(prompt, args.no_cache, args.max_prompt_tokens)
+            display_stream(stored(events, store, prompt) if store is not None else events)
+        else:
+            result = summarize_and_quiz(prompt, args.no_cache, args.max_prompt_tokens)
+            if store is not None:
+                store.add(prompt, result)
+            display(result)
@@ -1,22 +1,95 @@
-import os
-from dotenv import load_dotenv
-import google.generativeai as genai
+import metrics
+from clients import get_model
 
-# Load .env file
-load_dotenv()
 
-# Get API key from .env
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("API key not found. Please set GEMINI_API_KEY in your .env file.")
+def _usage(call, response, prompt, text):
+    """Token counts from the response's usage metadata, or estimated if it has none."""
+    from tokens import count
 
-# Configure Gemini
-genai.configure(api_key=api_key)
+    usage = getattr(response, "usage_metadata", None)
+    call.usage(getattr(usage, "prompt_token_count", None) or count(prompt),
+               getattr(usage, "candidates_token_count", None) or count(text))
 
-def askGemini(prompt, model_name="gemini-1.5-flash"):
-    model = genai.GenerativeModel(model_name)
-    response = model.generate_content(prompt)
+def askGemini(prompt, model_name="gemini-1.5-flash", generation_config=None, bypass_cache=False, budget=None):
+    from cache import get_cache, make_key
+    from tokens import check
+
+    # Refuse prompts over `budget` tokens locally instead of after a slow remote failure
+    cost = check(prompt, budget)
+
+    # Opt-in response cache: set GEMINI_CACHE=/path/to/cache.db to enable it
+    cache = None if bypass_cache else get_cache()
+    if cache is not None:
+        key = make_key(model_name, prompt, generation_config)
+        cached = cache.get(key)
+        if cached is not None:
+            metrics.record_cached(model_name)
+            return cached
+
+    from scheduler import get_scheduler
+
+    # Rate limits, adaptive concurrency and retries on 429s/5xx (see scheduler.py)
+    model = get_model(model_name, generation_config)
+    with metrics.model_call(model_name) as call:
+        response = get_scheduler().call(call.attempt(lambda: model.generate_content(prompt)), cost=cost)
+        _usage(call, response, prompt, response.text)
+
+    if cache is not None:
+        cache.set(key, response.text)
     return response.text
 
+def askGemini_stream(prompt, model_name="gemini-1.5-flash", generation_config=None, bypass_cache=False,
+                     budget=None):
+    """Yield the response text chunk by chunk as Gemini generates it."""
+    from cache import get_cache, make_key
+    from tokens import check
+
+    cost = check(prompt, budget)
+
+    cache = None if bypass_cache else get_cache()
+    if cache is not None:
+        key = make_key(model_name, prompt, generation_config)
+        cached = cache.get(key)
+        if cached is not None:
+            metrics.record_cached(model_name)
+            yield cached
+            return
+
+    from scheduler import get_scheduler
+
+    model = get_model(model_name, generation_config)
+    parts = []
+    with metrics.model_call(model_name) as call:
+        # Retried until the first chunk; the scheduler slot is held until the stream ends.
+        stream = get_scheduler().stream(call.attempt(lambda: model.generate_content(prompt, stream=True)),
+                                        cost=cost)
+        chunk = None
+        try:
+            for chunk in stream:
+                parts.append(chunk.text)
+                yield chunk.text
+        finally:
+            stream.close()
+        _usage(call, chunk, prompt, "".join(parts))
+
+    if cache is not None:
+        cache.set(key, "".join(parts))
+
+async def askGemini_many(prompts, concurrency=8, model_name="gemini-1.5-flash", **kwargs):
+    """Ask several prompts concurrently; returns BatchResults in prompt order."""
+    from batch import run_many
+    return await run_many(lambda p: askGemini(p, model_name, **kwargs), prompts, concurrency)
+
+async def askGemini_as_completed(prompts, concurrency=8, model_name="gemini-1.5-flash", **kwargs):
+    """Ask several prompts concurrently and yield BatchResults as they finish."""
+    from batch import iter_many
+    async for result in iter_many(lambda p: askGemini(p, model_name, **kwargs), prompts, concurrency):
+        yield result
+
+def askGemini_many_sync(prompts, concurrency=8, model_name="gemini-1.5-flash", **kwargs):
+    """Thread-pool version of askGemini_many for code without an event loop."""
+    from batch import map_threaded
+    return map_threaded(lambda p: askGemini(p, model_name, **kwargs), prompts, concurrency)
+
 if __name__ == "__main__":
-    print(askGemini("hey gemini, what cool stuff can i achive with ur api and python"))
\ No newline at end of file
+    print(askGemini("hey gemini, what cool stuff can i achive with ur api and python"))
@@ -0,0 +1,298 @@
+"""Local Gemini token estimates, prompt budgets and calibration.
+
+    import tokens
+    tokens.count(prompt)                     # a few microseconds, cached
+    tokens.count_many(documents)             # NumPy array, one pass over all of them
+    tokens.check(prompt, budget=8000)        # raises TokenBudgetExceeded before the call
+    python tokens.py calibrate notes/*.md    # fit the weights to real Gemini counts
+
+An estimate is a weighted sum of six byte-class features (words, letters,
+digits, punctuation, non-ASCII bytes and newlines), which is how
+SentencePiece-style tokenizers mostly behave: roughly one token per short
+word, extra tokens for long words, one per digit, and several per CJK
+character. The default weights are tuned for English prose. Calibration
+fits them to count_tokens() answers by least squares and saves them to
+GEMINI_TOKEN_CALIBRATION, which is loaded on first use.
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import threading
+
+FEATURES = ("words", "letters", "digits", "punct", "non_ascii", "newlines")
+DEFAULT_WEIGHTS = (0.75, 0.09, 1.0, 0.8, 0.4, 0.5)
+# Per-message framing (role markers) in a chat request.
+MESSAGE_OVERHEAD = 4
+# Longer texts are counted without caching: hashing them costs about as much
+# as counting, and keeping them alive would pin large documents in memory.
+CACHE_MAX_CHARS = 16384
+# features_many() counts texts up to this many UTF-8 bytes together, each
+# feature in a 10-bit field of one int64. Past it the per-byte cost dominates
+# and bytes.translate, one text at a time, is faster anyway.
+_FIELD_BITS = 10
+VECTOR_MAX_BYTES = (1 << _FIELD_BITS) - 1
+
+# Byte -> feature class: 0 letter, 1 digit, 2 punct, 3 non-ASCII, 4 newline, 5 space/control.
+# A plain list: NumPy is only imported by the batch paths, so count() stays
+# cheap to import for scripts that start up on every run.
+_CLASSES = [5] * 128 + [3] * 128
+for _c in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ":
+    _CLASSES[ord(_c)] = 0
+for _c in "0123456789":
+    _CLASSES[ord(_c)] = 1
+for _c in "!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~":
+    _CLASSES[ord(_c)] = 2
+_CLASSES[ord("\n")] = 4
+# The same classes as bytes.translate tables, for the single-text path.
+_TABLE = bytes(b"LDPN\n "[c] for c in _CLASSES)
+_LETTERS_ONLY = bytes(ord("L") if c == 0 else ord(" ") for c in _CLASSES)
+# Byte -> its class's field (words is field 0, then FEATURES order), and byte -> is a letter.
+_PACKED = [1 << (_FIELD_BITS * (c + 1)) if c < 5 else 0 for c in _CLASSES]
+_IS_LETTER = bytes(c == 0 for c in _CLASSES)
+
+
+class TokenBudgetExceeded(ValueError):
+    """A prompt is over its token budget, so it was not sent."""
+
+    def __init__(self, tokens, budget, what="prompt"):
+        super().__init__(f"{what} is ~{tokens} tokens, over its budget of {budget}")
+        self.tokens = tokens
+        self.budget = budget
+
+
+def features(text):
+    """The six feature counts of one text, using bytes.translate (no NumPy overhead)."""
+    data = text.encode("utf-8")
+    classes = data.translate(_TABLE)
+    letters = data.translate(_LETTERS_ONLY)
+    words = letters.count(b" L") + letters.startswith(b"L")
+    return (words, classes.count(b"L"), classes.count(b"D"), classes.count(b"P"),
+            classes.count(b"N"), classes.count(b"\n"))
+
+
+def features_many(texts):
+    """Feature matrix (len(texts) x 6) for many texts in a few vectorized passes."""
+    import numpy as np
+
+    encoded = [t.encode("utf-8") for t in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    out = np.zeros((len(encoded), len(FEATURES)), dtype=np.int64)
+    short = np.flatnonzero((lengths > 0) & (lengths <= VECTOR_MAX_BYTES))
+    if len(short):
+        out[short] = _packed_features(b"".join([encoded[i] for i in short]), lengths[short])
+    for i in np.flatnonzero(lengths > VECTOR_MAX_BYTES):
+        out[i] = features(texts[i])
+    return out
+
+
+def _packed_features(data, lengths):
+    """Features of the non-empty texts concatenated in `data`, each at most VECTOR_MAX_BYTES."""
+    import numpy as np
+
+    # Every byte adds one to its class's field and every word start one to field 0,
+    # so a single reduceat sums all six counts of each text at once.
+    values = np.array(_PACKED, dtype=np.int64)[np.frombuffer(data, dtype=np.uint8)]
+    letters = np.frombuffer(data.translate(_IS_LETTER), dtype=bool)
+    offsets = np.zeros(len(lengths), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+    # A word starts at a letter whose previous byte is not a letter of the same text.
+    starts = letters.copy()
+    starts[1:] &= ~letters[:-1]
+    starts[offsets] = letters[offsets]
+    values += starts
+    sums = np.add.reduceat(values, offsets)
+    shifts = np.arange(len(FEATURES), dtype=np.int64) * _FIELD_BITS
+    return (sums[:, None] >> shifts) & ((1 << _FIELD_BITS) - 1)
+
+
+class Estimator:
+    """Token counts from byte-class features and a weight per feature."""
+
+    def __init__(self, weights=DEFAULT_WEIGHTS, cache_size=8192):
+        self._weights = tuple(float(w) for w in weights)
+        self._cached = functools.lru_cache(maxsize=cache_size)(self._count)
+
+    def count(self, text):
+        return self._cached(text) if len(text) <= CACHE_MAX_CHARS else self._count(text)
+
+    @property
+    def weights(self):
+        import numpy as np
+
+        return np.array(self._weights, dtype=np.float64)
+
+    def _count(self, text):
+        # Only the empty string is 0 tokens; anything else (even whitespace) is at least 1.
+        if not text:
+            return 0
+        return max(1, int(self._total(features(text)) + 0.5))
+
+    def _total(self, row):
+        total = 0.0
+        for w, f in zip(self._weights, row):
+            total += w * f
+        return total
+
+    def count_many(self, texts):
+        """Token counts for many texts as an int array; same results as count()."""
+        import numpy as np
+
+        texts = list(texts)
+        matrix = features_many(texts)
+        totals = matrix.astype(np.float64) @ self.weights
+        # The dot product adds in another order than _count, which can only matter
+        # for a total within rounding error of .5: recount those the same way.
+        for i in np.flatnonzero(np.abs(totals - np.floor(totals) - 0.5) < 1e-9):
+            totals[i] = self._total(matrix[i].tolist())
+        out = np.maximum(np.floor(totals + 0.5).astype(np.int64), 1)
+        out[np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)) == 0] = 0
+        return out
+
+    def fit(self, texts, counts):
+        """Least-squares weights (kept non-negative) for texts with known token counts."""
+        import numpy as np
+
+        x = features_many(texts).astype(np.float64)
+        y = np.asarray(counts, dtype=np.float64)
+        weights = np.linalg.lstsq(x, y, rcond=None)[0]
+        return Estimator(np.clip(weights, 0.0, None))
+
+    def error(self, texts, counts):
+        """Mean absolute percentage error against known counts."""
+        import numpy as np
+
+        y = np.asarray(counts, dtype=np.float64)
+        predicted = self.count_many(texts)
+        return float(np.mean(np.abs(predicted - y) / np.maximum(y, 1)))
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(dict(zip(FEATURES, self._weights)), f, indent=2)
+            f.write("\n")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            weights = json.load(f)
+        return cls([weights[name] for name in FEATURES])
+
+
+_lock = threading.Lock()
+_estimator = None
+
+
+def get_estimator():
+    """The shared Estimator, with calibrated weights from GEMINI_TOKEN_CALIBRATION if set."""
+    global _estimator
+    if _estimator is None:
+        with _lock:
+            if _estimator is None:
+                path = os.getenv("GEMINI_TOKEN_CALIBRATION")
+                _estimator = Estimator.load(path) if path and os.path.exists(path) else Estimator()
+    return _estimator
+
+
+def set_estimator(estimator):
+    global _estimator
+    _estimator = estimator
+
+
+def count(text):
+    """Estimated Gemini tokens in `text`."""
+    return get_estimator().count(text)
+
+
+def count_many(texts):
+    """Estimated tokens for each of `texts`, as a NumPy int array."""
+    return get_estimator().count_many(list(texts))
+
+
+def message_text(message):
+    """What a chat message costs in the prompt: its content plus any tool-call names and args."""
+    text = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    for call in getattr(message, "tool_calls", None) or ():
+        text += call["name"] + json.dumps(call["args"])
+    return text
+
+
+def count_messages(messages):
+    return sum(count(message_text(m)) + MESSAGE_OVERHEAD for m in messages)
+
+
+def check(text, budget, what="prompt"):
+    """Return the token count of `text`, or raise TokenBudgetExceeded if it is over `budget`."""
+    tokens = count(text)
+    if budget is not None and tokens > budget:
+        raise TokenBudgetExceeded(tokens, budget, what)
+    return tokens
+
+
+def prefix_length(text, budget):
+    """Length of the longest prefix of `text` within `budget` tokens (binary search)."""
+    if count(text) <= budget:
+        return len(text)
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if get_estimator()._count(text[:mid]) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def truncate(text, budget):
+    """`text` cut to fit in `budget` tokens."""
+    return text[:prefix_length(text, budget)]
+
+
+# --- calibration against the real tokenizer ---
+def _samples(paths, max_chars):
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for paragraph in f.read().split("\n\n"):
+                paragraph = paragraph.strip()
+                if paragraph:
+                    yield paragraph[:max_chars]
+
+
+def calibrate(texts, model_name="gemini-1.5-flash", concurrency=8):
+    """Fit an Estimator to count_tokens() for `texts`; returns (estimator, error before, error after)."""
+    from batch import map_threaded
+    from clients import get_model
+
+    model = get_model(model_name)
+    results = list(map_threaded(lambda t: model.count_tokens(t).total_tokens, texts, concurrency))
+    pairs = [(r.item, r.value) for r in results if r.ok]
+    if not pairs:
+        raise RuntimeError(f"count_tokens failed for every sample: {results[0].error if results else 'no samples'}")
+    texts, counts = zip(*pairs)
+    fitted = Estimator().fit(texts, counts)
+    return fitted, Estimator().error(texts, counts), fitted.error(texts, counts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count tokens locally or calibrate the estimator")
+    sub = parser.add_subparsers(dest="command", required=True)
+    counter = sub.add_parser("count", help="Estimate the tokens in files (or stdin)")
+    counter.add_argument("files", nargs="*")
+    fitter = sub.add_parser("calibrate", help="Fit the weights to Gemini's count_tokens on sample files")
+    fitter.add_argument("files", nargs="+", help="Text files; every paragraph is one sample")
+    fitter.add_argument("--model", default="gemini-1.5-flash")
+    fitter.add_argument("--max-chars", type=int, default=4000, help="Longest sample sent to count_tokens")
+    fitter.add_argument("--out", default=os.getenv("GEMINI_TOKEN_CALIBRATION", "token_calibration.json"))
+    args = parser.parse_args()
+
+    if args.command == "count":
+        if not args.files:
+            print(count(sys.stdin.read()))
+        for path in args.files:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                print(f"{count(f.read()):>10}  {path}")
+    else:
+        estimator, before, after = calibrate(list(_samples(args.files, args.max_chars)), args.model)
+        estimator.save(args.out)
+        print(f"mean error {before:.1%} -> {after:.1%}; weights written to {args.out}")
+        print(f"set GEMINI_TOKEN_CALIBRATION={args.out} to use them")